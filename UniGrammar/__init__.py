@@ -9,6 +9,8 @@ warnings.warn("We have moved from M$ GitHub to https://codeberg.org/UniGrammar/U
 
 from .core.ast import Grammar
 from .core.backend.Generator import Generator, TranspiledResult
+from .core.outputFiles import WriterIfChanged, WriteStats, writeTextIfChanged
+from .core.profiling import span
 from .ownGrammarFormat import parseUniGrammarFile
 
 
@@ -24,16 +26,43 @@ class GrammarTranspilationResults:  # pylint: disable=too-few-public-methods
 
 def transpile(grammar: Grammar, backend: Generator) -> str:
 	"""Transpiles a unigrammar into backend-specific grammar"""
-	ctx = backend.initContext(grammar)
-	backend.preprocessGrammar(grammar, ctx)
-	lines = backend._transpile(grammar, ctx)
-
-	return TranspiledResult(grammar.meta.id, "\n".join(lines))
+	with span("transpile", generator=backend.__name__, grammar=grammar.meta.id):
+		ctx = backend.initContext(grammar)
+		with span("preprocessGrammar"):
+			backend.preprocessGrammar(grammar, ctx)
+		with span("resolve"):
+			lines = backend._transpile(grammar, ctx)
+
+		with span("join"):
+			return TranspiledResult(grammar.meta.id, "\n".join(lines))
+
+
+def _writeLines(lines: typing.Iterable[str], sink: typing.TextIO) -> None:
+	"""Writes the same as `sink.write("\\n".join(lines))` without materializing the joined string"""
+	lines = iter(lines)
+	for l in lines:
+		sink.write(l)
+		break
+	for l in lines:
+		sink.write("\n")
+		sink.write(l)
+
+
+def transpileInto(grammar: Grammar, backend: Generator, sink: typing.TextIO) -> None:
+	"""Like `transpile`, but writes the transpiled grammar into `sink` while it is being generated. For `SectionedGenerator`s only one section of the grammar is in memory at a time."""
+	with span("transpile", generator=backend.__name__, grammar=grammar.meta.id):
+		ctx = backend.initContext(grammar)
+		with span("preprocessGrammar"):
+			backend.preprocessGrammar(grammar, ctx)
+		with span("resolve"):
+			_writeLines(backend.iterTranspile(grammar, ctx), sink)
 
 
 def _transpileGrammarForGenerators(gr: Grammar, backends: typing.Iterable[Generator]) -> typing.Iterator[typing.Tuple[Generator, TranspiledResult]]:
 	for backend in backends:
-		yield backend, transpile(deepcopy(gr), backend)  # during transpilation AST is modified, so we need a fresh copy
+		with span("deepcopy", generator=backend.__name__):
+			grCopy = deepcopy(gr)  # during transpilation AST is modified, so we need a fresh copy
+		yield backend, transpile(grCopy, backend)
 
 
 def transpileGrammarForGenerators(gr: Grammar, backends: typing.Iterable[Generator]) -> GrammarTranspilationResults:
@@ -50,11 +79,35 @@ def transpileFileForGenerators(grammarFile: Path, backends: typing.Iterable[Gene
 def transpileFilesForGenerators(files: typing.Iterable[Path], backends: typing.Iterable[Generator]) -> typing.Iterable[typing.Tuple[Path, GrammarTranspilationResults]]:
 	"""Just transpiles multiple unigrammar files for multiple backends"""
 	for file in files:
-		yield file, transpileFileForGenerators(file, backends)
+		with span("file", file=file):
+			res = transpileFileForGenerators(file, backends)
+		yield file, res
+
 
+def getTranspiledFilePath(outputDir: Path, grammarId: str, backend: Generator) -> Path:
+	return outputDir / (grammarId + "." + backend.META.mainExtension)
 
-def saveTranspiled(transpiledFiles: typing.Dict[Path, GrammarTranspilationResults], outputDir: Path) -> None:
-	"""Saves transpiled grammars (retured by `transpileFilesForGenerators` into files"""
+
+def transpileFilesIntoDir(files: typing.Iterable[Path], backends: typing.Iterable[Generator], outputDir: Path) -> WriteStats:
+	"""Transpiles multiple unigrammar files for multiple backends and saves the results into files. Unlike `saveTranspiled(dict(transpileFilesForGenerators(...)))` the transpiled grammars are written while they are generated instead of being kept in memory. Files which content would not change are not touched."""
+	stats = WriteStats()
+	backends = tuple(backends)
+	for file in files:
+		with span("file", file=file):
+			gr = parseUniGrammarFile(file)
+			for backend in backends:
+				with span("deepcopy", generator=backend.__name__):
+					grCopy = deepcopy(gr)  # during transpilation AST is modified, so we need a fresh copy
+				with WriterIfChanged(getTranspiledFilePath(outputDir, gr.meta.id, backend)) as f:
+					transpileInto(grCopy, backend, f)
+				stats.register(f.written)
+	return stats
+
+
+def saveTranspiled(transpiledFiles: typing.Dict[Path, GrammarTranspilationResults], outputDir: Path) -> WriteStats:
+	"""Saves transpiled grammars (retured by `transpileFilesForGenerators` into files. Files which content would not change are not touched."""
+	stats = WriteStats()
 	for transpiled in transpiledFiles.values():
 		for backend, transpiledResult in transpiled.backendResultMapping.items():
-			(outputDir / (transpiledResult.id + "." + backend.META.mainExtension)).write_text(transpiledResult.text, encoding="utf-8")
+			stats.register(writeTextIfChanged(getTranspiledFilePath(outputDir, transpiledResult.id, backend), transpiledResult.text))
+	return stats
@@ -1,114 +1,63 @@
 """This module defines the CLI"""
-import re
+import ast
+import json
+import os
+import pickle
+import random
 import typing
 import warnings
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from pickle import PicklingError
 
 from pantarei import chosenProgressReporter
 from plumbum import cli
-from UniGrammarRuntime.grammarClasses import GrammarClass
 from UniGrammarRuntime.ParserBundle import InMemoryGrammarResources, ParserBundle
-from UniGrammarRuntimeCore.PoolManager import PoolManager
 
-from . import parseUniGrammarFile, saveTranspiled, transpile, transpileFilesForGenerators
-from .core.backend.Generator import Generator
+from . import parseUniGrammarFile, transpile, transpileFilesForGenerators, transpileFilesIntoDir
+from .core import profiling
 from .core.backend.Runner import NotYetImplementedRunner, Runner
+from .core.benchmarking import benchmarkParsers, loadCostModels, saveCostModels, stratifiedSample
+from .core.bundleManifest import BundleManifest, hashOptions, hashSourceFile
+from .core.cache import hashText
+from .core.diffTesting import BackendRun, compareBackendsResults, runBackend
+from .core.outputFiles import WriteStats, WriterIfChanged
+from .core.samplesGenerator import SamplesGenerator, drawTargetSize, parseSize, sizesDistributions
+from .core.testResultsCache import CachedTestResult, TestResultsCache, getBackendVersion
 from .core.WrapperGen import WrapperGen
-from .tools.multilanguage.antlr4 import ANTLR
-from .tools.multilanguage.CoCoR import CoCoR
-from .tools.multilanguage.waxeye import Waxeye
-from .tools.python.arpeggio import Arpeggio
-from .tools.python.lark import Lark
-from .tools.python.parglare import Parglare
-from .tools.python.parsimonious import Parsimonious
-from .tools.python.TatSu import TatSu
-from .tools.regExps.python import PythonRegExp
-
-backendz = (Parglare, ANTLR, Waxeye, TatSu, Parsimonious, Arpeggio, CoCoR, Lark, PythonRegExp)
-backendsNames = {b.RUNNER.PARSER.META.product.name: b for b in backendz}
-
-
-class selectors:
-	"""Contains methods to retrieve backends matching some criteria. Each method corresponds to a criteria"""
-
-	@staticmethod
-	def name(name: str) -> typing.Iterable[Generator]:
-		"""Selects a backend based on its name"""
-		b = backendsNames.get(name, None)
-		if b is None:
-			raise KeyError(name, backendsNames)
-
-		yield b
-
-	@staticmethod
-	def lang(lang: str) -> typing.Iterable[Generator]:
-		"""Selects a backend based on languages supported by the backend"""
-		for b in backendz:
-			if lang in b.META.runtimeLib:
-				yield b
-
-	@staticmethod
-	def cls(grammarClass: str) -> typing.Iterable[Generator]:
-		"""Selects a backend based on classes of grammars that can be implemented using it."""
-		grammarClass = GrammarClass.fromStr(grammarClass)
-		for b in backendz:
-			for gCl in b.META.grammarClasses:
-				if grammarClass < gCl:
-					yield b
-					break
-
-
-selectorRx = re.compile("^(?:(lang|cls):)(.+)$")
-
-
-def parseToolsString(s: str) -> typing.Iterable[Generator]:
-	"""Parses `backend string` specifying selection backends using some criteria, selects the backends based on it and yields them"""
-	m = selectorRx.match(s)
-	if m:
-		selector = getattr(selectors, m.group(1))
-		s = m.group(2)
-	else:
-		selector = selectors.name
-	for n in s.split(","):
-		yield from selector(n)
-
-
-allToolsNames = frozenset(("all", "*"))
-
-
-def _parseToolsStrings(s: str) -> typing.Iterable[Generator]:
-	if s in allToolsNames:
-		return backendz
-	for bs in s.split(":"):
-		return parseToolsString(bs)
-
-
-def parseToolsStrings(s: str) -> typing.Set[Generator]:
-	"""Parses `backend string`s specifying selection backends using some criteria, selects the backends based on them and returns them. The set of backends is deduplicated."""
-	return set(_parseToolsStrings(s))
+from .core.WrapperGen.bytecode import saveWrapperBytecode
+from .core.WrapperGen.WrapperGenContext import RecordsMode
+from .toolsRegistry import ANTLR, createGeneratorsToToolsMapping, parsersFactoriesAndCompilersPool, parseToolsStrings, runnersPool
 
 
 class UniGrammarCLI(cli.Application):
 	"""UniGrammar is a tool for transpiling grammars to other parsers generators."""
 
 
-def createGeneratorsToToolsMapping(tools):
-	generators = defaultdict(set)
-	for t in tools:
-		generators[t.GENERATOR].add(t)
-	return dict(generators)
-
-
 class UniGrammarCLICommandInvolvingTranspilation(cli.Application):
 	"""A CLI command that requires transpilation of a grammar"""
 
-	def prepare(self, tools, *files):  # pylint:disable=no-self-use
+	profile = cli.SwitchAttr(["--profile"], str, default=None, help="Write the spans of transpilation phases as Chrome trace-event JSON into the file and print a summary table")
+	profileMemory = cli.Flag(["--profile-memory"], default=False, requires=["--profile"], help="Record peak of memory allocated in each phase with `tracemalloc`, slows transpilation down")
+
+	def profiled(self, func: typing.Callable, *args, **kwargs) -> typing.Any:
+		"""Calls `func`, profiling it if `--profile` is given"""
+		if self.profile is None:
+			return func(*args, **kwargs)
+
+		with profiling.profile(self.profileMemory) as p:
+			res = func(*args, **kwargs)
+		p.saveChromeTrace(Path(self.profile))
+		print(p.summary())
+		return res
+
+	def prepare(self, tools, *files):
 		"""Transpiles the files into in-memory grammar sources in the target DSLs ready to for further usage"""
 		tools = parseToolsStrings(tools)
 		generators = createGeneratorsToToolsMapping(tools)
 		files = tuple(Path(file) for file in files)
-		fileResMapping = dict(transpileFilesForGenerators(files, generators))
+		fileResMapping = self.profiled(lambda: dict(transpileFilesForGenerators(files, generators)))
 		return generators, fileResMapping, len(tools)
 
 
@@ -117,8 +66,9 @@ class UniGrammarTranspileCLI(UniGrammarCLICommandInvolvingTranspilation):
 	"""Transpile a unigrammar into a set of grammar files specific for parser generators."""
 
 	def main(self, backends="all", *files: cli.ExistingFile):  # pylint:disable=keyword-arg-before-vararg,arguments-differ
-		generatorsToTools, fileResMapping, toolsCount = self.prepare(backends, *files)
-		saveTranspiled(fileResMapping, Path("."))
+		generators = createGeneratorsToToolsMapping(parseToolsStrings(backends))
+		stats = self.profiled(transpileFilesIntoDir, tuple(Path(file) for file in files), generators, Path("."))
+		print("Transpiled files", stats)
 
 
 @UniGrammarCLI.subcommand("gen-bundle")
@@ -129,79 +79,238 @@ class UniGrammarGenBundleCLI(UniGrammarCLICommandInvolvingTranspilation):
 	# autopep = cli.Flag(["-P", "--no-autopep8"], default=True, help="Do not postprocess the generated source with `autopep8`")
 	outDir = cli.SwitchAttr(["-O", "--output-dir"], default="./parserBundle", help="The dir to which output parser bundle")
 	trace = cli.Flag(["-t", "--trace"], default=False, help="Embed tracing code into wrapper")
+	instrument = cli.Flag(["--instrument"], default=False, help="Embed `instrumentation` object into wrapper, which counts calls and time of processing functions after `instrumentation.enable()`")
+	records = cli.SwitchAttr(["--records"], cli.Set(*RecordsMode.__members__), default=RecordsMode.slots.name, help="How to generate parse result records: `slots` - assign fields one by one, `positional` - pass all the fields into the constructor, `tuple` - use `tuple` subclasses")
+	altDispatch = cli.Flag(["--alt-dispatch"], default=False, help="Emit dispatch tables for `alt`s, used when the walk strategy of the backend can tell the matched alternative (`getMatchedAlternative`). Slows down `alt`s for the backends which cannot, they are identified by probing the fields one by one.")
+	lazyIters = cli.Flag(["--lazy-iters"], default=False, help="Return collections as lazy views processing items on access instead of `list`s")
+	explicitStack = cli.SwitchAttr(["--explicit-stack"], str, list=True, help="Ids of grammars (or `all`) which wrappers should process recursive productions with an explicit work stack, so input nested deeper than the recursion limit can be processed. It is slower than processing on the call stack.")
+	spans = cli.Flag(["--spans"], default=False, help="Return the text of terminals as `Span`s getting it from the backend only on the first access")
+	bytecode = cli.Flag(["--bytecode"], default=False, help="Store marshalled code objects of wrappers into the bundle. Only `UniGrammar.core.WrapperGen.bytecode.loadWrapperNamespace` uses them, the runtime compiles wrappers from the source.")
+	noBench = cli.Flag(["--no-bench"], default=False, help="Do not fit per-backend cost models on the test corpus")
+	benchStrata = cli.SwitchAttr(["--bench-strata"], int, default=4, help="Count of groups of tests by size from which samples for benchmarking are taken")
+	benchPerStratum = cli.SwitchAttr(["--bench-per-stratum"], int, default=2, help="Count of samples taken from each group of tests for benchmarking")
+	benchWarmup = cli.SwitchAttr(["--bench-warmup"], int, default=1, help="Count of unmeasured runs on each sample before measuring")
+	benchRepeats = cli.SwitchAttr(["--bench-repeats"], int, default=5, help="Count of measured runs on each sample, the minimal time is used")
+	force = cli.Flag(["-f", "--force"], default=False, help="Rebuild all the grammars and backends, even the ones recorded in the bundle manifest as up to date")
+	jobs = cli.SwitchAttr(["-j", "--jobs"], int, default=1, help="Count of processes compiling grammars for backends and of concurrent runs of external generators")
+	columnar = cli.Flag(["--columnar"], default=False, help="Process collections of records into records of parallel lists, one per field, instead of lists of records")
+	parseMany = cli.Flag(["--parse-many"], default=False, help="Add `parseMany` method to wrappers, parsing and processing a stream of inputs, optionally in worker processes")
+
+	def getOptionsHash(self, backends: str) -> str:
+		"""Hash of everything except the sources affecting the bundle"""
+		return hashOptions(
+			backends=backends,
+			trace=self.trace,
+			instrument=self.instrument,
+			records=self.records,
+			altDispatch=self.altDispatch,
+			lazyIters=self.lazyIters,
+			explicitStack=sorted(self.explicitStack),
+			spans=self.spans,
+			bytecode=self.bytecode,
+			noBench=self.noBench,
+			columnar=self.columnar,
+			parseMany=self.parseMany,
+		)
+
+	def compileAll(self, jobs: typing.Iterable[typing.Tuple[typing.Any, str]]) -> typing.List[typing.Any]:
+		"""Compiles `(compiler class, transpiled text)` pairs, returning the results in order. Compilers having `compileMany` get all their texts in one batch in this process. Results which cannot be pickled in a worker are recompiled in this process, errors of compilation are raised."""
+		jobs = tuple(jobs)
+		res = {}
+
+		batches = defaultdict(list)
+		for i, (compilerCls, text) in enumerate(jobs):
+			if hasattr(compilerCls, "compileMany"):
+				batches[compilerCls].append(i)
+		for compilerCls, idxs in batches.items():
+			res.update(zip(idxs, parsersFactoriesAndCompilersPool(compilerCls).compileMany([(jobs[i][1], "python", None) for i in idxs])))
+
+		rest = [i for i in range(len(jobs)) if i not in res]
+		if self.jobs <= 1 or len(rest) <= 1:
+			for i in rest:
+				res[i] = _compile(*jobs[i])
+		else:
+			with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+				futures = [(i, executor.submit(_compileInWorker, *jobs[i])) for i in rest]
+				for i, fut in futures:
+					pickled = fut.result()
+					res[i] = _compile(*jobs[i]) if pickled is None else pickle.loads(pickled)
+
+		return [res[i] for i in range(len(jobs))]
 
 	def main(self, backends="all", *files: cli.ExistingFile):  # pylint:disable=keyword-arg-before-vararg,arguments-differ
 		outDir = Path(self.outDir).absolute()
 		b = ParserBundle(outDir)
 
+		manifest = BundleManifest.load(outDir, self.getOptionsHash(backends))
+		sourcesHashes = {Path(f): hashSourceFile(f) for f in files}
+		files = tuple(f for f, h in sourcesHashes.items() if self.force or not manifest.isSourceFresh(f, h))
+		print("Up to date:", len(sourcesHashes) - len(files), "rebuilding:", len(files))
+		if not files:
+			return
+		rebuiltFiles = set(files)
+		upToDateFiles = tuple(f for f in sourcesHashes if f not in rebuiltFiles)
+
 		generatorsToToolsMapping, transpiledFiles, toolsCount = self.prepare(backends, *files)
+		parsersForGrammars = defaultdict(dict)
 
-		for transpiled in transpiledFiles.values():
+		compilationJobs = []
+		reusedBackends = [(f, None) for f in upToDateFiles]
+		for f, transpiled in transpiledFiles.items():
 			for generator, transpiledResult in transpiled.backendResultMapping.items():
 				for tool in generatorsToToolsMapping[generator]:
 					if not issubclass(tool.RUNNER, NotYetImplementedRunner):
 						runner = runnersPool(tool.RUNNER)
-						compiler = parsersFactoriesAndCompilersPool(runner.COMPILER)
-						compiled = compiler.compileStr(transpiledResult.text, "python")
-
-						runner.saveCompiled(compiled, b.grammars[transpiledResult.id], generator.META)
+						backendName = runner.PARSER.META.product.name
+						transpiledHash = hashText(transpiledResult.text)
+						if not self.force and manifest.isTranspiledFresh(f, backendName, transpiledHash):
+							reusedBackends.append((f, backendName))
+							continue
+						compilationJobs.append((f, generator, transpiledResult, runner, backendName, transpiledHash))
 					else:
 						warnings.warn("Runner for " + repr(tool) + " is not yet implemented due to some reasons, you may want to compile manually")
 
+		compiledResults = self.compileAll((runner.COMPILER, transpiledResult.text) for f, generator, transpiledResult, runner, backendName, transpiledHash in compilationJobs)
+		for (f, generator, transpiledResult, runner, backendName, transpiledHash), compiled in zip(compilationJobs, compiledResults):
+			keysBefore = set(b.backendsTextData.keys())
+			runner.saveCompiled(compiled, b.grammars[transpiledResult.id], generator.META)
+			manifest.updateBackend(f, backendName, transpiledHash, {str(k[-1]): b.backendsTextData[k] for k in set(b.backendsTextData.keys()) - keysBefore})
+
+		for runner in {id(job[3]): job[3] for job in compilationJobs}.values():
+			written = runner.flush(self.jobs)
+			for f, generator, transpiledResult, jobRunner, backendName, transpiledHash in compilationJobs:
+				if jobRunner is runner and transpiledResult.id in written:
+					manifest.addArtefacts(f, backendName, written[transpiledResult.id])
+
+		# the bundle is saved as a whole, so the artefacts not rebuilt are read back into it
+		for f, backendName in reusedBackends:
+			for artefactBackendName, fileName in manifest.iterArtefacts(f):
+				if backendName is None or artefactBackendName == backendName:
+					b.backendsTextData[artefactBackendName, fileName] = manifest.getArtefactPath(artefactBackendName, fileName).read_text(encoding="utf-8")
+
+		if not self.noBench:
+			for (f, generator, transpiledResult, runner, backendName, transpiledHash), compiled in zip(compilationJobs, compiledResults):
+				try:
+					parsersForGrammars[transpiledResult.id][backendName] = parsersFactoriesAndCompilersPool(runner.PARSER).fromInternal(compiled)
+				except Exception as ex:  # pylint:disable=broad-except
+					warnings.warn("Cannot instantiate parser of " + backendName + " for benchmarking: " + repr(ex))
+
 		#b.initGenerators()
 
-		with chosenProgressReporter(len(files), "compiling for backends") as pb:
-			for f in files:
-				f = Path(f)
+		wrappersSources = {}
+		costModels = {}
+		with chosenProgressReporter(len(sourcesHashes), "compiling for backends") as pb:
+			for f in sourcesHashes:
 				baseDir = f.absolute().parent
 
 				pb.report(str(f), incr=0, op="generating wrapper")
 				g = parseUniGrammarFile(f)
-				sourceAST, caplessSchema, iterlessSchema = WrapperGen.transpile(g, trace=self.trace)
+				sourceAST, caplessSchema, iterlessSchema = WrapperGen.transpile(g, trace=self.trace, recordsMode=RecordsMode[self.records], columnar=self.columnar, altDispatch=self.altDispatch, lazyIters=self.lazyIters, explicitStack=("all" in self.explicitStack or g.meta.id in self.explicitStack), spans=self.spans, instrument=self.instrument, parseMany=self.parseMany)
 
 				thisR = b.grammars[g.meta.id]
 				thisR.capSchema = caplessSchema
 				thisR.iterSchema = sorted(iterlessSchema)
 				thisR.wrapperAST = sourceAST
+				isRebuilt = f in rebuiltFiles  # for the rest the wrapper is generated only to be put into the bundle being saved, it is cheap
+				if isRebuilt:
+					wrappersSources[g.meta.id] = sourceAST
+					manifest.updateSource(f, g.meta.id, sourcesHashes[f], hashText(ast.dump(sourceAST)))
 
-				#pb.report(str(f), incr=0, op="benchmarking")
 				tests = tuple(g.tests.getTests(baseDir))
 				if tests:
-					sampleToBench = tests[-1]
-					thisR.benchmarkAndUpdate(sampleToBench)
-				else:
+					samples = stratifiedSample(tests, self.benchStrata, self.benchPerStratum)
+					thisR.benchmarkAndUpdate(samples[len(samples) // 2])
+					if not self.noBench and isRebuilt:
+						pb.report(str(f), incr=0, op="benchmarking")
+						costModels[g.meta.id] = benchmarkParsers(parsersForGrammars[g.meta.id], samples, self.benchWarmup, self.benchRepeats)
+				elif isRebuilt:
 					warnings.warn("There are no tests, so the benchmark is skipped and the runtime will choose based on based on generic speed of parsers rather than on the speed of this concrete grammar in various parsers.")
 				pb.report(str(f), incr=1)
 
 		b.save()
 
+		if self.bytecode:
+			for name, sourceAST in wrappersSources.items():
+				saveWrapperBytecode(outDir, name, sourceAST)
 
-def runTestsForGenerator(tests, runner, transpilationResult):
-	"""Runs tests for a transpiled grammar using a specific runner (usually associated to a backend)."""
-	compiler = parsersFactoriesAndCompilersPool(runner.COMPILER)
-	parserFactory = parsersFactoriesAndCompilersPool(runner.PARSER)
+		for name, models in costModels.items():
+			allModels = loadCostModels(outDir, name)  # the backends which were up to date have not been benchmarked
+			allModels.update(models)
+			saveCostModels(outDir, name, allModels)
 
-	compiled = compiler.compileStr(transpilationResult.text, "python")
-	parser = parserFactory.fromInternal(compiled)
+		manifest.save()
 
-	with chosenProgressReporter(len(tests), "testing") as pb:
-		for i, test in enumerate(tests):
-			try:
-				parser(test)
-				pb.report((test if len(test) < 10 else ("test " + str(i))))
-			except BaseException as ex:  # pylint: disable=broad-except
-				print(repr(test), file=pb)
-				print(ex, file=pb)
 
+def _compile(compilerCls, text: str):
+	return parsersFactoriesAndCompilersPool(compilerCls).compileStr(text, "python")
 
-runnersPool = PoolManager()
-parsersFactoriesAndCompilersPool = PoolManager()
 
+def _compileInWorker(compilerCls, text: str) -> typing.Optional[bytes]:
+	"""Returns the pickled result or `None` if it cannot be pickled. Pickling is done here, so a failure of it cannot be confused with an error of compilation."""
+	res = _compile(compilerCls, text)
+	try:
+		return pickle.dumps(res)
+	except (PicklingError, AttributeError, TypeError):
+		return None
+
+
+def runTestsForGenerator(tests, runner, transpilationResult, resultsCache=None, backendName=None, backendVersion="", force=False):
+	"""Runs tests for a transpiled grammar using a specific runner (usually associated to a backend).
+	If `resultsCache` is given, tests which results are stored in it for the same transpiled grammar and backend are not run again (unless `force`), and the parser is not even compiled if all of them are stored. Only `Exception`s raised by the parser are test failures, the rest propagate."""
+	if resultsCache is not None:
+		grammarHash = resultsCache.hashGrammar(transpilationResult.text)
+		samplesHashes = [resultsCache.hashSample(test) for test in tests]
+		cached = {} if force else resultsCache.getMany(grammarHash, backendName, backendVersion)
+	else:
+		samplesHashes = None
+		cached = {}
+
+	newResults = []
+	cachedCount = 0
+	try:
+		with chosenProgressReporter(len(tests), "testing") as pb:
+			parser = None
+			for i, test in enumerate(tests):
+				r = cached.get(samplesHashes[i], None) if samplesHashes is not None else None
+				if r is None:
+					if parser is None:
+						compiler = parsersFactoriesAndCompilersPool(runner.COMPILER)
+						parserFactory = parsersFactoriesAndCompilersPool(runner.PARSER)
+						compiled = compiler.compileStr(transpilationResult.text, "python")
+						parser = parserFactory.fromInternal(compiled)
+
+					isReproducible = True
+					try:
+						parser(test)
+						r = CachedTestResult(True)
+					except (MemoryError, RecursionError) as ex:
+						r = CachedTestResult(False, repr(ex))
+						isReproducible = False  # depend on the limits of this process, reported, but not stored
+					except Exception as ex:  # pylint: disable=broad-except
+						r = CachedTestResult(False, str(ex))
+					if samplesHashes is not None and isReproducible:
+						newResults.append((samplesHashes[i], r))
+					op = "tested"
+				else:
+					cachedCount += 1
+					op = "cached"
 
-def runTests(generatorsToToolsMapping, fileResMapping, toolsCount):
-	"""Runs tests for transpiled grammars."""
+				if r.ok:
+					pb.report((test if len(test) < 10 else ("test " + str(i))), op=op)
+				else:
+					print(repr(test), file=pb)
+					print(r.error, file=pb)
+	finally:  # the results obtained before an interruption are valid
+		if newResults:
+			resultsCache.putMany(grammarHash, backendName, backendVersion, newResults)
+	return cachedCount
+
+
+def runTests(generatorsToToolsMapping, fileResMapping, toolsCount, resultsCache=None, force=False):
+	"""Runs tests for transpiled grammars. Returns the count of tests which results have been taken from `resultsCache`."""
 	print()
 
+	cachedCount = 0
 	for f, transpiled in fileResMapping.items():
 		baseDir = f.absolute().parent
 
@@ -215,17 +324,199 @@ def runTests(generatorsToToolsMapping, fileResMapping, toolsCount):
 						warnings.warn("Runner for " + repr(tool) + " is not yet implemented due to some reasons, you may want to compile manually")
 						continue
 					runner = runnersPool(tool.RUNNER)
-					runTestsForGenerator(tests, runner, transpilationResult)
+					cachedCount += runTestsForGenerator(tests, runner, transpilationResult, resultsCache, tool.__name__, getBackendVersion(tool) if resultsCache is not None else "", force)
 					pb.report(tool.__name__, incr=1, op="tested")
+	return cachedCount
 
 
 @UniGrammarCLI.subcommand("test")
 class UniGrammarTestCLI(UniGrammarCLICommandInvolvingTranspilation):
 	"""Transpile a specific unigrammar into a grammar and run tests on it"""
 
+	force = cli.Flag(["-f", "--force"], default=False, help="Rerun all the tests, even the ones which results are stored for the same transpiled grammar and backend")
+	noCache = cli.Flag(["--no-cache"], default=False, help="Neither use nor store the results of tests")
+
 	def main(self, backends="all", *files: cli.ExistingFile):  # pylint:disable=keyword-arg-before-vararg,arguments-differ
 		generatorsToToolsMapping, fileResMapping, toolsCount = self.prepare(backends, *files)
-		runTests(generatorsToToolsMapping, fileResMapping, toolsCount)
+		if self.noCache:
+			runTests(generatorsToToolsMapping, fileResMapping, toolsCount)
+			return
+
+		with TestResultsCache() as resultsCache:
+			cachedCount = runTests(generatorsToToolsMapping, fileResMapping, toolsCount, resultsCache, self.force)
+		if cachedCount:
+			print(cachedCount, "tests are unchanged since the previous run, their stored results are reported")
+
+
+def _splitIntoChunks(seq: typing.Sequence[typing.Any], count: int) -> typing.List[typing.Sequence[typing.Any]]:
+	size = max(1, -(-len(seq) // max(1, count)))
+	return [seq[i : i + size] for i in range(0, len(seq), size)]
+
+
+@UniGrammarCLI.subcommand("difftest")
+class UniGrammarDiffTestCLI(cli.Application):
+	"""Parse the tests of grammars with the wrappers for every backend from a bundle generated by `gen-bundle` and check that all the backends produce the same parse results"""
+
+	bundleDir = cli.SwitchAttr(["-B", "--bundle-dir"], default="./parserBundle", help="The dir of the parser bundle containing the grammars compiled for the backends")
+	samplesFiles = cli.SwitchAttr(["-s", "--samples"], cli.ExistingFile, list=True, help="Files which contents are used as additional samples for all the grammars")
+	reference = cli.SwitchAttr(["-r", "--reference"], str, default=None, help="The backend which results the ones of the rest are compared to, the first one by default")
+	jobs = cli.SwitchAttr(["-j", "--jobs"], int, default=1, help="Count of worker processes parsing the samples")
+	maxMismatches = cli.SwitchAttr(["--max-mismatches"], int, default=5, help="Count of differences reported for a sample and a backend")
+
+	def runAll(self, tasks: typing.Sequence[typing.Tuple[typing.Any, ...]]) -> typing.List[typing.Union[BackendRun, BaseException]]:
+		"""Runs `runBackend` on every tuple of args, returning the results in order. Failures (i.e. a backend missing from the bundle) are returned as the exceptions."""
+		res = []
+		if self.jobs <= 1 or len(tasks) <= 1:
+			for args in tasks:
+				try:
+					res.append(runBackend(*args))
+				except Exception as ex:  # pylint:disable=broad-except
+					res.append(ex)
+			return res
+
+		with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+			futures = [executor.submit(runBackend, *args) for args in tasks]
+			for fut in futures:
+				try:
+					res.append(fut.result())
+				except Exception as ex:  # pylint:disable=broad-except
+					res.append(ex)
+		return res
+
+	def main(self, backends="all", *files: cli.ExistingFile):  # pylint:disable=keyword-arg-before-vararg,arguments-differ
+		bundleDir = Path(self.bundleDir).absolute()
+		selectedBackends = []
+		for tool in parseToolsStrings(backends):
+			if tool.RUNNER is None or issubclass(tool.RUNNER, NotYetImplementedRunner):
+				warnings.warn("Runner for " + repr(tool) + " is not yet implemented, skipping it")
+				continue
+			backendName = runnersPool(tool.RUNNER).PARSER.META.product.name
+			if backendName not in selectedBackends:
+				selectedBackends.append(backendName)
+		if self.reference is not None:
+			if self.reference not in selectedBackends:
+				raise ValueError("The reference backend is not selected", self.reference, selectedBackends)
+			selectedBackends.remove(self.reference)
+			selectedBackends.insert(0, self.reference)
+		if len(selectedBackends) < 2:
+			raise ValueError("At least 2 backends are needed to compare them", selectedBackends)
+
+		extraSamples = tuple((Path(f).name, Path(f).read_text(encoding="utf-8")) for f in self.samplesFiles)
+
+		mismatchedSamples = 0
+		failedBackends = 0
+		for f in files:
+			f = Path(f)
+			g = parseUniGrammarFile(f)
+			sourceAST, capSchema, iterSchema = WrapperGen.transpile(g)
+			capSchema = dict(capSchema)
+			labeledSamples = [("test " + str(i), t) for i, t in enumerate(g.tests.getTests(f.absolute().parent))] if g.tests else []
+			labeledSamples.extend(extraSamples)
+			if not labeledSamples:
+				warnings.warn("There are no samples for " + g.meta.id + ", skipping it")
+				continue
+			samples = tuple(s for label, s in labeledSamples)
+			samplesSize = sum(len(s.encode("utf-8")) for s in samples)
+
+			chunks = _splitIntoChunks(samples, self.jobs)
+			tasks = [(bundleDir, g.meta.id, backendName, capSchema, iterSchema, chunk) for backendName in selectedBackends for chunk in chunks]
+			backendsResults = {}
+			for (_, _, backendName, _, _, _), r in zip(tasks, self.runAll(tasks)):
+				prev = backendsResults.get(backendName, None)
+				if isinstance(prev, BaseException):
+					continue
+				if isinstance(r, BaseException) or prev is None:
+					backendsResults[backendName] = r
+				else:
+					prev.results.extend(r.results)
+					prev.parseTime += r.parseTime
+
+			print(g.meta.id, "(" + str(len(samples)), "samples,", samplesSize, "bytes)")
+			header = ("backend", "rejected", "parse, s", "MiB/s", "samples/s")
+			rows = [header]
+			for backendName in selectedBackends:
+				r = backendsResults[backendName]
+				if not isinstance(r, BaseException):
+					seconds = r.parseTime / 1e9 or 1e-9
+					rows.append((backendName, str(sum(1 for res, err in r.results if err is not None)), format(seconds, ".4f"), format(samplesSize / seconds / 1048576, ".3f"), format(len(samples) / seconds, ".1f")))
+			widths = [max(len(r[i]) for r in rows) for i in range(len(header))]
+			for r in rows:
+				print("  ".join((c.ljust(w) if i == 0 else c.rjust(w)) for i, (c, w) in enumerate(zip(r, widths))))
+			for backendName in selectedBackends:
+				r = backendsResults[backendName]
+				if isinstance(r, BaseException):
+					print(backendName, "has failed:", repr(r))
+					failedBackends += 1
+
+			referenceName = selectedBackends[0]
+			ref = backendsResults[referenceName]
+			if isinstance(ref, BaseException):
+				print("The reference backend has failed, nothing to compare to")
+				continue
+			for i, (label, sample) in enumerate(labeledSamples):
+				sampleMismatched = False
+				for backendName in selectedBackends[1:]:
+					other = backendsResults[backendName]
+					if isinstance(other, BaseException):
+						continue
+					mismatches = compareBackendsResults(ref.results[i], other.results[i], self.maxMismatches)
+					if mismatches:
+						if not sampleMismatched:
+							print(label + ":", repr(sample) if len(sample) < 40 else "")
+							sampleMismatched = True
+						for m in mismatches:
+							print("\t" + referenceName, "vs", backendName + ":", m)
+				mismatchedSamples += sampleMismatched
+			print()
+
+		if mismatchedSamples or failedBackends:
+			print("Samples parsed differently:", mismatchedSamples, "failed backends:", failedBackends)
+			return 1
+		print("All the backends agree")
+		return 0
+
+
+@UniGrammarCLI.subcommand("gen-samples")
+class UniGrammarGenSamplesCLI(cli.Application):
+	"""Generate random texts matching a grammar, i.e. large inputs for benchmarking and measuring scaling of parsers"""
+
+	outDir = cli.SwitchAttr(["-O", "--output-dir"], default="./samples", help="The dir into which the samples are written, into a subdir named by the id of the grammar")
+	count = cli.SwitchAttr(["-n", "--count"], int, default=10, help="Count of samples generated for each grammar")
+	minSize = cli.SwitchAttr(["--min-size"], str, default="1k", help="Minimal target size of a sample in chars, `k`, `M` and `G` suffixes are allowed")
+	maxSize = cli.SwitchAttr(["--max-size"], str, default="1M", help="Maximal target size of a sample in chars")
+	distribution = cli.SwitchAttr(["--distribution"], cli.Set(*sizesDistributions), default="loguniform", help="Distribution of target sizes of samples between the minimal and the maximal one")
+	seed = cli.SwitchAttr(["--seed"], str, default="0", help="Samples generated with the same seed and options are the same")
+	maxDepth = cli.SwitchAttr(["--max-depth"], int, default=32, help="Depth of nesting of rules after which only the shallowest alternatives are taken")
+	iterContinueProbability = cli.SwitchAttr(["--iter-continue"], float, default=0.5, help="Probability of one more repetition of an `iter` nested into another `iter`, the outermost ones are repeated till the target size")
+	optProbability = cli.SwitchAttr(["--opt"], float, default=0.5, help="Probability of generating the content of an `opt`")
+	weightsFile = cli.SwitchAttr(["--weights"], cli.ExistingFile, default=None, help="JSON file `{rule name: [weights of alternatives]}` for rules which bodies are `alt`s")
+	startRule = cli.SwitchAttr(["--start"], str, default=None, help="The rule from which samples are derived, the first production by default")
+	extension = cli.SwitchAttr(["--ext"], str, default="txt", help="Extension of the files of samples")
+
+	def main(self, *files: cli.ExistingFile):  # pylint:disable=arguments-differ
+		weights = json.loads(Path(self.weightsFile).read_text(encoding="utf-8")) if self.weightsFile is not None else None
+		minSize, maxSize = parseSize(self.minSize), parseSize(self.maxSize)
+		if minSize > maxSize:
+			raise ValueError("Minimal size is greater than the maximal one", minSize, maxSize)
+
+		stats = WriteStats()
+		for f in files:
+			g = parseUniGrammarFile(Path(f))
+			generator = SamplesGenerator(g, self.maxDepth, self.iterContinueProbability, self.optProbability, weights)
+			sizesRnd = random.Random(self.seed + ":" + g.meta.id + ":sizes")
+			grammarOutDir = Path(self.outDir) / g.meta.id
+			totalSize = 0
+			with chosenProgressReporter(self.count, "generating samples") as pb:
+				for i in range(self.count):
+					targetSize = drawTargetSize(sizesRnd, minSize, maxSize, self.distribution)
+					name = str(i).zfill(len(str(self.count - 1))) + "." + self.extension
+					pb.report(name, incr=0, op="generating")
+					with WriterIfChanged(grammarOutDir / name) as w:
+						totalSize += generator.genSampleInto(w, targetSize, self.seed + ":" + g.meta.id + ":" + str(i), self.startRule)
+					stats.register(w.written)
+					pb.report(name, incr=1, op="generated")
+			print(g.meta.id + ":", self.count, "samples,", totalSize, "chars in", grammarOutDir)
+		print(stats)
 
 
 @UniGrammarCLI.subcommand("vis")
@@ -251,6 +542,83 @@ class UniGrammarVisCLI(cli.Application):
 		runner.visualize(parser, test)
 
 
+@UniGrammarCLI.subcommand("antlr-service")
+class UniGrammarANTLRServiceCLI(cli.Application):
+	"""Runs a process keeping ANTLR loaded into a JVM and compiling grammars sent by other UniGrammar processes over a Unix socket"""
+
+	socketPath = cli.SwitchAttr(["-s", "--socket"], str, default=None, help="Path of the socket. If not the default one, set `UNIGRAMMAR_ANTLR_SERVICE` env var to it for the clients.")
+
+	def main(self):  # pylint:disable=arguments-differ
+		from .tools.multilanguage.antlrService import ANTLRCompileService, getDefaultSocketPath
+
+		socketPath = Path(self.socketPath) if self.socketPath else getDefaultSocketPath()
+		with ANTLRCompileService(socketPath, parsersFactoriesAndCompilersPool(ANTLR.RUNNER.COMPILER)) as service:
+			print("Compiling ANTLR grammars on", socketPath)
+			try:
+				service.serve_forever()
+			except KeyboardInterrupt:
+				pass
+
+
+@UniGrammarCLI.subcommand("serve")
+class UniGrammarServeCLI(cli.Application):
+	"""Answers transpile, test, analyze and stats requests sent as JSON lines over a Unix socket or a localhost TCP port, keeping parsed grammars, transpiled grammars and compiled parsers in memory between them. Any local user can connect to the TCP port, so requests sent to it must contain the token the server writes into a file readable only by its owner."""
+
+	socketPath = cli.SwitchAttr(["-s", "--socket"], str, default=None, help="Path of the Unix socket to listen on")
+	port = cli.SwitchAttr(["-p", "--port"], int, default=None, excludes=["--socket"], help="Listen on this TCP port of 127.0.0.1 instead of a Unix socket")
+	maxConcurrent = cli.SwitchAttr(["--max-concurrent"], int, default=os.cpu_count() or 1, help="Count of requests executed at once, the rest wait")
+	cacheSize = cli.SwitchAttr(["--cache-size"], int, default=128, help="Count of items in each of the in-memory caches")
+	outputRoot = cli.SwitchAttr(["--output-root"], str, default=".", help="The dir `outputDir` of `transpile` requests is resolved against, the requests cannot write outside of it")
+	tokenPath = cli.SwitchAttr(["--token-file"], str, default=None, requires=["--port"], help="The file the token the requests must contain in `token` field is written to, readable only by the owner")
+
+	def main(self):  # pylint:disable=arguments-differ
+		from .server import TCPJSONLinesServer, UnixJSONLinesServer, generateServerToken, getDefaultServerSocketPath, getDefaultServerTokenPath
+		from .session import Session
+
+		session = Session(self.cacheSize, Path(self.outputRoot))
+		if self.port is not None:
+			tokenPath = Path(self.tokenPath) if self.tokenPath else getDefaultServerTokenPath()
+			server = TCPJSONLinesServer(self.port, session, self.maxConcurrent, generateServerToken(tokenPath))
+			address = "127.0.0.1:" + str(self.port)
+			print("The token for requests is in", tokenPath)
+		else:
+			address = Path(self.socketPath) if self.socketPath else getDefaultServerSocketPath()
+			server = UnixJSONLinesServer(address, session, self.maxConcurrent)
+
+		with server:
+			print("Serving on", address)
+			try:
+				server.serve_forever()
+			except KeyboardInterrupt:
+				pass
+
+
+@UniGrammarCLI.subcommand("batch")
+class UniGrammarBatchCLI(cli.Application):
+	"""Executes jobs `{"id": ..., "command": "transpile" | "test" | "analyze" | "stats", "files": [...], "backends": "...", "options": {...}}` read as JSON lines from a file or stdin in one process, sharing parsed grammars and compiled parsers between them. Writes a JSON line with the result of each job to stdout as soon as it completes."""
+
+	jobs = cli.SwitchAttr(["-j", "--jobs"], int, default=1, help="Count of jobs executed at once in threads. If > 1, the results are written in the order of completion.")
+	cacheSize = cli.SwitchAttr(["--cache-size"], int, default=128, help="Count of items in each of the in-memory caches")
+
+	def main(self, jobsFile: str = "-"):  # pylint:disable=arguments-differ
+		import sys
+
+		from .batch import runBatch
+		from .session import Session
+
+		session = Session(self.cacheSize)
+		if jobsFile == "-":
+			succeeded, failed = runBatch(sys.stdin, sys.stdout, session, self.jobs)
+		else:
+			with open(jobsFile, "rt", encoding="utf-8") as f:
+				succeeded, failed = runBatch(f, sys.stdout, session, self.jobs)
+
+		if failed:
+			print("Failed jobs:", failed, "of", succeeded + failed, file=sys.stderr)
+			return 1
+		return 0
+
+
 @UniGrammarCLI.subcommand("lift")
 class UniGrammarLiftCLI(cli.Application):
 	"""Lifts a grammar from a tool-specific DSL into UniGrammar DSL"""
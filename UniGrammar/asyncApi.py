@@ -0,0 +1,158 @@
+"""Asynchronous counterparts of the blocking entry points. File I/O is done in the default executor of the loop, CPU-bound work (parsing, transpiling, compiling, running tests) is done in `executor` passed to the functions (`None` means the default executor of the loop too).
+If `executor` is a `ProcessPoolExecutor`, grammars are pickled into the workers, and each worker keeps compiled parsers in its own cache."""
+
+import asyncio
+import typing
+from collections import deque
+from concurrent.futures import Executor
+from copy import deepcopy
+from functools import partial
+from pathlib import Path
+
+from . import GrammarTranspilationResults, saveTranspiled, transpile
+from .core.ast import Grammar
+from .core.backend.Generator import Generator, TranspiledResult
+from .core.backend.Runner import NotYetImplementedRunner
+from .core.outputFiles import WriteStats
+from .ownGrammarFormat import deriveGrammarIdFromFilesNames, parseUniGrammarData
+from .ownGrammarFormat.decodeExtension import detectFormatFromFileExtension
+
+if typing.TYPE_CHECKING:
+	from .session import Session
+
+_workerSession = None
+
+
+def _getWorkerSession() -> "Session":
+	global _workerSession  # pylint:disable=global-statement
+	if _workerSession is None:
+		from .session import Session
+
+		_workerSession = Session()
+	return _workerSession
+
+
+class TestResult:
+	__slots__ = ("index", "test", "error")
+
+	def __init__(self, index: int, test: str, error: typing.Optional[str] = None) -> None:
+		self.index = index
+		self.test = test
+		self.error = error
+
+	@property
+	def ok(self) -> bool:
+		return self.error is None
+
+	def __repr__(self):
+		return self.__class__.__name__ + "(" + ", ".join(repr(k) + "=" + repr(getattr(self, k)) for k in __class__.__slots__) + ")"  # pylint:disable=undefined-variable
+
+
+async def _runIO(func: typing.Callable, *args) -> typing.Any:
+	return await asyncio.get_running_loop().run_in_executor(None, partial(func, *args))
+
+
+async def _runCPU(executor: typing.Optional[Executor], func: typing.Callable, *args) -> typing.Any:
+	return await asyncio.get_running_loop().run_in_executor(executor, partial(func, *args))
+
+
+def _parseGrammarData(data: typing.Union[str, bytes], suffix: str, grammarId: str) -> Grammar:
+	underlyingParser, isBinary, isTest = detectFormatFromFileExtension(suffix)
+	return parseUniGrammarData(data, underlyingParser, grammarId)
+
+
+def _transpileCopy(grammar: Grammar, backend: Generator) -> TranspiledResult:
+	return transpile(deepcopy(grammar), backend)  # during transpilation AST is modified, so we need a fresh copy
+
+
+def _runTest(runnerCls: type, transpiledText: str, index: int, test: str) -> TestResult:
+	parser = _getWorkerSession().getParser(runnerCls, transpiledText)
+	try:
+		parser(test)
+	except Exception as ex:  # pylint:disable=broad-except
+		return TestResult(index, test, str(ex))
+	return TestResult(index, test)
+
+
+async def aparseUniGrammarFile(fileName: Path, grammarDefaultId: typing.Optional[str] = None, executor: typing.Optional[Executor] = None) -> Grammar:
+	fileName = Path(fileName)
+	underlyingParser, isBinary, isTest = detectFormatFromFileExtension(fileName.suffix)
+	if isTest:
+		raise NotImplementedError("Not yet implemented")
+
+	if isBinary:
+		data = await _runIO(fileName.read_bytes)
+	else:
+		data = await _runIO(partial(fileName.read_text, encoding="utf-8"))
+
+	if grammarDefaultId is None:
+		grammarDefaultId = deriveGrammarIdFromFilesNames(fileName)
+	return await _runCPU(executor, _parseGrammarData, data, fileName.suffix, grammarDefaultId)
+
+
+async def atranspile(grammar: Grammar, backend: Generator, executor: typing.Optional[Executor] = None) -> TranspiledResult:
+	"""Transpiles a copy of `grammar`, unlike `transpile` the grammar is not modified"""
+	return await _runCPU(executor, _transpileCopy, grammar, backend)
+
+
+async def atranspileGrammarForGenerators(gr: Grammar, backends: typing.Iterable[Generator], executor: typing.Optional[Executor] = None) -> GrammarTranspilationResults:
+	"""The backends are transpiled for concurrently"""
+	backends = tuple(backends)
+	results = await asyncio.gather(*(atranspile(gr, backend, executor) for backend in backends))
+	return GrammarTranspilationResults(gr, dict(zip(backends, results)))
+
+
+async def atranspileFileForGenerators(grammarFile: Path, backends: typing.Iterable[Generator], executor: typing.Optional[Executor] = None) -> GrammarTranspilationResults:
+	gr = await aparseUniGrammarFile(grammarFile, executor=executor)
+	return await atranspileGrammarForGenerators(gr, backends, executor)
+
+
+async def atranspileFilesForGenerators(files: typing.Iterable[Path], backends: typing.Iterable[Generator], executor: typing.Optional[Executor] = None, concurrency: int = 4) -> typing.AsyncIterator[typing.Tuple[Path, GrammarTranspilationResults]]:
+	"""Yields the results in the order of `files`. Up to `concurrency` files are processed at once, so reading a file overlaps with transpiling the previous ones."""
+	backends = tuple(backends)
+	inFlight = deque()
+	try:
+		for file in files:
+			inFlight.append((file, asyncio.ensure_future(atranspileFileForGenerators(file, backends, executor))))
+			if len(inFlight) >= concurrency:
+				file, fut = inFlight.popleft()
+				yield file, await fut
+		while inFlight:
+			file, fut = inFlight.popleft()
+			yield file, await fut
+	finally:
+		for file, fut in inFlight:
+			fut.cancel()
+
+
+async def asaveTranspiled(transpiledFiles: typing.Dict[Path, GrammarTranspilationResults], outputDir: Path) -> WriteStats:
+	return await _runIO(saveTranspiled, transpiledFiles, outputDir)
+
+
+async def arunTestsForGenerator(tests: typing.Iterable[str], runner: typing.Any, transpilationResult: TranspiledResult, executor: typing.Optional[Executor] = None, concurrency: int = 1) -> typing.AsyncIterator[TestResult]:
+	"""Yields the results of tests in their order as they complete. `runner` is a runner class or an instance of it. The parser is compiled on the first test and cached in the executing process. Up to `concurrency` tests are run at once."""
+	runnerCls = runner if isinstance(runner, type) else type(runner)
+	inFlight = deque()
+	try:
+		for i, test in enumerate(tests):
+			inFlight.append(asyncio.ensure_future(_runCPU(executor, _runTest, runnerCls, transpilationResult.text, i, test)))
+			if len(inFlight) >= concurrency:
+				yield await inFlight.popleft()
+		while inFlight:
+			yield await inFlight.popleft()
+	finally:
+		for fut in inFlight:
+			fut.cancel()
+
+
+async def arunTests(generatorsToToolsMapping: typing.Mapping[Generator, typing.Iterable[typing.Any]], fileResMapping: typing.Mapping[Path, GrammarTranspilationResults], executor: typing.Optional[Executor] = None, concurrency: int = 1) -> typing.AsyncIterator[typing.Tuple[Path, typing.Any, TestResult]]:
+	"""Yields `(file, tool, result)` for every test of every grammar for every tool. The tests are read asynchronously. Tools without a runner are skipped."""
+	for f, transpiled in fileResMapping.items():
+		baseDir = Path(f).absolute().parent
+		tests = await _runIO(lambda: tuple(transpiled.grammar.tests.getTests(baseDir)) if transpiled.grammar.tests else ())
+		for generator, transpilationResult in transpiled.backendResultMapping.items():
+			for tool in generatorsToToolsMapping[generator]:
+				if tool.RUNNER is None or issubclass(tool.RUNNER, NotYetImplementedRunner):
+					continue
+				async for r in arunTestsForGenerator(tests, tool.RUNNER, transpilationResult, executor, concurrency):
+					yield f, tool, r
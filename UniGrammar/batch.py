@@ -0,0 +1,53 @@
+"""`batch` command: executes jobs read as JSON lines (see `Session.execute`) in one process sharing a `Session` between them, writing one JSON line with the result (see `Session.respond`) per job as soon as it completes"""
+
+import json
+import typing
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .session import Session, parseJobLine
+
+
+def _iterJobs(lines: typing.Iterable[str]) -> typing.Iterator[typing.Tuple[typing.Dict[str, typing.Any], typing.Optional[str]]]:
+	"""Yields `(job, error)`. Jobs without `id` get the number of their line."""
+	for lineNo, line in enumerate(lines, 1):
+		if not line.strip():
+			continue
+		try:
+			job = parseJobLine(line)
+		except ValueError as ex:
+			yield {"id": lineNo}, "Malformed job: " + str(ex)
+			continue
+		job.setdefault("id", lineNo)
+		yield job, None
+
+
+def runBatch(lines: typing.Iterable[str], out: typing.TextIO, session: typing.Optional[Session] = None, jobs: int = 1) -> typing.Tuple[int, int]:
+	"""Returns counts of succeeded and failed jobs. With `jobs` > 1 the jobs are executed in threads, the results are written in the order of completion, so they must be matched by `id`. Only a bounded count of jobs is read ahead, so `lines` can be an endless stream."""
+	if session is None:
+		session = Session()
+	counts = [0, 0]
+
+	def emit(response: typing.Mapping[str, typing.Any]) -> None:
+		counts[not response["ok"]] += 1
+		out.write(json.dumps(response, default=repr) + "\n")
+		out.flush()
+
+	if jobs <= 1:
+		for job, error in _iterJobs(lines):
+			emit({"id": job["id"], "ok": False, "error": error} if error is not None else session.respond(job))
+		return tuple(counts)
+
+	with ThreadPoolExecutor(max_workers=jobs) as executor:
+		inFlight = set()
+		for job, error in _iterJobs(lines):
+			if error is not None:
+				emit({"id": job["id"], "ok": False, "error": error})
+				continue
+			inFlight.add(executor.submit(session.respond, job))
+			if len(inFlight) >= 2 * jobs:
+				done, inFlight = wait(inFlight, return_when=FIRST_COMPLETED)
+				for fut in done:
+					emit(fut.result())
+		for fut in wait(inFlight).done:
+			emit(fut.result())
+	return tuple(counts)
@@ -5,7 +5,8 @@ from ..ast.base import Ref, Wrapper
 from ..ast.prods import Cap
 from ..ast.tokens import Alt, Opt
 from .basicBlocks import genDirCall, genPropGet, genTypingOptional, genTypingUnion, unifiedGetAttr
-from .primitiveBlocks import ASTNone, ASTTypeError, astSelfArg
+from .primitiveBlocks import ASTNone, ASTSelf, ASTTypeError, astSelfArg, getAttrFunc
+from .primitiveSpecificBlocks import walkStrategyAST
 from .specificBlocks import genEnterOptionalCall, genProcessorFuncCallForARef, getProcessorFuncNameForARef, getReturnTypeForARef
 from .WrapperFuncGen import WrapperFuncGen
 from .WrapperGenContext import WrapperGenContext
@@ -40,6 +41,97 @@ def genAlternative(o: ast.Name, alt: str, ctx: WrapperGenContext) -> typing.Unio
 	return genAlternativeBranchAST(o, fe, processorFuncCallAST, fieldName, ctx), retType
 
 
+def getAltBranchFuncName(prodName: str, capName: str) -> str:
+	return "process_" + prodName + "__" + capName
+
+
+def getAltDispatchTableName(prodName: str) -> str:
+	return "process_" + prodName + "__alts"
+
+
+def genAltBranchFunc(funcName: str, processorFuncCallAST: ast.Call, objName: str = "parsed") -> ast.FunctionDef:
+	return ast.FunctionDef(
+		name=funcName,
+		args=ast.arguments(
+			posonlyargs=[],
+			args=[astSelfArg, ast.arg(arg=objName, annotation=None, type_comment=None)],
+			vararg=None,
+			kwonlyargs=[],
+			kw_defaults=[],
+			kwarg=None,
+			defaults=[],
+		),
+		body=[ast.Return(value=processorFuncCallAST)],
+		decorator_list=[],
+		returns=None,
+		type_comment=None,
+	)
+
+
+def genAltDispatchTable(tableName: str, ruleNameToFuncName: typing.Mapping[str, str]) -> ast.Assign:
+	"""`{<name of the referenced rule>: <branch function>}` in the class body"""
+	return ast.Assign(
+		targets=[ast.Name(id=tableName, ctx=ast.Store())],
+		value=ast.Dict(
+			keys=[ast.Str(k) for k in ruleNameToFuncName],
+			values=[ast.Name(id=v, ctx=ast.Load()) for v in ruleNameToFuncName.values()],
+		),
+		type_comment=None,
+	)
+
+
+def genAltDispatch(o: ast.Name, tableName: str) -> typing.Iterator[ast.AST]:
+	"""Asks the walk strategy which rule has been matched and calls its branch function from the table. Walk strategies not able to tell it (no `getMatchedAlternative` or it returns `None`) fall through to probing.
+	getMatchedAlternative = getattr(self.backend.wstr, "getMatchedAlternative", None)
+	if getMatchedAlternative is not None:
+		matched = getMatchedAlternative(parsed)
+		if matched is not None:
+			branch = self.<tableName>.get(matched[0], None)
+			if branch is not None:
+				return branch(self, matched[1])
+	"""
+
+	getterName = "getMatchedAlternative"
+	getterLoad = ast.Name(id=getterName, ctx=ast.Load())
+	matchedLoad = ast.Name(id="matched", ctx=ast.Load())
+	branchLoad = ast.Name(id="branch", ctx=ast.Load())
+
+	def isNotNone(n: ast.AST) -> ast.Compare:
+		return ast.Compare(left=n, ops=[ast.IsNot()], comparators=[ASTNone])
+
+	def subscript(n: ast.AST, i: int) -> ast.Subscript:
+		return ast.Subscript(value=n, slice=ast.Index(value=ast.Num(i)), ctx=ast.Load())
+
+	yield ast.Assign(
+		targets=[ast.Name(id=getterName, ctx=ast.Store())],
+		value=ast.Call(func=getAttrFunc, args=[walkStrategyAST, ast.Str(getterName), ASTNone], keywords=[]),
+		type_comment=None,
+	)
+	yield ast.If(
+		test=isNotNone(getterLoad),
+		body=[
+			ast.Assign(targets=[ast.Name(id="matched", ctx=ast.Store())], value=ast.Call(func=getterLoad, args=[o], keywords=[]), type_comment=None),
+			ast.If(
+				test=isNotNone(matchedLoad),
+				body=[
+					ast.Assign(
+						targets=[ast.Name(id="branch", ctx=ast.Store())],
+						value=ast.Call(func=ast.Attribute(value=genPropGet(tableName), attr="get", ctx=ast.Load()), args=[subscript(matchedLoad, 0), ASTNone], keywords=[]),
+						type_comment=None,
+					),
+					ast.If(
+						test=isNotNone(branchLoad),
+						body=[ast.Return(value=ast.Call(func=branchLoad, args=[ASTSelf, subscript(matchedLoad, 1)], keywords=[]))],
+						orelse=[],
+					),
+				],
+				orelse=[],
+			),
+		],
+		orelse=[],
+	)
+
+
 def genNoAltMatchedRaise(o: ast.Name) -> ast.Raise:
 	return ast.Raise(exc=ast.Call(func=ASTTypeError, args=[genDirCall(o)], keywords=[]), cause=None)
 
@@ -56,6 +148,10 @@ class AltWrapperFuncGen(WrapperFuncGen):
 
 		objIsAlt = isinstance(obj, Alt)
 
+		branchFuncs = []
+		ruleNameToFuncName = {}
+		ambiguousRuleNames = set()
+
 		for alt in obj.children:
 			if isinstance(alt, Cap):
 				if isinstance(alt.child, Ref):
@@ -63,6 +159,14 @@ class AltWrapperFuncGen(WrapperFuncGen):
 					alternativeNodes, retType = genAlternative(o, alt, ctx)
 					body.extend(alternativeNodes)
 					returnTypes.append(retType)
+
+					if ctx.altDispatch:
+						ruleName = alt.child.name
+						if ruleName in ruleNameToFuncName:
+							ambiguousRuleNames.add(ruleName)  # the same rule under different caps cannot be told apart by the rule, so probing is used for it
+						branchFuncName = getAltBranchFuncName(ctx.currentProdName, alt.name)
+						branchFuncs.append(genAltBranchFunc(branchFuncName, genProcessorFuncCallForARef(o, ruleName, ctx)[0], objName))
+						ruleNameToFuncName[ruleName] = branchFuncName
 				else:
 					raise NotImplementedError("For compatibility each suff that is `alt`ed must be a `ref`. Otherwise we are unable to process these grammars uniformly for all the supported backends. Please put content of " + ("`" + alt.name if hasattr(alt, "name") else "the `opt` struct in `" + ctx.currentProdName) + "` into a separate rule")
 			else:
@@ -70,6 +174,15 @@ class AltWrapperFuncGen(WrapperFuncGen):
 
 		body.append(genNoAltMatchedRaise(o))
 
+		for ruleName in ambiguousRuleNames:
+			del ruleNameToFuncName[ruleName]
+
+		if ruleNameToFuncName:
+			tableName = getAltDispatchTableName(ctx.currentProdName)
+			ctx.members.extend(branchFuncs)
+			ctx.members.append(genAltDispatchTable(tableName, ruleNameToFuncName))
+			body[0:0] = genAltDispatch(o, tableName)
+
 		if returnTypes:
 			ctx.members.append(
 				ast.FunctionDef(
@@ -1,12 +1,15 @@
 import ast
 import typing
 
+from ..ast import Fragmented, Productions
 from ..ast.base import Ref, Wrapper
-from ..ast.tokens import Iter
-from .basicBlocks import genTypingIterable
+from ..ast.tokens import Iter, Seq
+from .basicBlocks import genFieldClass, genTypingIterable
+from .lazyBlocks import genProcessIterLazy
 from .primitiveBlocks import ASTSelf, astSelfArg
-from .restWrapperFuncGens import WrapperWrapperFuncGen
-from .specificBlocks import genIterateListCall, genProcessorFuncCallForARef, getReturnTypeForARef
+from .primitiveSpecificBlocks import IParseResultAST
+from .restWrapperFuncGens import WrapperWrapperFuncGen, genSeqFieldsProcessing
+from .specificBlocks import genIterateListCall, genProcessorFuncCallForARef, getProcessorFuncNameForARef, getRefNameAndNodeForARef, getReturnTypeForARef
 from .WrapperGenContext import WrapperGenContext
 
 
@@ -61,14 +64,11 @@ def genProcessCollectionToList(funcName: str, parentName: str, iterFuncName: str
 	)
 
 
-def genProcessCollection(propName, processorFuncCall, returnType, iterVarNode, parentName="rec"):
-	funcName = "process_" + propName
-	iterFuncName = funcName + "_"
-	firstArgName = "parsed"
-
+def genProcessCollectionIter(iterFuncName: str, iterVarNode: ast.Name, returnType=None, firstArgName: str = "parsed") -> ast.FunctionDef:
+	"""Generates a generator function iterating the items of a collection in the backend-specific AST"""
 	o = ast.Name(id=firstArgName, ctx=ast.Load())
 
-	funcDef = ast.FunctionDef(
+	return ast.FunctionDef(
 		name=iterFuncName,
 		args=ast.arguments(
 			posonlyargs=[],
@@ -90,10 +90,80 @@ def genProcessCollection(propName, processorFuncCall, returnType, iterVarNode, p
 		returns=(genTypingIterable(returnType) if returnType else None),
 		type_comment=None,
 	)
-	yield funcDef
+
+
+def genProcessCollection(propName, processorFuncCall, returnType, iterVarNode, parentName="rec"):
+	funcName = "process_" + propName
+	iterFuncName = funcName + "_"
+
+	yield genProcessCollectionIter(iterFuncName, iterVarNode, returnType)
 	yield from genProcessCollectionToList(funcName=funcName, parentName=parentName, iterFuncName=iterFuncName, processorFuncCall=processorFuncCall, iterVarNode=iterVarNode, returnType=returnType)
 
 
+def getColumnsClassName(iterProdName: str) -> str:
+	return iterProdName + "_columns"
+
+
+def getColumnarItemSeq(obj: Iter, ctx: WrapperGenContext) -> typing.Optional[Seq]:
+	"""Returns the `Seq` of items of a collection if it should be processed into columns, otherwise `None`"""
+	if not ctx.columnar or not isinstance(obj.child, Ref):
+		return None
+
+	refName, node, section = getRefNameAndNodeForARef(obj.child.name, ctx)
+	if not isinstance(section, Productions) or isinstance(section, Fragmented):
+		return None
+
+	while isinstance(node, Wrapper) and node.__class__.AST_INVISIBLE:
+		node = node.child
+
+	if isinstance(node, Seq):
+		return node
+	return None
+
+
+def genProcessCollectionToColumns(funcName: str, iterFuncName: str, columnsClassName: str, fieldsProcessing: typing.Iterable[typing.Tuple[str, str, ast.Call, ast.AST]], iterVarNode: ast.Name, firstArgName: str = "parsed") -> ast.FunctionDef:
+	"""Generates a function transforming a collection of `Seq`s into a record of parallel `list`s, one for each field, instead of a `list` of records"""
+
+	o = ast.Name(id=firstArgName, ctx=ast.Load())
+
+	body = []
+	loopBody = []
+	columnsNames = []
+	for fieldName, nm, processorFuncCall, retType in fieldsProcessing:
+		columnName = "col_" + fieldName
+		columnsNames.append(columnName)
+		body.append(ast.Assign(targets=[ast.Name(id=columnName, ctx=ast.Store())], value=ast.List(elts=[], ctx=ast.Load()), type_comment=None))
+		loopBody.append(ast.Expr(value=ast.Call(func=ast.Attribute(value=ast.Name(id=columnName, ctx=ast.Load()), attr="append", ctx=ast.Load()), args=[processorFuncCall], keywords=[])))
+
+	body.append(
+		ast.For(
+			target=ast.Name(id=iterVarNode.id, ctx=ast.Store()),
+			iter=ast.Call(func=ast.Attribute(value=ASTSelf, attr=iterFuncName, ctx=ast.Load()), args=[o], keywords=[]),
+			body=loopBody or [ast.Pass()],
+			orelse=[],
+			type_comment=None,
+		)
+	)
+	body.append(ast.Return(value=ast.Call(func=ast.Name(id=columnsClassName, ctx=ast.Load()), args=[ast.Name(id=c, ctx=ast.Load()) for c in columnsNames], keywords=[])))
+
+	return ast.FunctionDef(
+		name=funcName,
+		args=ast.arguments(
+			posonlyargs=[],
+			args=[astSelfArg, ast.arg(arg=firstArgName, annotation=None, type_comment=None)],
+			vararg=None,
+			kwonlyargs=[],
+			kw_defaults=[],
+			kwarg=None,
+			defaults=[],
+		),
+		body=body,
+		decorator_list=[],
+		returns=ast.Name(id=columnsClassName, ctx=ast.Load()),
+		type_comment=None,
+	)
+
+
 class IterWrapperFuncGen(WrapperWrapperFuncGen):
 	__slots__ = ()
 
@@ -102,10 +172,27 @@ class IterWrapperFuncGen(WrapperWrapperFuncGen):
 		if isinstance(obj.child, Ref):
 			iterVarName = "f"
 			iterVarNode = ast.Name(id=iterVarName, ctx=ast.Load())
-			processorFuncCall, retType = genProcessorFuncCallForARef(iterVarNode, obj.child.name, ctx)
-			ctx.members.extend(genProcessCollection(ctx.currentProdName, processorFuncCall, retType, iterVarNode))
+			itemSeq = getColumnarItemSeq(obj, ctx)
+			if itemSeq is not None:
+				funcName = "process_" + ctx.currentProdName
+				iterFuncName = funcName + "_"
+				columnsClassName = getColumnsClassName(ctx.currentProdName)
+				fieldsProcessing = tuple(genSeqFieldsProcessing(itemSeq, iterVarNode, ctx))
+				ctx.moduleMembers.append(genFieldClass(columnsClassName, [fieldName for fieldName, nm, processorFuncCall, retType in fieldsProcessing], bases=(IParseResultAST,), positional=True))
+				ctx.members.append(genProcessCollectionIter(iterFuncName, iterVarNode))
+				ctx.members.append(genProcessCollectionToColumns(funcName, iterFuncName, columnsClassName, fieldsProcessing, iterVarNode))
+			elif ctx.lazyIters:
+				funcName = "process_" + ctx.currentProdName
+				retType = getReturnTypeForARef(obj.child.name, ctx)
+				ctx.members.append(genProcessCollectionIter(funcName + "_", iterVarNode, retType))
+				ctx.members.append(genProcessIterLazy(funcName, getProcessorFuncNameForARef(obj.child.name, ctx), genTypingIterable(retType)))
+			else:
+				processorFuncCall, retType = genProcessorFuncCallForARef(iterVarNode, obj.child.name, ctx)
+				ctx.members.extend(genProcessCollection(ctx.currentProdName, processorFuncCall, retType, iterVarNode))
 		else:
 			raise NotImplementedError("For compatibility each suff that is `iter`ed must be a `ref`. Otherwise we are unable to process these grammars uniformly for all the supported backends. Please put content of `" + obj.name + "` into a separate rule")
 
 	def getType(self, node: typing.Union[Wrapper, Ref, str], ctx, refName: str = None):
+		if refName is not None and getColumnarItemSeq(node, ctx) is not None:
+			return ast.Name(id=getColumnsClassName(refName), ctx=ast.Load())
 		return genTypingIterable(super().getType(node, ctx, refName))
@@ -1,14 +1,23 @@
 import ast
 import typing
+from enum import IntEnum
 
 from ..ast.base import Node
 from ..CodeGen import CodeGenContext
 
 
+class RecordsMode(IntEnum):
+	"""How parse result records for `Seq`s are generated"""
+
+	slots = 0  # `__slots__` class, `__init__` sets all the fields to `None`, then they are assigned one by one
+	positional = 1  # `__slots__` class, `__init__` takes values of all the fields positionally
+	tuple = 2  # `tuple` subclass with properties, constructed positionally
+
+
 class WrapperGenContext(CodeGenContext):
-	__slots_ = ("moduleMembers", "members", "allBindings", "capToNameSchema", "itersProdNames", "trace")
+	__slots_ = ("moduleMembers", "members", "allBindings", "capToNameSchema", "itersProdNames", "trace", "recordsMode", "columnar", "altDispatch", "lazyIters", "spans")
 
-	def __init__(self, currentProdName: typing.Optional[str], moduleMembers: typing.Iterable[typing.Union[ast.Import, ast.ImportFrom, ast.ClassDef]], members: typing.Iterable[ast.FunctionDef], allBindings: typing.Mapping[str, typing.Tuple[Node, Node]], capToNameSchema, itersProdNames, trace=None) -> None:
+	def __init__(self, currentProdName: typing.Optional[str], moduleMembers: typing.Iterable[typing.Union[ast.Import, ast.ImportFrom, ast.ClassDef]], members: typing.Iterable[ast.FunctionDef], allBindings: typing.Mapping[str, typing.Tuple[Node, Node]], capToNameSchema, itersProdNames, trace=None, recordsMode: RecordsMode = RecordsMode.slots, columnar: bool = False, altDispatch: bool = False, lazyIters: bool = False, spans: bool = False) -> None:
 		super().__init__(currentProdName)
 		self.moduleMembers = moduleMembers
 		self.members = members
@@ -16,6 +25,11 @@ class WrapperGenContext(CodeGenContext):
 		self.capToNameSchema = capToNameSchema
 		self.itersProdNames = itersProdNames
 		self.trace = trace
+		self.recordsMode = recordsMode
+		self.columnar = columnar
+		self.altDispatch = altDispatch
+		self.lazyIters = lazyIters
+		self.spans = spans
 
 	def extendSchema(self, capName: str, refName: str, currentProdName: str = None):
 		if currentProdName is None:
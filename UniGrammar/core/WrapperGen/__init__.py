@@ -14,13 +14,18 @@ from ..CodeGen import CodeGen, CodeGenContext
 from ..defaults import mainParserVarName, runtimeModuleName, runtimeParserResultBaseName, runtimeWrapperInterfaceModuleName, runtimeWrapperInterfaceName
 from . import restWrapperFuncGens, specificBlocks
 from .AltWrapperFuncGen import AltWrapperFuncGen, OptWrapperFuncGen
+from .batchBlocks import genBatchParsingFuncs, genParseManyMethod
+from .instrumentationBlocks import genInstrumentationClass, genInstrumentationImports, genInstrumentationVar
 from .IterWrapperFuncGen import IterWrapperFuncGen
+from .lazyBlocks import genLazyCollectionClass
 from .primitiveBlocks import ASTSelf, astSelfArg, emptySlots
 from .primitiveSpecificBlocks import IWrapperAST, backendParseAst, backendPreprocessASTAst, mainParserVarNameAST, mainProductionNameNameAST
 from .restWrapperFuncGens import NameWrapperFuncGen, NopWrapperFuncGen, NotImplementedWrapperFuncGen, SeqWrapperFuncGen, TemplateInstantiationWrapperFuncGen
 from .specificBlocks import getProcessorFuncNameForARef, getReturnTypeForARef
+from .spanBlocks import genSpanClass, genSpanMethods
+from .stackBlocks import convertToSteps, genStepsDriver
 from .utils import makeModule
-from .WrapperGenContext import WrapperGenContext
+from .WrapperGenContext import RecordsMode, WrapperGenContext
 
 
 def gen__call__(rootItemType: str, ctx: "WrapperGenContext", parsedName: str = "parsed") -> ast.FunctionDef:
@@ -99,8 +104,14 @@ class WrapperGen(CodeGen):
 	#Ref = classmethod(NotImplementedWrapperFuncGen("Ref"))
 
 	@classmethod
-	def transpile(cls, grammar: Grammar, trace=None) -> typing.Tuple[str, typing.Mapping]:
-		return cls.embedGrammar(grammar, trace=trace)
+	def transpile(cls, grammar: Grammar, trace=None, recordsMode: RecordsMode = RecordsMode.slots, columnar: bool = False, altDispatch: bool = False, lazyIters: bool = False, explicitStack: bool = False, spans: bool = False, instrument: bool = False, parseMany: bool = False) -> typing.Tuple[str, typing.Mapping]:
+		"""`altDispatch` makes `alt`s ask the walk strategy of the backend which alternative has been matched (its `getMatchedAlternative` method) and call its function from a table, probing the fields is used only for the backends not able to tell it. It is slower for such backends, so it is off by default.
+		`lazyIters` makes collections be returned as lazy views instead of `list`s, see `lazyBlocks.lazyCollectionClassSource`.
+		`explicitStack` makes recursive processing use a work stack instead of the call stack, see `stackBlocks`.
+		`spans` makes terminals be returned as `Span`s getting the text from the backend on the first access, see `spanBlocks.spanClassSource`.
+		`instrument` adds `instrumentation` object to the module, which can count calls and time of processing functions when enabled, see `instrumentationBlocks.instrumentationSource`.
+		`parseMany` adds `parseMany` method parsing and processing a stream of inputs, optionally in worker processes, see `batchBlocks.batchParsingSource`."""
+		return cls.embedGrammar(grammar, trace=trace, recordsMode=recordsMode, columnar=columnar, altDispatch=altDispatch, lazyIters=lazyIters, explicitStack=explicitStack, spans=spans, instrument=instrument, parseMany=parseMany)
 
 	@classmethod
 	def _processItem(cls, el, grammar, ctx):
@@ -109,8 +120,16 @@ class WrapperGen(CodeGen):
 		return processor(el, grammar, ctx)
 
 	@classmethod
-	def genImports(cls, trace):
+	def genImports(cls, trace, recordsMode: RecordsMode = RecordsMode.slots):
 		yield ast.Import(names=[ast.alias(name="typing", asname=None)])
+		if recordsMode == RecordsMode.tuple:
+			yield ast.ImportFrom(
+				module="operator",
+				names=[
+					ast.alias(name="itemgetter", asname=None),
+				],
+				level=0,
+			)
 		if trace:
 			yield ast.ImportFrom(
 				module="icecream",
@@ -129,34 +148,56 @@ class WrapperGen(CodeGen):
 		)
 
 	@classmethod
-	def embedGrammar(cls, grammar: Grammar, ctx: WrapperGenContext = None, trace=None) -> typing.Any:
+	def embedGrammar(cls, grammar: Grammar, ctx: WrapperGenContext = None, trace=None, recordsMode: RecordsMode = RecordsMode.slots, columnar: bool = False, altDispatch: bool = False, lazyIters: bool = False, explicitStack: bool = False, spans: bool = False, instrument: bool = False, parseMany: bool = False) -> typing.Any:
 		members = []
 		moduleMembers = []
-		moduleMembers.extend(cls.genImports(trace=trace))
+		moduleMembers.extend(cls.genImports(trace=trace, recordsMode=recordsMode))
+		if instrument:
+			moduleMembers.extend(genInstrumentationImports())
+			moduleMembers.extend(genInstrumentationClass())
+		if parseMany:
+			moduleMembers.extend(genBatchParsingFuncs())
+		if lazyIters:
+			moduleMembers.extend(genLazyCollectionClass())
+		if spans:
+			moduleMembers.extend(genSpanClass())
+			members.extend(genSpanMethods())
+		if explicitStack:
+			moduleMembers.extend(genStepsDriver())
 
 		allBindings = getNames(grammar)
 		capToNameSchema = defaultdict(dict)
 		itersProdNames = set()
 
+		def makeContext(name: typing.Optional[str]) -> WrapperGenContext:
+			return WrapperGenContext(name, moduleMembers, members, allBindings, capToNameSchema, itersProdNames, trace=trace, recordsMode=recordsMode, columnar=columnar, altDispatch=altDispatch, lazyIters=lazyIters, spans=spans)
+
 		for p in grammar.prods:
 			if isinstance(p, Name):
 				name = cls.Name(p, grammar, ctx=None)
 				prod = p.child
 
-				cls._processItem(prod, grammar, WrapperGenContext(name, moduleMembers, members, allBindings, capToNameSchema, itersProdNames, trace=trace))
+				cls._processItem(prod, grammar, makeContext(name))
+
+		if parseMany:
+			members.append(genParseManyMethod())
 
 		mainProduction = grammar.prods.findFirstRule()
 		members.append(
 			ast.Assign(
 				targets=[mainProductionNameNameAST],
-				value=ast.Name(id=getProcessorFuncNameForARef(mainProduction.name, WrapperGenContext(None, moduleMembers, members, allBindings, capToNameSchema, itersProdNames, trace=trace)).attr),  # pylint: disable=no-member
+				value=ast.Name(id=getProcessorFuncNameForARef(mainProduction.name, makeContext(None)).attr),  # pylint: disable=no-member
 				type_comment=None,
 			)
 		)
-		# members.append(gen__call__(mainProduction.name, WrapperGenContext(None, moduleMembers, members, allBindings, capToNameSchema, itersProdNames, trace=trace), parsedName="parsed"))
+		# members.append(gen__call__(mainProduction.name, makeContext(None), parsedName="parsed"))
 		# members.append(genPythonSchemaDictASTAssignment("__CAP_TO_NAME_SCHEMA_DICT__", capToNameSchema))
+		if explicitStack:
+			members = convertToSteps(members)
 		mainParserClass = genParserClass(mainProduction.name, members)
 		moduleMembers.append(mainParserClass)
+		if instrument:
+			moduleMembers.append(genInstrumentationVar(mainParserClass.name, grammar.meta.id))
 		moduleMembers.append(
 			ast.Assign(
 				targets=[mainParserVarNameAST],
@@ -1,7 +1,7 @@
 import ast
 import typing
 
-from .primitiveBlocks import AST__slots__, ASTNone, ASTSelf, dirFunc, getAttrFunc, typingAST, typingIterableAST, typingOptionalAST, typingUnionAST
+from .primitiveBlocks import AST__slots__, ASTNone, ASTSelf, ASTTuple, astSelfArg, dirFunc, getAttrFunc, itemGetterFunc, propertyFunc, typingAST, typingIterableAST, typingOptionalAST, typingUnionAST
 from .utils import makeTypeComment
 
 
@@ -89,21 +89,82 @@ def gen__init__(fields: typing.Iterable[str]) -> ast.FunctionDef:
 	)
 
 
-def genFieldClass(name: str, fields: typing.Iterable[str], bases=()) -> ast.ClassDef:
+def genPositionalArgs(firstArgs: typing.Iterable[ast.arg], fields: typing.Iterable[str]) -> ast.arguments:
+	return ast.arguments(
+		posonlyargs=[],
+		args=[*firstArgs, *(ast.arg(arg=f, annotation=None, type_comment=None) for f in fields)],
+		vararg=None,
+		kwonlyargs=[],
+		kw_defaults=[],
+		kwarg=None,
+		defaults=[],
+	)
+
+
+def gen__init__Positional(fields: typing.Iterable[str]) -> ast.FunctionDef:
+	"""Generates `__init__` taking values of all the fields positionally"""
+	fields = tuple(fields)
+	return ast.FunctionDef(
+		name="__init__",
+		args=genPositionalArgs((astSelfArg,), fields),
+		body=[genAssignStraight(ASTSelf, f, ast.Name(id=f, ctx=ast.Load())) for f in fields] or [ast.Pass()],
+		decorator_list=[],
+		returns=None,
+		type_comment=None,
+	)
+
+
+def genFieldsSlots(fields: typing.Iterable[str]) -> ast.Assign:
+	return ast.Assign(
+		targets=[AST__slots__],
+		value=ast.Tuple(elts=[ast.Str(f) for f in fields], ctx=ast.Load()),
+		type_comment=None,
+	)
+
+
+def genFieldClass(name: str, fields: typing.Iterable[str], bases=(), positional: bool = False) -> ast.ClassDef:
 	"""Generates a struct-like class with __slots__"""
 
+	fields = tuple(fields)
 	return ast.ClassDef(
 		name=name,
 		bases=bases,
 		keywords=[],
 		body=[
+			genFieldsSlots(fields),
+			(gen__init__Positional if positional else gen__init__)(fields),
+		],
+		decorator_list=[],
+	)
+
+
+def genTupleFieldClass(name: str, fields: typing.Iterable[str], bases=()) -> ast.ClassDef:
+	"""Generates a `tuple` subclass with a property for each field, like `collections.namedtuple` does. There is no `__new__` in Python, construct it from a tuple of values of all the fields."""
+
+	fields = tuple(fields)
+	body = [
+		genFieldsSlots(()),
+		ast.Assign(
+			targets=[ast.Name(id="_fields", ctx=ast.Store())],
+			value=ast.Tuple(elts=[ast.Str(f) for f in fields], ctx=ast.Load()),
+			type_comment=None,
+		),
+	]
+
+	for i, f in enumerate(fields):
+		body.append(
 			ast.Assign(
-				targets=[AST__slots__],
-				value=ast.Tuple(elts=[ast.Str(f) for f in fields], ctx=ast.Load()),
+				targets=[ast.Name(id=f, ctx=ast.Store())],
+				value=ast.Call(func=propertyFunc, args=[ast.Call(func=itemGetterFunc, args=[ast.Num(i)], keywords=[])], keywords=[]),
 				type_comment=None,
-			),
-			gen__init__(fields),
-		],
+			)
+		)
+
+	return ast.ClassDef(
+		name=name,
+		bases=[*bases, ASTTuple],
+		keywords=[],
+		body=body,
 		decorator_list=[],
 	)
 
@@ -126,6 +187,18 @@ def genConstructAstObj(varName: str, className: str, typ=None) -> typing.Tuple[a
 	)
 
 
+def genConstructAstObjPositional(className: str, args: typing.Iterable[ast.AST], asTuple: bool = False) -> typing.Tuple[ast.Name, ast.Call]:
+	"""
+	Returns a tuple of 2 elements
+	first is `className` AST node
+	second is `className(*args)` or `className((*args,))` if `asTuple`"""
+	clsNameAST = ast.Name(id=className, ctx=ast.Load())
+	args = list(args)
+	if asTuple:
+		args = [ast.Tuple(elts=args, ctx=ast.Load())]
+	return clsNameAST, ast.Call(func=clsNameAST, args=args, keywords=[])
+
+
 def genAssignStraight(to: ast.Name, fieldName: str, rhs: ast.AST, typ=None) -> ast.Assign:
 	"""Returns `to.fieldName = <rhs>`"""
 
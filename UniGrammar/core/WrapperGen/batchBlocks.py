@@ -0,0 +1,89 @@
+import ast
+import typing
+
+parseManyFuncName = "parseMany"
+parseManyDefaultChunkSize = 256
+
+batchParsingSource = '''
+class ParseManyError:
+	"""Yielded by `parseMany` in place of the result for an item which parsing or processing has raised"""
+
+	__slots__ = ("index", "item", "error")
+
+	def __init__(self, index, item, error):
+		self.index = index
+		self.item = item
+		self.error = error
+
+	def __repr__(self):
+		return self.__class__.__name__ + "(" + repr(self.index) + ", " + repr(self.item) + ", " + repr(self.error) + ")"
+
+
+def _parseManyIter(parser, items, start=0):
+	parse = parser.backend.parse
+	preprocessAST = parser.backend.preprocessAST
+	process = parser.__MAIN_PRODUCTION__
+	for i, item in enumerate(items, start):
+		try:
+			yield process(preprocessAST(parse(item)))
+		except Exception as ex:
+			yield ParseManyError(i, item, ex)
+
+
+_parseManyWorkerParser = None
+
+
+def _parseManyWorkerInit(parser):
+	global _parseManyWorkerParser
+	_parseManyWorkerParser = parser
+
+
+def _parseManyChunk(start, chunk):
+	return list(_parseManyIter(_parseManyWorkerParser, chunk, start))
+
+
+def _chunks(iterable, chunksize):
+	chunk = []
+	for item in iterable:
+		chunk.append(item)
+		if len(chunk) == chunksize:
+			yield chunk
+			chunk = []
+	if chunk:
+		yield chunk
+
+
+def ''' + parseManyFuncName + '''(parser, iterable, jobs=1, chunksize=''' + str(parseManyDefaultChunkSize) + '''):
+	"""Parses and processes the items of `iterable`, yielding the results in order. An item raising gives a `ParseManyError` instead of its result, the rest are still processed. If `jobs` > 1, chunks of `chunksize` items are processed in worker processes. Each worker gets its own copy of `parser` once, so the parser must be picklable if processes are spawned rather than forked, the results are pickled back, so this module must be importable in the workers. Only a bounded number of chunks is in flight, so `iterable` can be a huge lazy stream."""
+	if jobs <= 1:
+		yield from _parseManyIter(parser, iterable)
+		return
+
+	from collections import deque
+	from concurrent.futures import ProcessPoolExecutor
+
+	with ProcessPoolExecutor(max_workers=jobs, initializer=_parseManyWorkerInit, initargs=(parser,)) as executor:
+		inFlight = deque()
+		start = 0
+		for chunk in _chunks(iterable, chunksize):
+			inFlight.append(executor.submit(_parseManyChunk, start, chunk))
+			start += len(chunk)
+			if len(inFlight) >= 2 * jobs:
+				yield from inFlight.popleft().result()
+		while inFlight:
+			yield from inFlight.popleft().result()
+'''
+
+parseManyMethodSource = """
+def """ + parseManyFuncName + """(self, iterable, *, jobs=1, chunksize=""" + str(parseManyDefaultChunkSize) + """):
+	return """ + parseManyFuncName + """(self, iterable, jobs=jobs, chunksize=chunksize)
+"""
+
+
+def genBatchParsingFuncs() -> typing.List[ast.stmt]:
+	return ast.parse(batchParsingSource).body
+
+
+def genParseManyMethod() -> ast.FunctionDef:
+	"""`parseMany` method of a parser class, see `parseMany` function in `batchParsingSource`"""
+	return ast.parse(parseManyMethodSource).body[0]
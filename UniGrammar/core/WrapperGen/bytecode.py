@@ -0,0 +1,95 @@
+"""Stores wrappers as marshalled code objects, so loading a wrapper is an unmarshal instead of parsing and compiling its source.
+The files have the layout of checked hash-based `.pyc` files (PEP 552): the magic number of the Python that produced them and the hash of the source. A file produced by another Python or for another source is ignored and the source is compiled instead.
+`loadWrapperNamespace` is the loader, the runtime doesn't use the files yet, so `gen-bundle` stores them only if asked to."""
+
+import ast
+import importlib.util
+import marshal
+import sys
+import types
+import typing
+from pathlib import Path
+
+from ..cache import atomicWriteBytes
+from .utils import unparse
+
+pycFlagsHashBased = 0b01
+pycFlagsCheckSource = 0b10
+pycHeaderSize = 16
+
+wrappersBytecodeDirName = "wrappers"
+
+
+def getWrapperBytecodeFileName(name: str) -> str:
+	return name + "." + sys.implementation.cache_tag + ".pyc"
+
+
+def getWrapperBytecodePath(bundleDir: Path, name: str) -> Path:
+	return bundleDir / "compiled" / wrappersBytecodeDirName / getWrapperBytecodeFileName(name)
+
+
+def getWrapperSource(sourceOrAST: typing.Union[str, ast.Module]) -> bytes:
+	if isinstance(sourceOrAST, ast.AST):
+		sourceOrAST = unparse(sourceOrAST)
+	return sourceOrAST.encode("utf-8")
+
+
+def compileWrapper(sourceOrAST: typing.Union[str, ast.Module], name: str) -> bytes:
+	"""Returns the contents of a `.pyc` file for a wrapper. The code is compiled from the source text, not from the AST directly, so line numbers in tracebacks match the source in the bundle."""
+	source = getWrapperSource(sourceOrAST)
+	code = compile(source, name + ".py", "exec", dont_inherit=True)
+	return b"".join((
+		importlib.util.MAGIC_NUMBER,
+		(pycFlagsHashBased | pycFlagsCheckSource).to_bytes(4, "little"),
+		importlib.util.source_hash(source),
+		marshal.dumps(code),
+	))
+
+
+def codeFromPyc(data: bytes, source: typing.Optional[bytes] = None) -> typing.Optional["types.CodeType"]:
+	"""Returns `None` if `data` was produced by another Python or for another source. If `source` is `None` the source hash is not checked."""
+	if len(data) < pycHeaderSize or data[:4] != importlib.util.MAGIC_NUMBER:
+		return None
+
+	flags = int.from_bytes(data[4:8], "little")
+	if not flags & pycFlagsHashBased:
+		return None
+
+	if source is not None and data[8:16] != importlib.util.source_hash(source):
+		return None
+
+	try:
+		return marshal.loads(memoryview(data)[pycHeaderSize:])
+	except (EOFError, ValueError, TypeError):
+		return None
+
+
+def saveWrapperBytecode(bundleDir: Path, name: str, sourceOrAST: typing.Union[str, ast.Module]) -> Path:
+	path = getWrapperBytecodePath(bundleDir, name)
+	atomicWriteBytes(path, compileWrapper(sourceOrAST, name))
+	return path
+
+
+def loadWrapperCode(bundleDir: Path, name: str, sourceOrAST: typing.Union[str, ast.Module, None] = None) -> "types.CodeType":
+	"""Loads the code of a wrapper from the bundle. If there is no usable bytecode, falls back to compiling `sourceOrAST`."""
+	source = getWrapperSource(sourceOrAST) if sourceOrAST is not None else None
+
+	path = getWrapperBytecodePath(bundleDir, name)
+	try:
+		data = path.read_bytes()
+	except OSError:
+		data = b""
+
+	res = codeFromPyc(data, source)
+	if res is None:
+		if source is None:
+			raise ValueError("No usable bytecode for the wrapper and no source to fall back to", name, path)
+		res = compile(source, name + ".py", "exec", dont_inherit=True)
+	return res
+
+
+def loadWrapperNamespace(bundleDir: Path, name: str, sourceOrAST: typing.Union[str, ast.Module, None] = None) -> typing.Dict[str, typing.Any]:
+	"""Executes the code of a wrapper and returns the resulting module namespace"""
+	ns = {"__name__": name}
+	exec(loadWrapperCode(bundleDir, name, sourceOrAST), ns)  # pylint:disable=exec-used
+	return ns
@@ -0,0 +1,131 @@
+import ast
+import typing
+
+instrumentationClassName = "Instrumentation"
+instrumentationVarName = "instrumentation"
+
+instrumentationSource = '''
+class ''' + instrumentationClassName + ''':
+	"""Counts calls and cumulative time (including the callees) of `process_*` functions of a parser class. Counters are in preallocated arrays indexed by function. When disabled, the original functions are in the class, so there is no overhead at all."""
+
+	__slots__ = ("parserClass", "grammarName", "names", "counts", "times", "originals", "enabled")
+
+	def __init__(self, parserClass, grammarName):
+		self.parserClass = parserClass
+		self.grammarName = grammarName
+		self.names = sorted({f.__name__ for f in self._iterFuncs()})
+		self.counts = array("Q", bytes(8 * len(self.names)))
+		self.times = array("Q", bytes(8 * len(self.names)))
+		self.originals = None
+		self.enabled = False
+
+	def _iterFuncs(self):
+		from inspect import isfunction, isgeneratorfunction
+
+		def isInstrumentable(f):
+			return isfunction(f) and f.__name__.startswith("process_") and not isgeneratorfunction(f)
+
+		for v in vars(self.parserClass).values():
+			if isInstrumentable(v):
+				yield v
+			elif isinstance(v, dict):
+				for vv in v.values():
+					if isInstrumentable(vv):
+						yield vv
+
+	def _wrap(self, func):
+		from functools import wraps
+
+		i = self.names.index(func.__name__)
+		counts = self.counts
+		times = self.times
+
+		@wraps(func)
+		def instrumented(*args, **kwargs):
+			start = perf_counter_ns()
+			try:
+				return func(*args, **kwargs)
+			finally:
+				times[i] += perf_counter_ns() - start
+				counts[i] += 1
+
+		return instrumented
+
+	def enable(self):
+		if self.enabled:
+			return
+		names = set(self.names)
+		self.originals = originals = []
+		for k, v in list(vars(self.parserClass).items()):
+			if getattr(v, "__name__", None) in names and callable(v):
+				originals.append((None, k, v))
+				setattr(self.parserClass, k, self._wrap(v))
+			elif isinstance(v, dict):
+				for kk, vv in v.items():
+					if getattr(vv, "__name__", None) in names and callable(vv):
+						originals.append((v, kk, vv))
+						v[kk] = self._wrap(vv)
+		self.enabled = True
+
+	def disable(self):
+		if not self.enabled:
+			return
+		for table, k, v in self.originals:
+			if table is None:
+				setattr(self.parserClass, k, v)
+			else:
+				table[k] = v
+		self.originals = None
+		self.enabled = False
+
+	def reset(self):
+		for i in range(len(self.names)):
+			self.counts[i] = 0
+			self.times[i] = 0
+
+	def snapshot(self):
+		"""`{function name: (calls, cumulative ns)}`"""
+		return {n: (c, t) for n, c, t in zip(self.names, self.counts, self.times)}
+
+	def toJSON(self):
+		from json import dumps
+
+		return dumps({"grammar": self.grammarName, "functions": {n: {"calls": c, "ns": t} for n, (c, t) in self.snapshot().items()}})
+
+	def toPrometheus(self):
+		from json import dumps
+
+		labelsPrefix = "{grammar=" + dumps(self.grammarName) + ",function="
+		res = [
+			"# HELP unigrammar_wrapper_calls_total Calls of wrapper processing functions",
+			"# TYPE unigrammar_wrapper_calls_total counter",
+		]
+		snapshot = self.snapshot()
+		for n, (c, t) in snapshot.items():
+			res.append("unigrammar_wrapper_calls_total" + labelsPrefix + dumps(n) + "} " + str(c))
+		res.extend((
+			"# HELP unigrammar_wrapper_seconds_total Cumulative time in wrapper processing functions including their callees",
+			"# TYPE unigrammar_wrapper_seconds_total counter",
+		))
+		for n, (c, t) in snapshot.items():
+			res.append("unigrammar_wrapper_seconds_total" + labelsPrefix + dumps(n) + "} " + repr(t / 1e9))
+		return "\\n".join(res) + "\\n"
+'''
+
+
+def genInstrumentationImports() -> typing.Iterator[ast.ImportFrom]:
+	yield ast.ImportFrom(module="array", names=[ast.alias(name="array", asname=None)], level=0)
+	yield ast.ImportFrom(module="time", names=[ast.alias(name="perf_counter_ns", asname=None)], level=0)
+
+
+def genInstrumentationClass() -> typing.List[ast.stmt]:
+	return ast.parse(instrumentationSource).body
+
+
+def genInstrumentationVar(parserClassName: str, grammarName: str) -> ast.Assign:
+	"""`instrumentation = Instrumentation(<parser class>, <grammar name>)`"""
+	return ast.Assign(
+		targets=[ast.Name(id=instrumentationVarName, ctx=ast.Store())],
+		value=ast.Call(func=ast.Name(id=instrumentationClassName, ctx=ast.Load()), args=[ast.Name(id=parserClassName, ctx=ast.Load()), ast.Str(grammarName)], keywords=[]),
+		type_comment=None,
+	)
@@ -0,0 +1,77 @@
+import ast
+import typing
+
+from .primitiveBlocks import ASTSelf, astSelfArg
+from .primitiveSpecificBlocks import iterateCollectionAst
+
+lazyCollectionClassName = "LazyProcessedCollection"
+
+lazyCollectionClassSource = '''
+class ''' + lazyCollectionClassName + ''':
+	"""A view of a collection in the parse tree. Items are processed only when accessed, nothing is cached, iterating it twice processes the items twice."""
+
+	__slots__ = ("processor", "getItems", "parsed")
+
+	def __init__(self, processor, getItems, parsed):
+		self.processor = processor
+		self.getItems = getItems
+		self.parsed = parsed
+
+	def __iter__(self):
+		return map(self.processor, self.getItems(self.parsed))
+
+	def __len__(self):
+		return len(self.getItems(self.parsed))
+
+	def __getitem__(self, idx):
+		items = self.getItems(self.parsed)
+		if isinstance(idx, slice):
+			return [self.processor(el) for el in items[idx]]
+		return self.processor(items[idx])
+
+	def __repr__(self):
+		return self.__class__.__name__ + "(" + repr(self.processor) + ")"
+'''
+
+
+def genLazyCollectionClass() -> typing.List[ast.stmt]:
+	return ast.parse(lazyCollectionClassSource).body
+
+
+def genProcessCollectionLazy(funcName: str, processorFunc: ast.AST, getItemsFunc: ast.AST, firstArgName: str = "parsed", returnType: typing.Optional[ast.AST] = None) -> ast.FunctionDef:
+	"""Generates a function returning a lazy view of a collection instead of a `list` of processed nodes.
+	If `getItemsFunc` returns a sequence, the view supports `len` and indexing, otherwise it is just a re-iterable."""
+
+	return ast.FunctionDef(
+		name=funcName,
+		args=ast.arguments(
+			posonlyargs=[],
+			args=[astSelfArg, ast.arg(arg=firstArgName, annotation=None, type_comment=None)],
+			vararg=None,
+			kwonlyargs=[],
+			kw_defaults=[],
+			kwarg=None,
+			defaults=[],
+		),
+		body=[
+			ast.Return(
+				value=ast.Call(
+					func=ast.Name(id=lazyCollectionClassName, ctx=ast.Load()),
+					args=[processorFunc, getItemsFunc, ast.Name(id=firstArgName, ctx=ast.Load())],
+					keywords=[],
+				)
+			)
+		],
+		decorator_list=[],
+		returns=returnType,
+		type_comment=None,
+	)
+
+
+def genProcessIterLazy(funcName: str, processorFunc: ast.AST, returnType: typing.Optional[ast.AST] = None) -> ast.FunctionDef:
+	"""The raw collection from the walk strategy is used directly, so the view is a sequence if the backend's collection is"""
+	return genProcessCollectionLazy(funcName, processorFunc, iterateCollectionAst, returnType=returnType)
+
+
+def genProcessGeneratorLazy(funcName: str, iterFuncName: str, processorFunc: ast.AST, returnType: typing.Optional[ast.AST] = None) -> ast.FunctionDef:
+	return genProcessCollectionLazy(funcName, processorFunc, ast.Attribute(value=ASTSelf, attr=iterFuncName, ctx=ast.Load()), returnType=returnType)
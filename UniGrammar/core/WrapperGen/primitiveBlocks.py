@@ -11,6 +11,9 @@ ASTSelfClass = ast.Attribute(value=ASTSelf, attr="__class__", ctx=ast.Load())
 AST__slots__ = ast.Name(id="__slots__", ctx=ast.Load())
 emptySlots = ast.Assign(targets=[ast.Name(id="__slots__", ctx=ast.Store())], value=ast.Tuple(elts=[], ctx=ast.Load()), type_comment=None)
 ASTTypeError = ast.Name(id="TypeError", ctx=ast.Load())
+ASTTuple = ast.Name(id="tuple", ctx=ast.Load())
+propertyFunc = ast.Name(id="property", ctx=ast.Load())
+itemGetterFunc = ast.Name(id="itemgetter", ctx=ast.Load())
 typingAST = ast.Name(id="typing", ctx=ast.Load())
 typingOptionalAST = ast.Attribute(value=typingAST, attr="Optional")
 typingIterableAST = ast.Attribute(value=typingAST, attr="Iterable")
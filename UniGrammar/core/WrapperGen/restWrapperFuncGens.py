@@ -7,12 +7,12 @@ from ..ast.base import Name, Ref, Wrapper
 from ..ast.prods import Cap, Prefer, UnCap
 from ..ast.templates import TemplateInstantiation
 from ..ast.tokens import Opt, Seq
-from .basicBlocks import genAssignStraight, genConstructAstObj, genFieldClass, isReturnTypeOptional, unifiedGetAttr
+from .basicBlocks import genAssignStraight, genConstructAstObj, genConstructAstObjPositional, genFieldClass, genTupleFieldClass, isReturnTypeOptional, unifiedGetAttr
 from .primitiveBlocks import astSelfArg
 from .primitiveSpecificBlocks import IParseResultAST
 from .specificBlocks import genIcecreamCall, genProcessorFuncCallForARef, getProcessorFuncNameForARef, getReturnTypeForANode, getReturnTypeForARef
 from .WrapperFuncGen import WrapperFuncGen
-from .WrapperGenContext import WrapperGenContext
+from .WrapperGenContext import RecordsMode, WrapperGenContext
 
 WrapperGen = None  # initialized in __init__
 
@@ -75,6 +75,44 @@ class WrapperWrapperFuncGen(WrapperFuncGen):
 		return getReturnTypeForARef(node.child, ctx, refName)
 
 
+def genSeqFieldsProcessing(obj: Seq, o: ast.Name, ctx: WrapperGenContext) -> typing.Iterator[typing.Tuple[str, str, ast.Call, ast.AST]]:
+	"""Yields a tuple (field name, referenced rule name, AST of the call processing the field of `o`, return type) for each captured item of a `Seq`"""
+	for f in obj.children:
+		if isinstance(f, Cap):
+			chld = f.getASTVisibleChild()
+
+			if isinstance(chld, Ref):
+				nm = chld.name
+				fieldName = f.name
+
+				retType = getReturnTypeForARef(nm, ctx)
+				if isReturnTypeOptional(retType):
+					arg = unifiedGetAttr(o, fieldName)
+				else:
+					arg = ast.Attribute(value=o, attr=fieldName, ctx=ast.Load())
+
+				processorFuncCall = ast.Call(
+					func=getProcessorFuncNameForARef(nm, ctx, None),
+					args=[arg],
+					keywords=[],
+				)
+
+				yield fieldName, nm, processorFuncCall, retType
+			else:
+				raise NotImplementedError("For compatibility each suff that is captured must be a `ref`. Otherwise we are unable to process these grammars uniformly for all the supported backends. Please put content of `" + f.name + "` into a separate rule")
+		elif isinstance(f, UnCap):
+			pass
+		else:
+			#raise ValueError("Item will be ignored when generating an AST", f)
+			print("Item will be ignored when generating an AST:", f, file=sys.stderr)
+
+
+def genRecordClass(name: str, fields: typing.Iterable[str], ctx: WrapperGenContext) -> ast.ClassDef:
+	if ctx.recordsMode == RecordsMode.tuple:
+		return genTupleFieldClass(name, fields, bases=(IParseResultAST,))
+	return genFieldClass(name, fields, bases=(IParseResultAST,), positional=ctx.recordsMode == RecordsMode.positional)
+
+
 class SeqWrapperFuncGen(WrapperFuncGen):
 	__slots__ = ()
 
@@ -90,45 +128,25 @@ class SeqWrapperFuncGen(WrapperFuncGen):
 		if ctx.shouldTrace(astObjClassName):
 			body.append(genIcecreamCall(o))
 
-		astObjClassNameAST, to, ctor = genConstructAstObj(newOName, astObjClassName)
-		body.append(ctor)
-
+		fieldsProcessing = tuple(genSeqFieldsProcessing(obj, o, ctx))
 		fields = []
-		for f in obj.children:
-			if isinstance(f, Cap):
-				fields.append(f.name)
-				chld = f.getASTVisibleChild()
-
-				if isinstance(chld, Ref):
-					nm = chld.name
-
-					ctx.extendSchema(f.name, nm)
-					fieldName = f.name
-
-					retType = getReturnTypeForARef(nm, ctx)
-					if isReturnTypeOptional(retType):
-						arg = unifiedGetAttr(o, fieldName)
-					else:
-						arg = ast.Attribute(value=o, attr=fieldName, ctx=ast.Load())
-
-					processorFuncCall = ast.Call(
-						func=getProcessorFuncNameForARef(nm, ctx, None),
-						args=[arg],
-						keywords=[],
-					)
-
-					body.append(genAssignStraight(to=to, fieldName=fieldName, rhs=processorFuncCall, typ=retType))
-				else:
-					raise NotImplementedError("For compatibility each suff that is captured must be a `ref`. Otherwise we are unable to process these grammars uniformly for all the supported backends. Please put content of `" + f.name + "` into a separate rule")
-			elif isinstance(f, UnCap):
-				pass
-			else:
-				#raise ValueError("Item will be ignored when generating an AST", f)
-				print("Item will be ignored when generating an AST:", f, file=sys.stderr)
+		for fieldName, nm, processorFuncCall, retType in fieldsProcessing:
+			ctx.extendSchema(fieldName, nm)
+			fields.append(fieldName)
+
+		if ctx.recordsMode == RecordsMode.slots:
+			astObjClassNameAST, to, ctor = genConstructAstObj(newOName, astObjClassName)
+			body.append(ctor)
 
-		ctx.moduleMembers.append(genFieldClass(astObjClassName, fields, bases=(IParseResultAST,)))
+			for fieldName, nm, processorFuncCall, retType in fieldsProcessing:
+				body.append(genAssignStraight(to=to, fieldName=fieldName, rhs=processorFuncCall, typ=retType))
+
+			body.append(ast.Return(value=ast.Name(newOName, ast.Load())))
+		else:
+			astObjClassNameAST, ctorCall = genConstructAstObjPositional(astObjClassName, (processorFuncCall for fieldName, nm, processorFuncCall, retType in fieldsProcessing), asTuple=ctx.recordsMode == RecordsMode.tuple)
+			body.append(ast.Return(value=ctorCall))
 
-		body.append(ast.Return(value=ast.Name(newOName, ast.Load())))
+		ctx.moduleMembers.append(genRecordClass(astObjClassName, fields, ctx))
 
 		ctx.members.append(
 			ast.FunctionDef(
@@ -0,0 +1,107 @@
+import ast
+import typing
+
+from .primitiveBlocks import ASTSelf, astSelfArg
+from .primitiveSpecificBlocks import backendAST
+
+spanClassName = "Span"
+spanClassAST = ast.Name(id=spanClassName, ctx=ast.Load())
+subTreeSpanClassName = "SubTreeSpan"
+terminalSpanClassName = "TerminalSpan"
+
+spanClassSource = '''
+class ''' + spanClassName + ''':
+	"""Text of a terminal which is got from the backend only when it is accessed for the first time. Compares, hashes and formats as `str`, call `str` on it to get the text."""
+
+	__slots__ = ("backend", "node", "text")
+
+	def __init__(self, backend, node):
+		self.backend = backend
+		self.node = node
+		self.text = None
+
+	def getText(self):
+		raise NotImplementedError
+
+	def __str__(self):
+		text = self.text
+		if text is None:
+			text = self.text = self.getText()
+			self.backend = self.node = None
+		return text
+
+	def __eq__(self, other):
+		if isinstance(other, ''' + spanClassName + '''):
+			other = str(other)
+		return str(self) == other
+
+	def __hash__(self):
+		return hash(str(self))
+
+	def __len__(self):
+		return len(str(self))
+
+	def __bool__(self):
+		return bool(str(self))
+
+	def __format__(self, spec):
+		return format(str(self), spec)
+
+	def __repr__(self):
+		return self.__class__.__name__ + "(" + repr(str(self)) + ")"
+
+
+class ''' + subTreeSpanClassName + '''(''' + spanClassName + '''):
+	__slots__ = ()
+
+	def getText(self):
+		return self.backend.getSubTreeText(self.node)
+
+
+class ''' + terminalSpanClassName + '''(''' + spanClassName + '''):
+	__slots__ = ()
+
+	def getText(self):
+		return self.backend.terminalNodeToStr(self.node)
+'''
+
+spanSubTreeTextFuncName = "spanSubTreeText"
+spanTerminalTextFuncName = "spanTerminalText"
+
+
+def genSpanClass() -> typing.List[ast.stmt]:
+	return ast.parse(spanClassSource).body
+
+
+def genSpanConstruction(spanClassName: str, nodeAST: ast.AST) -> ast.Call:
+	return ast.Call(func=ast.Name(id=spanClassName, ctx=ast.Load()), args=[backendAST, nodeAST], keywords=[])
+
+
+def genSpanMethod(funcName: str, spanClassName: str, firstArgName: str = "parsed") -> ast.FunctionDef:
+	"""Generates a method wrapping a terminal node into a `Span`. Calls of processors construct spans directly, the methods are for the places where a processor is passed as a callback."""
+	return ast.FunctionDef(
+		name=funcName,
+		args=ast.arguments(
+			posonlyargs=[],
+			args=[astSelfArg, ast.arg(arg=firstArgName, annotation=None, type_comment=None)],
+			vararg=None,
+			kwonlyargs=[],
+			kw_defaults=[],
+			kwarg=None,
+			defaults=[],
+		),
+		body=[ast.Return(value=genSpanConstruction(spanClassName, ast.Name(id=firstArgName, ctx=ast.Load())))],
+		decorator_list=[],
+		returns=spanClassAST,
+		type_comment=None,
+	)
+
+
+def genSpanMethods() -> typing.Iterator[ast.FunctionDef]:
+	yield genSpanMethod(spanSubTreeTextFuncName, subTreeSpanClassName)
+	yield genSpanMethod(spanTerminalTextFuncName, terminalSpanClassName)
+
+
+spanSubTreeTextAST = ast.Attribute(value=ASTSelf, attr=spanSubTreeTextFuncName, ctx=ast.Load())
+spanTerminalTextAST = ast.Attribute(value=ASTSelf, attr=spanTerminalTextFuncName, ctx=ast.Load())
+spanMethodsClasses = {spanSubTreeTextFuncName: subTreeSpanClassName, spanTerminalTextFuncName: terminalSpanClassName}
@@ -6,6 +6,7 @@ from ..ast.base import Node, Ref, Wrapper
 from .basicBlocks import genAssignStraight
 from .primitiveBlocks import strAST
 from .primitiveSpecificBlocks import enterOptionalAst, getSubTreeTextAST, iterateCollectionAst, terminalNodeToStr
+from .spanBlocks import genSpanConstruction, spanClassAST, spanMethodsClasses, spanSubTreeTextAST, spanTerminalTextAST
 
 WrapperGen = None  # set in WrapperGen.__init__
 
@@ -64,9 +65,9 @@ def getProcessorFuncNameForARef(nodeOrName: typing.Union[Wrapper, Ref, str], ctx
 	refName, node, section = getRefNameAndNodeForARef(nodeOrName, ctx, refName)
 
 	if isinstance(section, (Characters, Keywords)):
-		return terminalNodeToStr
+		return spanTerminalTextAST if ctx.spans else terminalNodeToStr
 	elif isinstance(section, (Fragmented, Tokens)):
-		return getSubTreeTextAST
+		return spanSubTreeTextAST if ctx.spans else getSubTreeTextAST
 	else:
 		return getProcessorFuncNameForANode(node, ctx, refName)
 
@@ -77,6 +78,8 @@ def genProcessorFuncCallForARef(astFieldGetterAST: "ast.AST", nodeOrName: typing
 	"""
 	processorFuncName = getProcessorFuncNameForARef(nodeOrName, ctx, refName)
 	retType = getReturnTypeForARef(nodeOrName, ctx)
+	if ctx.spans and getattr(processorFuncName, "attr", None) in spanMethodsClasses:
+		return genSpanConstruction(spanMethodsClasses[processorFuncName.attr], astFieldGetterAST), retType
 	return (
 		ast.Call(
 			func=processorFuncName,
@@ -99,9 +102,7 @@ def getReturnTypeForANode(node, ctx, refName=None):
 def getReturnTypeForARef(nodeOrName: typing.Union[Wrapper, Ref, str], ctx: "WrapperGenContext", refName: str = None) -> typing.Union[ast.Name, ast.Subscript]:
 	refName, node, section = getRefNameAndNodeForARef(nodeOrName, ctx, refName)
 
-	if isinstance(section, (Characters, Tokens, Keywords)):
-		return strAST
-	elif isinstance(section, Fragmented):
-		return strAST
+	if isinstance(section, (Characters, Tokens, Keywords, Fragmented)):
+		return spanClassAST if ctx.spans else strAST
 	else:
 		return getReturnTypeForANode(node, ctx, refName)
@@ -0,0 +1,274 @@
+"""Adds to the generated processing functions their versions driven by an explicit work stack instead of the Python call stack.
+A step is a generator: calling a child processor becomes `(yield self.process_child__step(node))`, the driver pushes the suspended parent, runs the child and sends its result back into the parent, which then constructs its own result (post-order).
+Only the functions from which a cycle in the call graph is reachable (so processing depth is unbounded) get steps, the rest keep being called directly, since their depth is bounded by the grammar.
+Resuming generators is several times slower than calling functions, so steps are generated only for the grammars configured for it (see `gen-bundle --explicit-stack`), and then the main production always runs on the explicit stack. Retrying on the call stack first and falling back after `RecursionError` would repeat side effects of the processing done before the failure."""
+
+import ast
+import typing
+from copy import deepcopy
+
+from ..defaults import mainProductionName
+from .primitiveBlocks import ASTSelf
+
+stepFuncSuffix = "__step"
+runStepsFuncName = "runSteps"
+optionalStepFuncName = "optionalStep"
+entryFuncSuffix = "__entry"
+
+stepsDriverSource = '''
+def ''' + runStepsFuncName + '''(step):
+	"""Runs a step and all the steps it yields using an explicit stack, so depth of processing is not limited by the recursion limit"""
+	stack = []
+	value = None
+	while True:
+		try:
+			child = step.send(value)
+		except StopIteration as ex:
+			if not stack:
+				return ex.value
+			value = ex.value
+			step = stack.pop()
+		else:
+			stack.append(step)
+			step = child
+			value = None
+
+
+def ''' + optionalStepFuncName + '''(step):
+	if step is None:
+		return None
+	return (yield step)
+'''
+
+
+def genStepsDriver() -> typing.List[ast.stmt]:
+	return ast.parse(stepsDriverSource).body
+
+
+def getStepFuncName(funcName: str) -> str:
+	return funcName + stepFuncSuffix
+
+
+def _isSelfAttr(node: ast.AST) -> bool:
+	return isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == ASTSelf.id
+
+
+def _isGeneratorFunc(func: ast.FunctionDef) -> bool:
+	return any(isinstance(n, (ast.Yield, ast.YieldFrom)) for n in ast.walk(func))
+
+
+def _getTableMembers(stmt: ast.AST) -> typing.Optional[typing.Tuple[str, typing.List[str]]]:
+	"""Returns the name of a dispatch table (`name = {key: func, ...}` in the class body) and the names of the functions in it"""
+	if isinstance(stmt, ast.Assign) and len(stmt.targets) == 1 and isinstance(stmt.targets[0], ast.Name) and isinstance(stmt.value, ast.Dict):
+		if all(isinstance(v, ast.Name) for v in stmt.value.values):
+			return stmt.targets[0].id, [v.id for v in stmt.value.values]
+	return None
+
+
+def buildCallGraph(members: typing.Iterable[ast.stmt]) -> typing.Tuple[typing.Dict[str, typing.Set[str]], typing.Dict[str, ast.FunctionDef], typing.Dict[str, ast.Assign]]:
+	funcs = {}
+	tables = {}
+	for m in members:
+		if isinstance(m, ast.FunctionDef):
+			funcs[m.name] = m
+		else:
+			t = _getTableMembers(m)
+			if t is not None:
+				tables[t[0]] = m
+
+	graph = {}
+	for name, func in funcs.items():
+		graph[name] = {n.attr for n in ast.walk(func) if _isSelfAttr(n) and (n.attr in funcs or n.attr in tables)}
+	for name, table in tables.items():
+		graph[name] = {n for n in _getTableMembers(table)[1] if n in funcs}
+
+	return graph, funcs, tables
+
+
+def _getReachable(graph: typing.Mapping[str, typing.Set[str]], start: str) -> typing.Set[str]:
+	res = set()
+	toVisit = list(graph[start])
+	while toVisit:
+		n = toVisit.pop()
+		if n not in res:
+			res.add(n)
+			toVisit.extend(graph[n])
+	return res
+
+
+def getUnboundedDepthNodes(graph: typing.Mapping[str, typing.Set[str]]) -> typing.Set[str]:
+	"""Returns the nodes from which a cycle is reachable"""
+	reachable = {n: _getReachable(graph, n) for n in graph}
+	cyclic = {n for n, r in reachable.items() if n in r}
+	return {n for n, r in reachable.items() if n in cyclic or r & cyclic}
+
+
+def _isStepCall(node: ast.AST, stepFuncs: typing.Set[str]) -> bool:
+	return any(isinstance(n, ast.Call) and _isSelfAttr(n.func) and n.func.attr in stepFuncs for n in ast.walk(node))
+
+
+def _unrollListComps(body: typing.List[ast.stmt], stepFuncs: typing.Set[str]) -> typing.List[ast.stmt]:
+	"""`yield` is not allowed in comprehensions, so `return [self.process_x(f) for f in it]` becomes a loop appending to a list"""
+	res = []
+	for stmt in body:
+		comp = getattr(stmt, "value", None)
+		if isinstance(stmt, (ast.Return, ast.Assign)) and isinstance(comp, ast.ListComp) and len(comp.generators) == 1 and not comp.generators[0].ifs and _isStepCall(comp.elt, stepFuncs):
+			gen = comp.generators[0]
+			listName = "res_"
+			res.append(ast.Assign(targets=[ast.Name(id=listName, ctx=ast.Store())], value=ast.List(elts=[], ctx=ast.Load()), type_comment=None))
+			res.append(
+				ast.For(
+					target=gen.target,
+					iter=gen.iter,
+					body=[ast.Expr(value=ast.Call(func=ast.Attribute(value=ast.Name(id=listName, ctx=ast.Load()), attr="append", ctx=ast.Load()), args=[comp.elt], keywords=[]))],
+					orelse=[],
+					type_comment=None,
+				)
+			)
+			stmt.value = ast.Name(id=listName, ctx=ast.Load())
+		res.append(stmt)
+	return res
+
+
+class StepTransformer(ast.NodeTransformer):
+	"""Replaces calls of the functions having steps with yielding their steps"""
+
+	__slots__ = ("stepsNames", "stepTables", "localSteps")
+
+	def __init__(self, stepsNames: typing.Mapping[str, str], stepTables: typing.Set[str]) -> None:
+		self.stepsNames = stepsNames
+		self.stepTables = stepTables
+		self.localSteps = set()
+
+	def visit_Attribute(self, node: ast.Attribute) -> ast.Attribute:
+		self.generic_visit(node)
+		if _isSelfAttr(node) and node.attr in self.stepTables:
+			node.attr = getStepFuncName(node.attr)
+		return node
+
+	def visit_Assign(self, node: ast.Assign) -> ast.Assign:
+		self.generic_visit(node)
+		v = node.value
+		if isinstance(v, ast.Call) and isinstance(v.func, ast.Attribute) and v.func.attr == "get" and _isSelfAttr(v.func.value) and v.func.value.attr.endswith(stepFuncSuffix):
+			self.localSteps.update(t.id for t in node.targets if isinstance(t, ast.Name))
+		return node
+
+	def visit_Call(self, node: ast.Call) -> ast.AST:
+		if isinstance(node.func, ast.Attribute) and node.func.attr == "enterOptional" and len(node.args) == 2 and _isSelfAttr(node.args[1]) and node.args[1].attr in self.stepsNames:
+			self.generic_visit(node)
+			node.args[1] = ast.Attribute(value=ASTSelf, attr=self.stepsNames[node.args[1].attr], ctx=ast.Load())
+			return ast.YieldFrom(value=ast.Call(func=ast.Name(id=optionalStepFuncName, ctx=ast.Load()), args=[node], keywords=[]))
+
+		self.generic_visit(node)
+		if _isSelfAttr(node.func) and node.func.attr in self.stepsNames:
+			node.func = ast.Attribute(value=ASTSelf, attr=self.stepsNames[node.func.attr], ctx=ast.Load())
+			return ast.Yield(value=node)
+		if isinstance(node.func, ast.Name) and node.func.id in self.localSteps:
+			return ast.Yield(value=node)
+		return node
+
+
+def genMakeGenerator() -> ast.Expr:
+	"""`yield from ()`, for the steps not calling other steps, i.e. the members of dispatch tables processing terminals"""
+	return ast.Expr(value=ast.YieldFrom(value=ast.Tuple(elts=[], ctx=ast.Load())))
+
+
+def genEntryFunc(func: ast.FunctionDef, stepName: str) -> ast.FunctionDef:
+	"""
+	def <func>__entry(self, parsed):
+		return runSteps(self.<step>(parsed))
+	"""
+	args = [ast.Name(id=a.arg, ctx=ast.Load()) for a in func.args.args[1:]]
+
+	return ast.FunctionDef(
+		name=func.name + entryFuncSuffix,
+		args=deepcopy(func.args),
+		body=[ast.Return(value=ast.Call(func=ast.Name(id=runStepsFuncName, ctx=ast.Load()), args=[ast.Call(func=ast.Attribute(value=ASTSelf, attr=stepName, ctx=ast.Load()), args=args, keywords=[])], keywords=[]))],
+		decorator_list=[],
+		returns=func.returns,
+		type_comment=None,
+	)
+
+
+def _getForwardTarget(func: ast.FunctionDef, stepFuncs: typing.Set[str]) -> typing.Optional[str]:
+	"""Returns `X` for the functions like `def f(self, parsed): return self.X(parsed)`, such as branches of `alt`s"""
+	args = func.args
+	if len(func.body) != 1 or len(args.args) != 2 or args.vararg or args.kwarg or args.kwonlyargs:
+		return None
+
+	stmt = func.body[0]
+	if isinstance(stmt, ast.Return) and isinstance(stmt.value, ast.Call):
+		call = stmt.value
+		if _isSelfAttr(call.func) and call.func.attr in stepFuncs and not call.keywords and len(call.args) == 1 and isinstance(call.args[0], ast.Name) and call.args[0].id == args.args[1].arg:
+			return call.func.attr
+	return None
+
+
+def getStepsNames(funcs: typing.Mapping[str, ast.FunctionDef], stepFuncs: typing.Set[str]) -> typing.Dict[str, str]:
+	"""Maps the names of functions to the names of the steps to use for them. The functions just forwarding to another function get no steps of their own, the step of the target is used directly."""
+	forwards = {}
+	for n in stepFuncs:
+		target = _getForwardTarget(funcs[n], stepFuncs)
+		if target is not None:
+			forwards[n] = target
+
+	res = {}
+	for n in stepFuncs:
+		target = n
+		seen = set()
+		while target in forwards and target not in seen:
+			seen.add(target)
+			target = forwards[target]
+		res[n] = getStepFuncName(target)
+	return res
+
+
+def _isMainProductionAssign(stmt: ast.AST) -> bool:
+	return isinstance(stmt, ast.Assign) and len(stmt.targets) == 1 and isinstance(stmt.targets[0], ast.Name) and stmt.targets[0].id == mainProductionName and isinstance(stmt.value, ast.Name)
+
+
+def convertToSteps(members: typing.List[ast.stmt]) -> typing.List[ast.stmt]:
+	"""Returns the members of a parser class with steps added for the functions with unbounded depth. If the main production has unbounded depth, `__MAIN_PRODUCTION__` is replaced with an entry point running its step."""
+	graph, funcs, tables = buildCallGraph(members)
+	unbounded = getUnboundedDepthNodes(graph)
+
+	stepTables = {n for n in unbounded if n in tables}
+	stepFuncs = {n for n in unbounded if n in funcs}
+	for t in stepTables:
+		stepFuncs.update(n for n in graph[t])
+	stepFuncs = {n for n in stepFuncs if not _isGeneratorFunc(funcs[n])}
+	stepTables = {t for t in stepTables if graph[t] <= stepFuncs}
+	stepsNames = getStepsNames(funcs, stepFuncs)
+
+	res = []
+	tablesSteps = []
+	for m in members:
+		if isinstance(m, ast.FunctionDef) and m.name in stepFuncs:
+			res.append(m)
+			if stepsNames[m.name] != getStepFuncName(m.name):
+				continue
+
+			step = deepcopy(m)
+			step.name = stepsNames[m.name]
+			step.returns = None
+			step.body = _unrollListComps(step.body, stepFuncs)
+			step = StepTransformer(stepsNames, stepTables).visit(step)
+			if not _isGeneratorFunc(step):
+				step.body.insert(0, genMakeGenerator())
+			res.append(step)
+		elif _isMainProductionAssign(m) and m.value.id in stepFuncs:
+			entry = genEntryFunc(funcs[m.value.id], stepsNames[m.value.id])
+			res.append(entry)
+			res.append(ast.Assign(targets=m.targets, value=ast.Name(id=entry.name, ctx=ast.Load()), type_comment=None))
+		else:
+			res.append(m)
+			t = _getTableMembers(m)
+			if t is not None and t[0] in stepTables:
+				table = deepcopy(m)
+				table.targets[0].id = getStepFuncName(t[0])
+				for v in table.value.values:
+					v.id = stepsNames[v.id]
+				tablesSteps.append(table)
+
+	res.extend(tablesSteps)  # steps of forwarding functions are defined later than the functions themselves
+	return [ast.fix_missing_locations(m) for m in res]
@@ -12,6 +12,7 @@ from ..ast.templates import TemplateInstantiation
 from ..ast.tokens import Alt, Iter, Lit, Opt, Seq
 from ..CodeGen import CodeGen, CodeGenContext
 from ..defaults import ourProjectLink
+from ..profiling import span
 from ..templater import expandTemplates
 
 
@@ -358,7 +359,8 @@ class Generator(CodeGen):
 
 	@classmethod
 	def preprocessGrammar(cls, grammar: Grammar, ctx: typing.Any = None) -> None:
-		expandTemplates(grammar, cls, ctx, grammar)
+		with span("expandTemplates"):
+			expandTemplates(grammar, cls, ctx, grammar)
 
 	@classmethod
 	def TemplateInstantiation(cls, obj: TemplateInstantiation, grammar: Grammar, ctx: typing.Any = None) -> typing.Any:
@@ -389,3 +391,8 @@ class Generator(CodeGen):
 	def _transpile(cls, grammar: Grammar, ctx: typing.Any = None) -> typing.Iterable[str]:
 		"""A function generating lines of the source. Redefine it in subclasses."""
 		raise NotImplementedError()
+
+	@classmethod
+	def iterTranspile(cls, grammar: Grammar, ctx: typing.Any = None) -> typing.Iterator[str]:
+		"""Lazily generates lines of the source. Redefine it in subclasses able to generate the source incrementally."""
+		return iter(cls._transpile(grammar, ctx))
@@ -20,6 +20,10 @@ class Runner(ABC):
 	def saveCompiled(self, internalRepr: str, grammarResources: InMemoryGrammarResources, meta: ToolMetadata, target: str = "python"):
 		grammarResources.parent.backendsTextData[meta.product.name, grammarResources.name + "." + meta.mainExtension] = internalRepr
 
+	def flush(self, jobs: typing.Optional[int] = None) -> typing.Dict[str, typing.Dict[str, bytes]]:
+		"""Finishes the work `saveCompiled` has deferred in order to do it in a batch. `jobs` limits the count of concurrent processes, `None` means the count of CPUs. Returns the files written into the bundle dir directly rather than through `backendsTextData`, as `{grammar name: {path relative to the dir of the backend: contents}}`."""
+		return {}
+
 	def trace(self, parser, text: str):
 		raise NotImplementedError()
 
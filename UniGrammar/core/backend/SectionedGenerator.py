@@ -145,10 +145,39 @@ class SectionedGenerator(UsualGenerator):
 		t.extend(cls.SECTIONER.END(cls, grammar))
 		return t
 
+	@classmethod
+	def iterTranspile(cls, grammar: Grammar, ctx: typing.Any = None) -> typing.Iterator[str]:
+		"""Like `_transpile`, but each section is resolved right before it is dumped and dropped after that, so only one section is in memory at a time.
+		A dumper not consuming content (a plain function in `SECTIONER`) may rely on all the sections being resolved, so all the sections after it are resolved before calling it."""
+		yield from cls.SECTIONER.START(cls, grammar)
+
+		order = tuple(cls.getOrder(grammar))
+		resolvedCount = 0
+		for i, secName in enumerate(order):
+			sectionDumper = getattr(cls.SECTIONER, secName)
+			if doesDumperSupportContent(sectionDumper):
+				if i >= resolvedCount:
+					cls._embedSection(grammar, secName, ctx)
+					resolvedCount = i + 1
+				ctx.currentSectionDumper = sectionDumper
+				yield from sectionDumper.dumpSection(cls, grammar, ctx.sections.pop(secName, ()), ctx)
+			else:
+				for laterSecName in order[resolvedCount:]:
+					cls._embedSection(grammar, laterSecName, ctx)
+				resolvedCount = len(order)
+				ctx.currentSectionDumper = sectionDumper
+				yield from sectionDumper(cls, grammar, ctx)
+
+		yield from cls.SECTIONER.END(cls, grammar)
+
+	@classmethod
+	def _embedSection(cls, obj: Grammar, secName: str, ctx: typing.Any = None) -> None:
+		sectionDumper = getattr(cls.SECTIONER, secName)
+		ctx.currentSectionDumper = sectionDumper
+		if doesDumperSupportContent(sectionDumper):  # just class methods in SECTIONER can be used only in scope of a grammar file, they cannot be used when embedding other rules
+			ctx.sections[secName].extend(tuple(sectionDumper.dumpContent(cls, obj, ctx)))
+
 	@classmethod
 	def embedGrammar(cls, obj: Grammar, ctx: typing.Any = None) -> None:
 		for secName in cls.getOrder(obj):
-			sectionDumper = getattr(cls.SECTIONER, secName)
-			ctx.currentSectionDumper = sectionDumper
-			if doesDumperSupportContent(sectionDumper):  # just class methods in SECTIONER can be used only in scope of a grammar file, they cannot be used when embedding other rules
-				ctx.sections[secName].extend(tuple(sectionDumper.dumpContent(cls, obj, ctx)))
+			cls._embedSection(obj, secName, ctx)
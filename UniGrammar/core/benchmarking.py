@@ -0,0 +1,139 @@
+"""Measures parsers generated by different backends on a grammar's test corpus and fits a cost model for each of them, so the fastest backend can be chosen for an input of a given length.
+The models are stored into the bundle, but only `loadCostModels` and `chooseBackend` here read them: the runtime doesn't choose backends by them yet."""
+
+import json
+import typing
+import warnings
+from pathlib import Path
+from time import perf_counter_ns
+
+from .cache import atomicWriteText
+
+costModelsDirName = "costModels"
+costModelsFormatVersion = 1
+
+
+class CostModel:
+	"""`fixed + perByte * len(input)` seconds"""
+
+	__slots__ = ("fixed", "perByte", "samples")
+
+	def __init__(self, fixed: float, perByte: float, samples: int = 0) -> None:
+		self.fixed = fixed
+		self.perByte = perByte
+		self.samples = samples
+
+	def predict(self, size: int) -> float:
+		return self.fixed + self.perByte * size
+
+	def toDict(self) -> typing.Dict[str, typing.Union[float, int]]:
+		return {"fixed": self.fixed, "perByte": self.perByte, "samples": self.samples}
+
+	@classmethod
+	def fromDict(cls, d: typing.Mapping[str, typing.Union[float, int]]) -> "CostModel":
+		return cls(d["fixed"], d["perByte"], d.get("samples", 0))
+
+	def __repr__(self):
+		return self.__class__.__name__ + "(" + ", ".join(repr(k) + "=" + repr(getattr(self, k)) for k in __class__.__slots__) + ")"  # pylint:disable=undefined-variable
+
+
+def stratifiedSample(tests: typing.Iterable[str], strata: int = 4, perStratum: int = 2) -> typing.List[str]:
+	"""Splits the tests sorted by length into `strata` groups of equal count and takes up to `perStratum` evenly spaced tests from each, so all the input sizes present in the corpus are represented"""
+	tests = sorted(dict.fromkeys(tests), key=len)  # unlike a `set`, keeps the order of the corpus, so the samples of the same length don't depend on string hashing
+	if not tests:
+		return []
+
+	strata = max(1, min(strata, len(tests)))
+	res = []
+	for i in range(strata):
+		stratum = tests[len(tests) * i // strata : len(tests) * (i + 1) // strata]
+		if not stratum:
+			continue
+		count = min(perStratum, len(stratum))
+		if count == 1:
+			res.append(stratum[len(stratum) // 2])
+		else:
+			res.extend(stratum[(len(stratum) - 1) * j // (count - 1)] for j in range(count))
+	return res
+
+
+def measure(parser: typing.Callable[[str], typing.Any], sample: str, warmup: int = 1, repeats: int = 5) -> float:
+	"""Returns the minimal time of parsing `sample` in seconds. The minimum is the least noisy estimate, the rest is the interference from the system."""
+	for _ in range(warmup):
+		parser(sample)
+
+	best = None
+	for _ in range(repeats):
+		start = perf_counter_ns()
+		parser(sample)
+		dt = perf_counter_ns() - start
+		if best is None or dt < best:
+			best = dt
+	return best / 1e9
+
+
+def fitCostModel(points: typing.Sequence[typing.Tuple[int, float]]) -> CostModel:
+	"""Least squares fit of a line to `(size, seconds)` points. Both coefficients are clamped to be non-negative."""
+	n = len(points)
+	if not n:
+		raise ValueError("No points to fit")
+
+	meanX = sum(x for x, y in points) / n
+	meanY = sum(y for x, y in points) / n
+	varX = sum((x - meanX) ** 2 for x, y in points)
+	if varX:
+		perByte = max(0.0, sum((x - meanX) * (y - meanY) for x, y in points) / varX)
+	else:
+		perByte = 0.0
+	fixed = meanY - perByte * meanX
+	if fixed < 0:
+		fixed = 0.0
+		perByte = sum(x * y for x, y in points) / (sum(x * x for x, y in points) or 1)
+	return CostModel(fixed, perByte, n)
+
+
+def benchmarkParsers(parsers: typing.Mapping[str, typing.Callable[[str], typing.Any]], samples: typing.Iterable[str], warmup: int = 1, repeats: int = 5) -> typing.Dict[str, CostModel]:
+	"""Fits a cost model for each parser. Samples a parser fails on are not used for its model, a parser failing on all of them gets no model."""
+	samples = tuple(samples)
+	res = {}
+	for name, parser in parsers.items():
+		points = []
+		for sample in samples:
+			try:
+				points.append((len(sample), measure(parser, sample, warmup, repeats)))
+			except Exception as ex:  # pylint:disable=broad-except
+				warnings.warn(name + " has failed on a sample of length " + str(len(sample)) + " during benchmarking: " + repr(ex))
+		if points:
+			res[name] = fitCostModel(points)
+	return res
+
+
+def chooseBackend(models: typing.Mapping[str, CostModel], size: int) -> typing.Optional[str]:
+	"""Returns the name of the backend predicted to be the fastest for an input of `size` chars"""
+	best = None
+	bestCost = None
+	for name, model in models.items():
+		cost = model.predict(size)
+		if bestCost is None or cost < bestCost:
+			best = name
+			bestCost = cost
+	return best
+
+
+def getCostModelsPath(bundleDir: Path, grammarName: str) -> Path:
+	return bundleDir / "compiled" / costModelsDirName / (grammarName + ".json")
+
+
+def saveCostModels(bundleDir: Path, grammarName: str, models: typing.Mapping[str, CostModel]) -> None:
+	atomicWriteText(getCostModelsPath(bundleDir, grammarName), json.dumps({"version": costModelsFormatVersion, "backends": {k: v.toDict() for k, v in models.items()}}, indent="\t"))
+
+
+def loadCostModels(bundleDir: Path, grammarName: str) -> typing.Dict[str, CostModel]:
+	"""Returns an empty dict if there are no models for the grammar in the bundle"""
+	try:
+		data = json.loads(getCostModelsPath(bundleDir, grammarName).read_text(encoding="utf-8"))
+	except OSError:
+		return {}
+	if data.get("version", None) != costModelsFormatVersion:
+		return {}
+	return {k: CostModel.fromDict(v) for k, v in data["backends"].items()}
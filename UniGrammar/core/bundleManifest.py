@@ -0,0 +1,108 @@
+"""A manifest of a parser bundle recording content hashes of everything a bundle entry was built from and of what it was built into, so rebuilding a bundle can skip the entries which inputs have not changed"""
+
+import json
+import typing
+from pathlib import Path
+
+from .cache import atomicWriteText, hashText
+
+manifestFileName = "manifest.json"
+manifestFormatVersion = 1
+
+
+class BundleManifest:
+	"""`grammars` maps a path of a source `.yug` file to
+	{
+		"id": <grammar id>,
+		"source": <hash of the source>,
+		"backends": {<backend name>: {"transpiled": <hash of transpiled grammar>, "artefacts": {<file name>: <hash>}}},
+		"wrapper": <hash of wrapper AST dump>
+	}
+	All the entries are stale if the build options have changed. An entry is also stale if any of its artefacts in the bundle dir doesn't match the recorded hash."""
+
+	__slots__ = ("path", "optionsHash", "grammars")
+
+	def __init__(self, bundleDir: Path, optionsHash: str) -> None:
+		self.path = bundleDir / manifestFileName
+		self.optionsHash = optionsHash
+		self.grammars = {}
+
+	@classmethod
+	def load(cls, bundleDir: Path, optionsHash: str) -> "BundleManifest":
+		res = cls(bundleDir, optionsHash)
+		try:
+			data = json.loads(res.path.read_text(encoding="utf-8"))
+		except (OSError, ValueError):
+			return res
+
+		if data.get("version", None) == manifestFormatVersion and data.get("options", None) == optionsHash:
+			res.grammars = data.get("grammars", {})
+		return res
+
+	def save(self) -> None:
+		atomicWriteText(self.path, json.dumps({"version": manifestFormatVersion, "options": self.optionsHash, "grammars": self.grammars}, indent="\t", sort_keys=True))
+
+	@staticmethod
+	def getKey(sourceFile: Path) -> str:
+		return str(Path(sourceFile).absolute())
+
+	def getArtefactPath(self, backendName: str, fileName: str) -> Path:
+		return self.path.parent / "compiled" / backendName / fileName
+
+	def areArtefactsIntact(self, backendName: str, backend: typing.Mapping[str, typing.Any]) -> bool:
+		"""Whether the artefacts of the backend on disk are the ones recorded"""
+		for fileName, artefactHash in backend.get("artefacts", {}).items():
+			try:
+				data = self.getArtefactPath(backendName, fileName).read_bytes()
+			except OSError:
+				return False
+			if hashText(data) != artefactHash:
+				return False
+		return True
+
+	def isSourceFresh(self, sourceFile: Path, sourceHash: str) -> bool:
+		entry = self.grammars.get(self.getKey(sourceFile), None)
+		if entry is None or entry.get("source", None) != sourceHash or "wrapper" not in entry:
+			return False
+		return all(self.areArtefactsIntact(backendName, backend) for backendName, backend in entry.get("backends", {}).items())
+
+	def isTranspiledFresh(self, sourceFile: Path, backendName: str, transpiledHash: str) -> bool:
+		"""Whether the artefacts of the backend have been compiled from the same transpiled grammar"""
+		entry = self.grammars.get(self.getKey(sourceFile), None)
+		if entry is None:
+			return False
+		backend = entry.get("backends", {}).get(backendName, None)
+		return backend is not None and backend.get("transpiled", None) == transpiledHash and self.areArtefactsIntact(backendName, backend)
+
+	def iterArtefacts(self, sourceFile: Path) -> typing.Iterator[typing.Tuple[str, str]]:
+		"""Yields `(backend name, file name)` of the recorded artefacts of a source"""
+		entry = self.grammars.get(self.getKey(sourceFile), None)
+		if entry is None:
+			return
+		for backendName, backend in entry.get("backends", {}).items():
+			for fileName in backend.get("artefacts", {}):
+				yield backendName, fileName
+
+	def getEntry(self, sourceFile: Path) -> typing.Dict[str, typing.Any]:
+		return self.grammars.setdefault(self.getKey(sourceFile), {"backends": {}})
+
+	def updateSource(self, sourceFile: Path, grammarId: str, sourceHash: str, wrapperHash: str) -> None:
+		entry = self.getEntry(sourceFile)
+		entry["id"] = grammarId
+		entry["source"] = sourceHash
+		entry["wrapper"] = wrapperHash
+
+	def updateBackend(self, sourceFile: Path, backendName: str, transpiledHash: str, artefacts: typing.Mapping[str, typing.Union[str, bytes]]) -> None:
+		self.getEntry(sourceFile)["backends"][backendName] = {"transpiled": transpiledHash, "artefacts": {k: hashText(v) for k, v in artefacts.items()}}
+
+	def addArtefacts(self, sourceFile: Path, backendName: str, artefacts: typing.Mapping[str, typing.Union[str, bytes]]) -> None:
+		"""Records the artefacts written after `updateBackend`, i.e. by `Runner.flush`"""
+		self.getEntry(sourceFile)["backends"][backendName]["artefacts"].update((k, hashText(v)) for k, v in artefacts.items())
+
+
+def hashSourceFile(sourceFile: Path) -> str:
+	return hashText(Path(sourceFile).read_bytes())
+
+
+def hashOptions(**options: typing.Any) -> str:
+	return hashText(json.dumps(options, sort_keys=True, default=repr))
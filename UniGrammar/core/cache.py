@@ -0,0 +1,45 @@
+"""Utilities shared by persistent caches"""
+
+import hashlib
+import os
+import tempfile
+import typing
+from pathlib import Path
+
+cacheDirEnvVarName = "UNIGRAMMAR_CACHE_DIR"
+
+
+def getCacheDir(*subDirs: str) -> Path:
+	"""Returns a dir for persistent caches. The root can be overridden with `UNIGRAMMAR_CACHE_DIR` env var, otherwise XDG conventions are followed."""
+	base = os.environ.get(cacheDirEnvVarName, None)
+	if base is None:
+		base = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "UniGrammar"
+	return Path(base).joinpath(*subDirs)
+
+
+def hashText(*parts: typing.Union[str, bytes]) -> str:
+	"""Hashes a sequence of strings. Parts are delimited, so `("ab", "c")` and `("a", "bc")` give different hashes."""
+	h = hashlib.sha256()
+	for p in parts:
+		if isinstance(p, str):
+			p = p.encode("utf-8")
+		h.update(p)
+		h.update(b"\0")
+	return h.hexdigest()
+
+
+def atomicWriteBytes(path: Path, data: bytes) -> None:
+	"""Writes into a temporary file in the same dir and then renames it, so readers never see a half-written file"""
+	path.parent.mkdir(parents=True, exist_ok=True)
+	fd, tmpName = tempfile.mkstemp(dir=str(path.parent), prefix="." + path.name + ".", suffix=".tmp")
+	try:
+		with os.fdopen(fd, "wb") as f:
+			f.write(data)
+		os.replace(tmpName, str(path))
+	except BaseException:
+		os.unlink(tmpName)
+		raise
+
+
+def atomicWriteText(path: Path, text: str, encoding: str = "utf-8") -> None:
+	atomicWriteBytes(path, text.encode(encoding))
@@ -0,0 +1,96 @@
+"""A persistent cache of results of compilers of parser generators, so compiling a grammar which text has not changed is skipped"""
+
+import pickle
+import types
+import typing
+from pathlib import Path
+
+from .cache import atomicWriteBytes, atomicWriteText, getCacheDir, hashText
+from .WrapperGen.bytecode import codeFromPyc, compileWrapper, getWrapperBytecodeFileName
+
+compilationCacheFormatVersion = 1
+
+
+class CompilationCache:
+	"""Pickled compilation results keyed by a hash of everything a result depends on. Results which cannot be pickled are just not cached. `salt` should identify the version of the compiler."""
+
+	__slots__ = ("name", "salt")
+
+	def __init__(self, name: str, salt: str = "") -> None:
+		self.name = name
+		self.salt = salt
+
+	@property
+	def dir(self) -> Path:
+		return getCacheDir("compiled", self.name)
+
+	def getKey(self, *parts: typing.Union[str, bytes]) -> str:
+		return hashText(str(compilationCacheFormatVersion), self.salt, *parts)
+
+	def getPath(self, key: str) -> Path:
+		return self.dir / key[:2] / (key + ".pickle")
+
+	def get(self, key: str) -> typing.Optional[typing.Any]:
+		try:
+			return pickle.loads(self.getPath(key).read_bytes())
+		except Exception:  # pylint:disable=broad-except
+			# missing, half-written by an older version, or unpicklable in this environment: all the same, a miss
+			return None
+
+	def put(self, key: str, value: typing.Any) -> bool:
+		try:
+			data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+		except Exception:  # pylint:disable=broad-except
+			return False
+		atomicWriteBytes(self.getPath(key), data)
+		return True
+
+
+class ModuleCache:
+	"""Python modules generated by parser generators, stored as source and as a hash-based `.pyc` of it, keyed by a hash of everything a module depends on. Bytecode produced by another Python is ignored and recompiled from the cached source."""
+
+	__slots__ = ("name", "salt")
+
+	def __init__(self, name: str, salt: str = "") -> None:
+		self.name = name
+		self.salt = salt
+
+	@property
+	def dir(self) -> Path:
+		return getCacheDir("compiled", self.name)
+
+	def getKey(self, *parts: typing.Union[str, bytes]) -> str:
+		return hashText(str(compilationCacheFormatVersion), self.salt, *parts)
+
+	def getSourcePath(self, key: str) -> Path:
+		return self.dir / key[:2] / (key + ".py")
+
+	def getBytecodePath(self, key: str) -> Path:
+		return self.dir / key[:2] / getWrapperBytecodeFileName(key)
+
+	def get(self, key: str) -> typing.Optional[typing.Tuple[str, "types.CodeType"]]:
+		"""Returns `(source, code)` or `None` on a miss"""
+		try:
+			sourceBytes = self.getSourcePath(key).read_bytes()
+		except OSError:
+			return None
+
+		try:
+			code = codeFromPyc(self.getBytecodePath(key).read_bytes(), sourceBytes)
+		except OSError:
+			code = None
+
+		source = sourceBytes.decode("utf-8")
+		if code is None:
+			code = self._saveBytecode(key, source)
+		return source, code
+
+	def _saveBytecode(self, key: str, source: str) -> "types.CodeType":
+		pyc = compileWrapper(source, key)
+		atomicWriteBytes(self.getBytecodePath(key), pyc)
+		return codeFromPyc(pyc)
+
+	def put(self, key: str, source: str) -> "types.CodeType":
+		"""Stores the source and its bytecode, returns the code object"""
+		atomicWriteText(self.getSourcePath(key), source)
+		return self._saveBytecode(key, source)
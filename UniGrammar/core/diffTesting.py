@@ -0,0 +1,155 @@
+"""Differential testing of backends: the same samples are parsed by the wrappers of a grammar for different backends and the parse results are compared structurally. The uniform wrapper is meant to make the results of all the backends identical, a difference means a bug either in the grammar or in the wrapper generator.
+The results are normalized in the processes parsing them into plain `dict`s, `list`s and `str`s, records are recognized using the `capSchema` of the grammar and their fields are enumerated from their classes, so no objects of the wrapper module have to be pickled."""
+
+import typing
+from pathlib import Path
+from time import perf_counter_ns
+
+from UniGrammarRuntime.ParserBundle import ParserBundle
+
+from .WrapperGen.IterWrapperFuncGen import getColumnsClassName
+
+recordTypeKey = "@type"
+columnsClassNameSuffix = getColumnsClassName("")
+
+_wrappersCache = {}
+
+
+class Mismatch:
+	__slots__ = ("path", "expected", "actual")
+
+	def __init__(self, path: str, expected: typing.Any, actual: typing.Any) -> None:
+		self.path = path
+		self.expected = expected
+		self.actual = actual
+
+	def __str__(self) -> str:
+		return (self.path or "<root>") + ": " + describe(self.expected) + " != " + describe(self.actual)
+
+	def __repr__(self):
+		return self.__class__.__name__ + "(" + ", ".join(repr(k) + "=" + repr(getattr(self, k)) for k in __class__.__slots__) + ")"  # pylint:disable=undefined-variable
+
+
+class BackendRun:
+	"""Results of parsing a chunk of samples by a backend. `results` are `(normalized parse result, None)` or `(None, error message)`, `parseTime` is the sum of times of parsing the samples, in ns, excluding loading the wrapper and normalizing the results."""
+
+	__slots__ = ("backend", "results", "parseTime")
+
+	def __init__(self, backend: str, results: typing.List[typing.Tuple[typing.Any, typing.Optional[str]]], parseTime: int) -> None:
+		self.backend = backend
+		self.results = results
+		self.parseTime = parseTime
+
+	def __repr__(self):
+		return self.__class__.__name__ + "(" + ", ".join(repr(k) + "=" + repr(getattr(self, k)) for k in __class__.__slots__) + ")"  # pylint:disable=undefined-variable
+
+
+def describe(v: typing.Any, maxLen: int = 40) -> str:
+	if isinstance(v, dict):
+		return "<" + str(v.get(recordTypeKey, "record")) + ">"
+	if isinstance(v, list):
+		return "<list of " + str(len(v)) + ">"
+	res = repr(v)
+	if len(res) > maxLen:
+		res = res[: maxLen - 3] + "..."
+	return res
+
+
+def getRecordFields(recordType: type) -> typing.Tuple[str, ...]:
+	"""`capSchema` maps the names of the referenced rules to the names of the fields, so the fields capturing the same rule collide in it. The generated record classes enumerate all their fields: `tuple` records in `_fields`, the rest in `__slots__`."""
+	res = getattr(recordType, "_fields", None)
+	if res is None:
+		res = recordType.__slots__
+	return tuple(res)
+
+
+def normalizeParseResult(obj: typing.Any, capSchema: typing.Mapping[str, typing.Mapping[str, str]], iterSchema: typing.Collection[str], refName: typing.Optional[str] = None) -> typing.Any:
+	"""Converts a parse result into plain data. `refName` is the name of the production `obj` has been produced from, if known: results of productions in `iterSchema` are materialized into `list`s, so lazy collections are compared by items. Collections processed into columns (`--columnar`) become records of `list`s, one per column."""
+	if obj is None or isinstance(obj, (str, bool, int, float)):
+		return obj
+
+	typeName = type(obj).__name__
+	refsToCaps = capSchema.get(typeName, None)
+	if refsToCaps is not None:
+		capsToRefs = {capName: capRefName for capRefName, capName in refsToCaps.items()}
+		res = {recordTypeKey: typeName}
+		for fieldName in getRecordFields(type(obj)):
+			res[fieldName] = normalizeParseResult(getattr(obj, fieldName, None), capSchema, iterSchema, capsToRefs.get(fieldName, None))
+		return res
+
+	if typeName.endswith(columnsClassNameSuffix) and typeName[: -len(columnsClassNameSuffix)] in iterSchema:
+		res = {recordTypeKey: typeName}
+		for columnName in type(obj).__slots__:
+			res[columnName] = [normalizeParseResult(el, capSchema, iterSchema) for el in getattr(obj, columnName)]
+		return res
+
+	if refName in iterSchema or isinstance(obj, (list, tuple)) or (hasattr(obj, "__iter__") and not isinstance(obj, (bytes, bytearray))):
+		return [normalizeParseResult(el, capSchema, iterSchema) for el in obj]
+
+	return str(obj)  # `Span`s and other lazy representations of terminals
+
+
+def iterMismatches(expected: typing.Any, actual: typing.Any, path: str = "") -> typing.Iterator[Mismatch]:
+	"""Yields the differences of normalized parse results at the deepest paths where they still can be attributed to a single node: records of different types and values of different kinds are reported as a whole, lists of different lengths are reported at the list and their common prefixes are compared item by item"""
+	if isinstance(expected, dict) and isinstance(actual, dict):
+		if expected.get(recordTypeKey, None) != actual.get(recordTypeKey, None):
+			yield Mismatch(path, expected, actual)
+			return
+		for k in expected.keys() | actual.keys():
+			if k != recordTypeKey:
+				yield from iterMismatches(expected.get(k, None), actual.get(k, None), path + "." + k)
+		return
+
+	if isinstance(expected, list) and isinstance(actual, list):
+		if len(expected) != len(actual):
+			yield Mismatch(path, expected, actual)
+		for i, (e, a) in enumerate(zip(expected, actual)):
+			yield from iterMismatches(e, a, path + "[" + str(i) + "]")
+		return
+
+	if expected != actual:
+		yield Mismatch(path, expected, actual)
+
+
+def getWrapper(bundleDir: Path, grammarId: str, backend: str) -> typing.Callable[[str], typing.Any]:
+	"""Loads the wrapper once per process"""
+	key = (str(bundleDir), grammarId, backend)
+	res = _wrappersCache.get(key, None)
+	if res is None:
+		res = _wrappersCache[key] = ParserBundle(Path(bundleDir)).grammars[grammarId].getWrapper(backend)
+	return res
+
+
+def runBackend(bundleDir: Path, grammarId: str, backend: str, capSchema: typing.Mapping[str, typing.Mapping[str, str]], iterSchema: typing.Collection[str], samples: typing.Sequence[str]) -> BackendRun:
+	"""Parses the samples with the wrapper for the backend from the bundle. Meant to be run in worker processes."""
+	wrapper = getWrapper(bundleDir, grammarId, backend)
+	results = []
+	parseTime = 0
+	for sample in samples:
+		start = perf_counter_ns()
+		try:
+			parsed = wrapper(sample)
+		except Exception as ex:  # pylint:disable=broad-except
+			parseTime += perf_counter_ns() - start
+			results.append((None, type(ex).__name__ + ": " + str(ex)))
+			continue
+		parseTime += perf_counter_ns() - start
+		results.append((normalizeParseResult(parsed, capSchema, iterSchema), None))
+	return BackendRun(backend, results, parseTime)
+
+
+def compareBackendsResults(reference: typing.Tuple[typing.Any, typing.Optional[str]], other: typing.Tuple[typing.Any, typing.Optional[str]], maxMismatches: int = 5) -> typing.List[Mismatch]:
+	"""Compares `(normalized result, error)` pairs of a sample. Rejecting a sample by both backends is an agreement, rejecting it by only one of them is a mismatch at the root."""
+	refRes, refErr = reference
+	otherRes, otherErr = other
+	if refErr is not None or otherErr is not None:
+		if (refErr is None) != (otherErr is None):
+			return [Mismatch("", refRes if refErr is None else "rejected: " + refErr, otherRes if otherErr is None else "rejected: " + otherErr)]
+		return []
+
+	res = []
+	for m in iterMismatches(refRes, otherRes):
+		res.append(m)
+		if len(res) >= maxMismatches:
+			break
+	return res
@@ -0,0 +1,115 @@
+"""Writing output files only if their content has changed, so their mtimes are preserved and downstream builds relying on them don't redo the work.
+The hash of the content of a file is stored in a sidecar file `.<name>.sha256` together with the size and mtime of the file, so the old content doesn't have to be read to compare. A sidecar not matching the file (i.e. the file has been edited by hand) is ignored and the file is rewritten."""
+
+import hashlib
+import os
+import tempfile
+import typing
+from pathlib import Path
+
+from .cache import atomicWriteText
+
+
+class WriteStats:
+	__slots__ = ("written", "skipped")
+
+	def __init__(self) -> None:
+		self.written = 0
+		self.skipped = 0
+
+	def register(self, written: bool) -> None:
+		if written:
+			self.written += 1
+		else:
+			self.skipped += 1
+
+	def __str__(self) -> str:
+		return "written: " + str(self.written) + ", unchanged: " + str(self.skipped)
+
+	def __repr__(self):
+		return self.__class__.__name__ + "(" + ", ".join(repr(k) + "=" + repr(getattr(self, k)) for k in __class__.__slots__) + ")"  # pylint:disable=undefined-variable
+
+
+def getHashSidecarPath(path: Path) -> Path:
+	return path.parent / ("." + path.name + ".sha256")
+
+
+def _statSignature(st: os.stat_result) -> str:
+	return str(st.st_size) + " " + str(st.st_mtime_ns)
+
+
+def getStoredHash(path: Path) -> typing.Optional[str]:
+	"""The hash from the sidecar if it describes the current file, otherwise `None`"""
+	try:
+		storedHash, signature = getHashSidecarPath(path).read_text(encoding="ascii").split("\n")[:2]
+		st = path.stat()
+	except (OSError, ValueError):
+		return None
+	if signature != _statSignature(st):
+		return None
+	return storedHash
+
+
+def _getModeForNewFile(path: Path) -> int:
+	"""`mkstemp` creates files readable only by the owner, the written file should get the mode of the file it replaces or the one `open` would have given"""
+	try:
+		return path.stat().st_mode & 0o7777
+	except OSError:
+		umask = os.umask(0)
+		os.umask(umask)
+		return 0o666 & ~umask
+
+
+class WriterIfChanged:
+	"""A text sink writing into a temporary file in the dir of `path` and hashing the content. On successful exit the temporary file replaces `path` if the hash differs from the stored one, otherwise it is discarded. `written` tells which has happened."""
+
+	__slots__ = ("path", "encoding", "hasher", "tmpFile", "tmpName", "written")
+
+	def __init__(self, path: Path, encoding: str = "utf-8") -> None:
+		self.path = Path(path)
+		self.encoding = encoding
+		self.hasher = None
+		self.tmpFile = None
+		self.tmpName = None
+		self.written = None
+
+	def __enter__(self) -> "WriterIfChanged":
+		self.path.parent.mkdir(parents=True, exist_ok=True)
+		fd, self.tmpName = tempfile.mkstemp(dir=str(self.path.parent), prefix="." + self.path.name + ".", suffix=".tmp")
+		self.tmpFile = os.fdopen(fd, "wb")
+		self.hasher = hashlib.sha256()
+		return self
+
+	def write(self, s: str) -> int:
+		data = s.encode(self.encoding)
+		self.hasher.update(data)
+		self.tmpFile.write(data)
+		return len(s)
+
+	def __exit__(self, excType, excValue, traceback) -> None:
+		self.tmpFile.close()
+		if excType is not None:
+			os.unlink(self.tmpName)
+			return
+
+		newHash = self.hasher.hexdigest()
+		if newHash == getStoredHash(self.path):
+			os.unlink(self.tmpName)
+			self.written = False
+			return
+
+		try:
+			os.chmod(self.tmpName, _getModeForNewFile(self.path))
+			os.replace(self.tmpName, str(self.path))
+		except BaseException:
+			os.unlink(self.tmpName)
+			raise
+		atomicWriteText(getHashSidecarPath(self.path), newHash + "\n" + _statSignature(self.path.stat()), encoding="ascii")
+		self.written = True
+
+
+def writeTextIfChanged(path: Path, text: str, encoding: str = "utf-8") -> bool:
+	"""Returns whether the file has been written"""
+	with WriterIfChanged(path, encoding) as w:
+		w.write(text)
+	return w.written
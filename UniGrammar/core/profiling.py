@@ -0,0 +1,192 @@
+"""Records nested spans of time spent in the phases of transpilation. The phases are marked with `span`, which does nothing unless a `Profiler` is active, so the marks cost almost nothing in normal runs.
+
+	with profile(traceMemory=True) as p:
+		transpile(...)
+	p.saveChromeTrace(Path("trace.json"))
+	print(p.summary())
+"""
+
+import json
+import os
+import threading
+import typing
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from time import perf_counter_ns
+
+_activeProfiler = None
+
+
+class Span:
+	__slots__ = ("name", "args", "start", "duration", "childrenDuration", "memoryPeak", "depth", "tid")
+
+	def __init__(self, name: str, args: typing.Dict[str, typing.Any], start: int, depth: int, tid: int) -> None:
+		self.name = name
+		self.args = args
+		self.start = start
+		self.duration = None
+		self.childrenDuration = 0
+		self.memoryPeak = None
+		self.depth = depth
+		self.tid = tid
+
+	@property
+	def selfDuration(self) -> int:
+		return self.duration - self.childrenDuration
+
+	def __repr__(self):
+		return self.__class__.__name__ + "(" + ", ".join(repr(k) + "=" + repr(getattr(self, k)) for k in __class__.__slots__) + ")"  # pylint:disable=undefined-variable
+
+
+class _Frame:
+	__slots__ = ("span", "memoryAtStart", "memoryPeakSoFar")
+
+	def __init__(self, span: Span, memoryAtStart: int) -> None:
+		self.span = span
+		self.memoryAtStart = memoryAtStart
+		self.memoryPeakSoFar = memoryAtStart
+
+
+class Profiler:
+	"""Collects spans. If `traceMemory`, `tracemalloc` is running while the profiler is active and every span gets the peak of traced memory above the level at its start. This slows everything down several times, so the durations are not representative then."""
+
+	__slots__ = ("spans", "traceMemory", "origin", "stacks", "_startedTracemalloc")
+
+	def __init__(self, traceMemory: bool = False) -> None:
+		self.spans = []
+		self.traceMemory = traceMemory
+		self.origin = perf_counter_ns()
+		self.stacks = threading.local()
+		self._startedTracemalloc = False
+
+	def _getStack(self) -> typing.List[_Frame]:
+		stack = getattr(self.stacks, "stack", None)
+		if stack is None:
+			self.stacks.stack = stack = []
+		return stack
+
+	def start(self) -> None:
+		if self.traceMemory:
+			import tracemalloc
+
+			if not tracemalloc.is_tracing():
+				tracemalloc.start()
+				self._startedTracemalloc = True
+
+	def stop(self) -> None:
+		if self._startedTracemalloc:
+			import tracemalloc
+
+			tracemalloc.stop()
+			self._startedTracemalloc = False
+
+	@contextmanager
+	def span(self, name: str, **args: typing.Any) -> typing.Iterator[Span]:
+		stack = self._getStack()
+		s = Span(name, args, 0, len(stack), threading.get_ident())
+
+		if self.traceMemory:
+			import tracemalloc
+
+			current, peak = tracemalloc.get_traced_memory()
+			if stack:
+				parent = stack[-1]
+				parent.memoryPeakSoFar = max(parent.memoryPeakSoFar, peak)
+			tracemalloc.reset_peak()
+			frame = _Frame(s, current)
+		else:
+			frame = _Frame(s, 0)
+
+		stack.append(frame)
+		s.start = perf_counter_ns()
+		try:
+			yield s
+		finally:
+			s.duration = perf_counter_ns() - s.start
+			stack.pop()
+
+			if self.traceMemory:
+				peak = max(frame.memoryPeakSoFar, tracemalloc.get_traced_memory()[1])
+				s.memoryPeak = peak - frame.memoryAtStart
+				if stack:
+					stack[-1].memoryPeakSoFar = max(stack[-1].memoryPeakSoFar, peak)
+
+			if stack:
+				stack[-1].span.childrenDuration += s.duration
+			self.spans.append(s)
+
+	def toChromeTrace(self) -> typing.Dict[str, typing.Any]:
+		"""Trace Event Format, viewable in `chrome://tracing` or Perfetto UI"""
+		pid = os.getpid()
+		events = []
+		for s in sorted(self.spans, key=lambda s: (s.start, s.depth)):
+			args = {k: str(v) for k, v in s.args.items()}
+			if s.memoryPeak is not None:
+				args["memoryPeak"] = s.memoryPeak
+			events.append({"name": s.name, "cat": "UniGrammar", "ph": "X", "ts": (s.start - self.origin) / 1000, "dur": s.duration / 1000, "pid": pid, "tid": s.tid, "args": args})
+		return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+	def saveChromeTrace(self, path: Path) -> None:
+		Path(path).write_text(json.dumps(self.toChromeTrace()), encoding="utf-8")
+
+	def aggregate(self) -> typing.Dict[str, typing.Dict[str, typing.Union[int, None]]]:
+		"""`{phase name: {"count", "total", "self", "memoryPeak"}}`, times are in ns. Time of nested spans of the same phase is counted in `total` of each of them."""
+		res = {}
+		for s in self.spans:
+			a = res.get(s.name, None)
+			if a is None:
+				res[s.name] = a = {"count": 0, "total": 0, "self": 0, "memoryPeak": None}
+			a["count"] += 1
+			a["total"] += s.duration
+			a["self"] += s.selfDuration
+			if s.memoryPeak is not None:
+				a["memoryPeak"] = max(a["memoryPeak"] or 0, s.memoryPeak)
+		return res
+
+	def summary(self) -> str:
+		"""A table of phases sorted by self time"""
+		header = ("phase", "count", "total, ms", "self, ms", "self, %", "peak, KiB")
+		agg = self.aggregate()
+		allSelf = sum(a["self"] for a in agg.values()) or 1
+		rows = [header]
+		for name, a in sorted(agg.items(), key=lambda kv: kv[1]["self"], reverse=True):
+			rows.append((
+				name,
+				str(a["count"]),
+				format(a["total"] / 1e6, ".3f"),
+				format(a["self"] / 1e6, ".3f"),
+				format(100 * a["self"] / allSelf, ".1f"),
+				format(a["memoryPeak"] / 1024, ".1f") if a["memoryPeak"] is not None else "",
+			))
+
+		widths = [max(len(r[i]) for r in rows) for i in range(len(header))]
+		lines = []
+		for j, r in enumerate(rows):
+			lines.append("  ".join((c.ljust(w) if i == 0 else c.rjust(w)) for i, (c, w) in enumerate(zip(r, widths))))
+			if j == 0:
+				lines.append("  ".join("-" * w for w in widths))
+		return "\n".join(lines)
+
+
+@contextmanager
+def profile(traceMemory: bool = False) -> typing.Iterator[Profiler]:
+	"""Makes a new `Profiler` active for the duration of the block. Profilers can be nested, the innermost one gets the spans."""
+	global _activeProfiler  # pylint:disable=global-statement
+
+	p = Profiler(traceMemory)
+	previous = _activeProfiler
+	_activeProfiler = p
+	p.start()
+	try:
+		yield p
+	finally:
+		p.stop()
+		_activeProfiler = previous
+
+
+def span(name: str, **args: typing.Any) -> typing.ContextManager[typing.Optional[Span]]:
+	"""Marks a phase. A no-op if no profiler is active."""
+	p = _activeProfiler
+	if p is None:
+		return nullcontext()
+	return p.span(name, **args)
@@ -0,0 +1,288 @@
+"""Generates random texts matching a grammar, to get inputs of any size for benchmarking parsers.
+Termination is guaranteed by the minimal heights of derivations of rules, computed before generation: when the depth limit or the target size is reached, every `Alt` takes only its lowest alternatives, `Opt`s are skipped and `Iter`s repeat their minimal count, so every `Ref` leads to a lower rule. The target size is reached by repeating the outermost `Iter`, the nested ones repeat a random geometrically distributed count of times.
+A sample is generated in chunks written into a text sink as they fill, so samples of any size are generated in constant memory."""
+
+import io
+import math
+import random
+import string
+import typing
+from copy import deepcopy
+
+from .ast import Grammar
+from .ast.base import Group, Name, Node, Ref
+from .ast.characters import _CharClass
+from .ast.prods import BackRef, Prefer, UnCap
+from .ast.templates import TemplateInstantiation
+from .ast.tokens import Alt, Iter, Lit, Opt, Seq
+from .ast.transformations import getNames
+from .templater import expandTemplates
+
+sizeSuffixes = {"": 1, "k": 1 << 10, "m": 1 << 20, "g": 1 << 30}
+sizesDistributions = ("fixed", "uniform", "loguniform")
+
+negatedCharClassesAlphabet = string.digits + string.ascii_letters + string.punctuation + " \t\n"  # chars generated for negated char classes, the ones not matching the class
+
+
+def parseSize(s: typing.Union[str, int]) -> int:
+	"""`"64k"` -> `65536`"""
+	if isinstance(s, int):
+		return s
+	s = s.strip().lower()
+	if s.endswith("ib"):
+		s = s[:-2]
+	elif s.endswith("b"):
+		s = s[:-1]
+	suffix = s[-1:] if s[-1:] in sizeSuffixes else ""
+	return int(float(s[: len(s) - len(suffix)]) * sizeSuffixes[suffix])
+
+
+def drawTargetSize(rnd: random.Random, minSize: int, maxSize: int, distribution: str = "loguniform") -> int:
+	"""`loguniform` gives equal counts of samples to every order of magnitude, which is what measuring scaling needs"""
+	if distribution == "fixed" or minSize >= maxSize:
+		return minSize
+	if distribution == "uniform":
+		return rnd.randint(minSize, maxSize)
+	if distribution == "loguniform":
+		return int(round(math.exp(rnd.uniform(math.log(max(1, minSize)), math.log(maxSize)))))
+	raise ValueError("Unknown distribution of sizes", distribution, sizesDistributions)
+
+
+class _Sink:
+	__slots__ = ("out", "parts", "bufferedSize", "length", "chunkSize")
+
+	def __init__(self, out: typing.Any, chunkSize: int) -> None:
+		self.out = out
+		self.parts = []
+		self.bufferedSize = 0
+		self.length = 0
+		self.chunkSize = chunkSize
+
+	def append(self, s: str) -> None:
+		self.parts.append(s)
+		self.bufferedSize += len(s)
+		self.length += len(s)
+		if self.bufferedSize >= self.chunkSize:
+			self.flush()
+
+	def flush(self) -> None:
+		if self.parts:
+			self.out.write("".join(self.parts))
+			self.parts = []
+			self.bufferedSize = 0
+
+
+class SamplesGenerator:
+	"""`weights` maps names of rules which bodies are `Alt`s to the weights of their alternatives, the alternatives are equiprobable by default.
+	`iterContinueProbability` is the probability of one more repetition of a nested `Iter`, `optProbability` is the probability of generating the content of an `Opt`."""
+
+	__slots__ = ("grammar", "rules", "heights", "maxDepth", "iterContinueProbability", "optProbability", "altsWeights", "charClassesCache", "nodesHeights", "repeatable", "rnd", "sink", "target", "itersDepth")
+
+	def __init__(self, grammar: Grammar, maxDepth: int = 32, iterContinueProbability: float = 0.5, optProbability: float = 0.5, weights: typing.Optional[typing.Mapping[str, typing.Sequence[float]]] = None) -> None:
+		grammar = deepcopy(grammar)
+		expandTemplates(grammar, None, None, grammar)  # the templates expand into the same AST for all the backends
+		self.grammar = grammar
+		self.rules = {name: child for name, (child, parent) in getNames(grammar).items()}
+		self.maxDepth = maxDepth
+		self.iterContinueProbability = iterContinueProbability
+		self.optProbability = optProbability
+		self.charClassesCache = {}
+		self.nodesHeights = {}
+		self.heights = {}
+		self.computeHeights()
+		self.repeatable = set()
+		self.computeRepeatable()
+
+		self.altsWeights = {}
+		for ruleName, ruleWeights in (weights or {}).items():
+			body = self.getRule(ruleName)
+			while isinstance(body, (Prefer, Group)):
+				body = body.child
+			if not isinstance(body, Alt):
+				raise ValueError("Weights can be set only for rules which bodies are `alt`s", ruleName)
+			if len(ruleWeights) != len(body.children):
+				raise ValueError("Count of weights doesn't match the count of alternatives", ruleName, len(ruleWeights), len(body.children))
+			self.altsWeights[id(body)] = tuple(ruleWeights)
+
+		self.rnd = None
+		self.sink = None
+		self.target = 0
+		self.itersDepth = 0
+
+	def getRule(self, name: str) -> Node:
+		try:
+			return self.rules[name]
+		except KeyError:
+			raise ValueError("Reference to an undefined rule", name) from None
+
+	def computeHeights(self) -> None:
+		"""Least fixed point of minimal heights of derivation trees of rules. A rule which height stays infinite derives no finite text."""
+		ruleHeights = {name: math.inf for name in self.rules}
+
+		changed = True
+		while changed:
+			changed = False
+			for name, body in self.rules.items():
+				h = self._computeHeight(body, ruleHeights)
+				if h < ruleHeights[name]:
+					ruleHeights[name] = h
+					changed = True
+
+		self.heights = ruleHeights
+
+	def _computeHeight(self, node: Node, ruleHeights: typing.Mapping[str, float]) -> float:
+		if isinstance(node, Ref):
+			return 1 + ruleHeights[node.name] if node.name in ruleHeights else math.inf
+		if isinstance(node, (Lit, _CharClass)):
+			return 0
+		if isinstance(node, Seq):
+			return max((self._computeHeight(c, ruleHeights) for c in node.children), default=0)
+		if isinstance(node, Alt):
+			return min((self._computeHeight(c, ruleHeights) for c in node.children), default=math.inf)
+		if isinstance(node, Opt):
+			return 0
+		if isinstance(node, Iter):
+			return self._computeHeight(node.child, ruleHeights) if node.minCount else 0
+		if isinstance(node, (Name, UnCap, Prefer, Group)):
+			return self._computeHeight(node.child, ruleHeights)
+		raise NotImplementedError("Generating samples for this node is not implemented", node)
+
+	def computeRepeatable(self) -> None:
+		"""Names of rules from which an unbounded `Iter` can be reached. Until the outermost `Iter` is entered, the alternatives leading to one are preferred, otherwise a grammar which start rule is an `Alt` of a terminal and a collection would often give a sample of a single terminal."""
+		changed = True
+		while changed:
+			changed = False
+			for name, body in self.rules.items():
+				if name not in self.repeatable and self.canRepeat(body):
+					self.repeatable.add(name)
+					changed = True
+
+	def canRepeat(self, node: Node) -> bool:
+		if isinstance(node, Ref):
+			return node.name in self.repeatable
+		if isinstance(node, Iter):
+			return node.maxCount is None or self.canRepeat(node.child)
+		if isinstance(node, (Seq, Alt)):
+			return any(self.canRepeat(c) for c in node.children)
+		if isinstance(node, (Opt, Name, UnCap, Prefer, Group)):
+			return self.canRepeat(node.child)
+		return False
+
+	def getHeight(self, node: Node) -> float:
+		key = id(node)
+		res = self.nodesHeights.get(key, None)
+		if res is None:
+			res = self.nodesHeights[key] = self._computeHeight(node, self.heights)
+		return res
+
+	def getCharClassAlphabet(self, node: _CharClass) -> typing.Tuple[typing.Tuple[typing.Tuple[int, int], ...], int]:
+		"""Returns `((start, size) of every range, sum of sizes)`"""
+		key = id(node)
+		res = self.charClassesCache.get(key, None)
+		if res is None:
+			ranges = tuple((r.start, len(r)) for r in node.getRanges(self.grammar) if len(r))
+			if node.negative:
+				excluded = set()
+				for start, size in ranges:
+					excluded.update(range(start, start + size))
+				ranges = tuple((ord(c), 1) for c in negatedCharClassesAlphabet if ord(c) not in excluded)
+			if not ranges:
+				raise ValueError("A char class matches no chars to generate", node)
+			res = self.charClassesCache[key] = (ranges, sum(size for start, size in ranges))
+		return res
+
+	def genChar(self, node: _CharClass) -> str:
+		ranges, total = self.getCharClassAlphabet(node)
+		i = self.rnd.randrange(total)
+		for start, size in ranges:
+			if i < size:
+				return chr(start + i)
+			i -= size
+		raise AssertionError("Unreachable")
+
+	def isClosing(self, depth: int) -> bool:
+		return depth >= self.maxDepth or self.sink.length >= self.target
+
+	def gen(self, node: Node, depth: int) -> None:
+		if isinstance(node, Lit):
+			self.sink.append(node.value)
+		elif isinstance(node, _CharClass):
+			self.sink.append(self.genChar(node))
+		elif isinstance(node, Ref):
+			self.gen(self.getRule(node.name), depth + 1)
+		elif isinstance(node, Seq):
+			for c in node.children:
+				self.gen(c, depth)
+		elif isinstance(node, Alt):
+			self.gen(self.chooseAlternative(node, depth), depth)
+		elif isinstance(node, Opt):
+			if not self.isClosing(depth) and self.rnd.random() < self.optProbability:
+				self.gen(node.child, depth)
+		elif isinstance(node, Iter):
+			self.genIter(node, depth)
+		elif isinstance(node, BackRef):
+			raise NotImplementedError("Generating samples for back references is not implemented", node)
+		elif isinstance(node, (Name, UnCap, Prefer, Group)):
+			self.gen(node.child, depth)
+		elif isinstance(node, TemplateInstantiation):
+			raise ValueError("There must be no templates when generating samples. They must be already expanded")
+		else:
+			raise NotImplementedError("Generating samples for this node is not implemented", node)
+
+	def chooseAlternative(self, node: Alt, depth: int) -> Node:
+		heights = [self.getHeight(c) for c in node.children]
+		weights = self.altsWeights.get(id(node), None) or (1,) * len(node.children)
+		if self.isClosing(depth):
+			lowest = min(heights)
+			candidates = [(c, w or 1) for c, h, w in zip(node.children, heights, weights) if h == lowest]
+		else:
+			candidates = [(c, w) for c, h, w in zip(node.children, heights, weights) if h != math.inf and w > 0]
+			if self.itersDepth == 0:
+				candidates = [(c, w) for c, w in candidates if self.canRepeat(c)] or candidates
+		if not candidates:
+			raise ValueError("An alt has no alternatives deriving a finite text", node)
+		return self.rnd.choices([c for c, w in candidates], [w for c, w in candidates])[0]
+
+	def genIter(self, node: Iter, depth: int) -> None:
+		maxCount = node.maxCount
+		outermost = self.itersDepth == 0
+		self.itersDepth += 1
+		try:
+			i = 0
+			while maxCount is None or i < maxCount:
+				if i >= node.minCount:
+					if self.isClosing(depth):
+						break
+					if not outermost and self.rnd.random() >= self.iterContinueProbability:
+						break
+				lengthBefore = self.sink.length
+				self.gen(node.child, depth)
+				i += 1
+				if i >= node.minCount and self.sink.length == lengthBefore:
+					break  # an empty item, repeating it doesn't bring us closer to the target
+		finally:
+			self.itersDepth -= 1
+
+	def genSampleInto(self, out: typing.Any, targetSize: int, seed: typing.Any, startRule: typing.Optional[str] = None, chunkSize: int = 1 << 16) -> int:
+		"""Writes a sample of about `targetSize` chars (it can be larger by the size of closing the open constructs, or smaller if the grammar has no `Iter` to repeat) into `out` having `write` method. The sample is fully determined by `seed`. Returns its length."""
+		if startRule is None:
+			startRule = self.grammar.prods.findFirstRule().name
+		if self.heights.get(startRule, math.inf) == math.inf:
+			raise ValueError("The rule derives no finite text", startRule)
+
+		self.rnd = random.Random(seed)
+		self.sink = _Sink(out, chunkSize)
+		self.target = targetSize
+		self.itersDepth = 0
+		try:
+			self.gen(self.getRule(startRule), 0)
+			self.sink.flush()
+			return self.sink.length
+		finally:
+			self.rnd = None
+			self.sink = None
+
+	def genSample(self, targetSize: int, seed: typing.Any, startRule: typing.Optional[str] = None) -> str:
+		out = io.StringIO()
+		self.genSampleInto(out, targetSize, seed, startRule)
+		return out.getvalue()
@@ -7,6 +7,7 @@ from ..ast.tokens import Iter, Seq
 from ..backend.Generator import Generator, GeneratorContext
 from ..WrapperGen import ASTSelf, WrapperGen, WrapperGenContext, ast, astSelfArg, getProcessorFuncNameForARef, getReturnTypeForARef
 from ..WrapperGen.IterWrapperFuncGen import genIterateCollectionLoop, genProcessCollectionToList, genTypingIterable
+from ..WrapperGen.lazyBlocks import genProcessGeneratorLazy
 from ..WrapperGen.specificBlocks import genProcessorFuncCallForARef
 from . import Template
 
@@ -125,7 +126,10 @@ class Delimited(Template):
 			returns=returnType,
 			type_comment=None,
 		)
-		yield from genProcessCollectionToList(funcName=funcName, parentName=parentName, iterFuncName=iterFuncName, processorFuncCall=processorFuncCall, iterVarNode=iterVarNode, returnType=processorFuncRetType)
+		if ctx.lazyIters:
+			yield genProcessGeneratorLazy(funcName, iterFuncName, getProcessorFuncNameForARef(part.name, ctx), genTypingIterable(processorFuncRetType))
+		else:
+			yield from genProcessCollectionToList(funcName=funcName, parentName=parentName, iterFuncName=iterFuncName, processorFuncCall=processorFuncCall, iterVarNode=iterVarNode, returnType=processorFuncRetType)
 
 
 defaultTemplatesRegistry = {}
@@ -0,0 +1,142 @@
+"""A persistent store of results of running tests, so a sample is not parsed again by a backend if neither the sample nor the grammar transpiled for the backend nor the backend itself have changed.
+Results are keyed by `(hash of the transpiled grammar, backend name, backend version, hash of the sample)` and stored in an SQLite database in the cache dir. The backend version includes the versions of UniGrammar and of the runtime and the hash of the code compiling the grammar for the backend, so a change of the way a parser is built (i.e. choosing LALR or Earley) invalidates the results."""
+
+import sqlite3
+import sys
+import threading
+import typing
+from functools import lru_cache
+from importlib import import_module
+from pathlib import Path
+
+from .cache import getCacheDir, hashText
+
+testResultsCacheFormatVersion = 1
+
+
+def getDistributionVersion(name: str) -> str:
+	try:
+		from importlib.metadata import version
+
+		return version(name)
+	except Exception:  # pylint:disable=broad-except
+		return ""
+
+
+@lru_cache(maxsize=None)
+def _getPackagesDistributions() -> typing.Mapping[str, typing.List[str]]:
+	try:
+		from importlib.metadata import packages_distributions
+
+		return packages_distributions()
+	except Exception:  # pylint:disable=broad-except
+		return {}
+
+
+def getLibraryVersion(name: str) -> str:
+	"""Names of products often differ from the names of their distributions (`antlr4` is in `antlr4-python3-runtime`), so the name is also tried as a name of an importable package. `__version__` of the package is the last resort."""
+	res = getDistributionVersion(name)
+	if res:
+		return res
+
+	packagesDistributions = _getPackagesDistributions()
+	for packageName in (name, name.lower()):
+		for distributionName in packagesDistributions.get(packageName, ()):
+			res = getDistributionVersion(distributionName)
+			if res:
+				return res
+
+	for packageName in (name, name.lower()):
+		try:
+			res = getattr(import_module(packageName), "__version__", None)
+		except Exception:  # pylint:disable=broad-except
+			continue
+		if res:
+			return str(res)
+	return ""
+
+
+def hashModulesOf(*objs: typing.Any) -> str:
+	"""Hash of the sources of the modules in which `objs` are defined"""
+	parts = []
+	for obj in objs:
+		module = sys.modules.get(getattr(obj, "__module__", ""), None)
+		try:
+			parts.append(Path(module.__file__).read_bytes())
+		except (AttributeError, TypeError, OSError):
+			parts.append(repr(obj))
+	return hashText(*parts)[:16]
+
+
+def getBackendVersion(tool: typing.Any) -> str:
+	"""Versions of UniGrammar, of the parser generator and of the runtime wrapping it, and the hash of the code of the runner and the compiler. A result obtained with another version of any of them is not trusted."""
+	runner = tool.RUNNER
+	parts = [getDistributionVersion("UniGrammar"), getDistributionVersion("UniGrammarRuntime")]
+	parserFactory = getattr(runner, "PARSER", None)
+	if parserFactory is not None:
+		parts.append(getLibraryVersion(parserFactory.META.product.name))
+	parts.append(hashModulesOf(runner, getattr(runner, "COMPILER", None)))
+	return "/".join(parts)
+
+
+class CachedTestResult:
+	__slots__ = ("ok", "error")
+
+	def __init__(self, ok: bool, error: typing.Optional[str] = None) -> None:
+		self.ok = ok
+		self.error = error
+
+	def __repr__(self):
+		return self.__class__.__name__ + "(" + ", ".join(repr(k) + "=" + repr(getattr(self, k)) for k in __class__.__slots__) + ")"  # pylint:disable=undefined-variable
+
+
+class TestResultsCache:
+	"""Both passed and failed tests are stored: a failure is as reproducible as a success and is reported again without reparsing."""
+
+	__slots__ = ("path", "db", "lock")
+
+	def __init__(self, path: typing.Optional[Path] = None) -> None:
+		if path is None:
+			path = getCacheDir("testResults.sqlite")
+		self.path = Path(path)
+		self.db = None
+		self.lock = threading.Lock()
+
+	def __enter__(self) -> "TestResultsCache":
+		self.open()
+		return self
+
+	def __exit__(self, *args) -> None:
+		self.close()
+
+	def open(self) -> None:
+		self.path.parent.mkdir(parents=True, exist_ok=True)
+		self.db = sqlite3.connect(str(self.path), timeout=60, check_same_thread=False)
+		self.db.execute("PRAGMA journal_mode=WAL")  # concurrent `UniGrammar test` runs don't block each other's reads
+		self.db.execute("CREATE TABLE IF NOT EXISTS results (grammar TEXT NOT NULL, backend TEXT NOT NULL, backendVersion TEXT NOT NULL, sample TEXT NOT NULL, ok INTEGER NOT NULL, error TEXT, PRIMARY KEY (grammar, backend, backendVersion, sample)) WITHOUT ROWID")
+		self.db.commit()
+
+	def close(self) -> None:
+		if self.db is not None:
+			self.db.close()
+			self.db = None
+
+	@staticmethod
+	def hashGrammar(transpiledText: str) -> str:
+		return hashText(str(testResultsCacheFormatVersion), transpiledText)
+
+	@staticmethod
+	def hashSample(sample: typing.Union[str, bytes]) -> str:
+		return hashText(sample)
+
+	def getMany(self, grammarHash: str, backend: str, backendVersion: str) -> typing.Dict[str, CachedTestResult]:
+		"""All the stored results for a grammar transpiled for a backend, `{sample hash: result}`"""
+		with self.lock:
+			rows = self.db.execute("SELECT sample, ok, error FROM results WHERE grammar = ? AND backend = ? AND backendVersion = ?", (grammarHash, backend, backendVersion)).fetchall()
+		return {sample: CachedTestResult(bool(ok), error) for sample, ok, error in rows}
+
+	def putMany(self, grammarHash: str, backend: str, backendVersion: str, results: typing.Iterable[typing.Tuple[str, CachedTestResult]]) -> None:
+		"""`results` are `(sample hash, result)` pairs. Stored in one transaction."""
+		rows = [(grammarHash, backend, backendVersion, sampleHash, int(r.ok), r.error) for sampleHash, r in results]
+		with self.lock, self.db:
+			self.db.executemany("INSERT OR REPLACE INTO results (grammar, backend, backendVersion, sample, ok, error) VALUES (?, ?, ?, ?, ?, ?)", rows)
@@ -12,6 +12,7 @@ from ..core.ast.base import Name, Node, Ref
 from ..core.ast.characters import CharClass, CharClassUnion, CharRange, WellKnownChars
 from ..core.ast.prods import Cap, Prefer
 from ..core.ast.tokens import Alt, Iter, Lit, Opt, Seq
+from ..core.profiling import span
 from ..core.testing import AggregateTestingSpec, TestingSpec, TestingSpecLines, TestingSpecModel, testingSpecModelsSelector
 from .decodeExtension import detectFormatFromFileExtension
 from .sections import *
@@ -31,11 +32,13 @@ def deriveGrammarIdFromFilesNames(fileName: Path) -> str:
 
 
 def parseUniGrammarFile(fileName: Path, grammarDefaultId: str = None) -> Grammar:
-	underlyingParser, isBinary, isTest = detectFormatFromFileExtension(fileName.suffix)
-	if isBinary:
-		data = fileName.read_bytes()
-	else:
-		data = fileName.read_text(encoding="utf-8")
+	with span("detectFormatFromFileExtension"):
+		underlyingParser, isBinary, isTest = detectFormatFromFileExtension(fileName.suffix)
+	with span("read"):
+		if isBinary:
+			data = fileName.read_bytes()
+		else:
+			data = fileName.read_text(encoding="utf-8")
 
 	# pylint: disable=no-else-return
 	if not isTest:
@@ -47,7 +50,10 @@ def parseUniGrammarFile(fileName: Path, grammarDefaultId: str = None) -> Grammar
 
 
 def parseUniGrammarData(data: [bytes, str], underlyingParser: typing.Callable, grammarDefaultId: str) -> Grammar:
-	return parseUniGrammar(underlyingParser.process(data), grammarDefaultId)
+	with span("decode"):
+		dic = underlyingParser.process(data)
+	with span("parseUniGrammar"):
+		return parseUniGrammar(dic, grammarDefaultId)
 
 
 def parseUniGrammarTestData(data: [bytes, str], underlyingParser: typing.Callable):
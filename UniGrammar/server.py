@@ -0,0 +1,131 @@
+"""`serve` command: a `Session` answering requests sent over a Unix socket or a localhost TCP port.
+
+The protocol is JSON Lines: a request is a line with an object `{"id": <anything>, "command": ..., "files": [...], "backends": "...", "options": {...}}` (see `Session.execute`), the response is a line `{"id": <the same>, "ok": true, "result": ...}` or `{"id": ..., "ok": false, "error": "..."}`. Requests within a connection are answered in order, connections are served concurrently. Requests to a TCP server must also contain `"token": <the token from the token file>`."""
+
+import hmac
+import json
+import os
+import secrets
+import socketserver
+import threading
+import typing
+from pathlib import Path
+
+from .core.cache import atomicWriteText, getCacheDir
+from .session import Session, parseJobLine
+
+maxRequestSize = 1 << 20
+
+
+def getDefaultServerSocketPath() -> Path:
+	return getCacheDir() / "serve.sock"
+
+
+def getDefaultServerTokenPath() -> Path:
+	return getCacheDir() / "serve.token"
+
+
+def generateServerToken(tokenPath: Path) -> str:
+	"""Generates a token and writes it into a file readable only by the owner"""
+	token = secrets.token_hex(32)
+	atomicWriteText(Path(tokenPath), token)  # a temporary file is created with 0o600 mode and is renamed
+	return token
+
+
+class _JSONLinesRequestHandler(socketserver.StreamRequestHandler):
+	def handle(self) -> None:
+		while True:
+			line = self.rfile.readline(maxRequestSize + 1)
+			if not line:
+				return
+			if len(line) > maxRequestSize:
+				self.respond({"id": None, "ok": False, "error": "Request is too large"})
+				return
+			if not line.strip():
+				continue
+			self.respond(self.server.processLine(line))
+
+	def respond(self, response: typing.Mapping[str, typing.Any]) -> None:
+		self.wfile.write((json.dumps(response, default=repr) + "\n").encode("utf-8"))
+		self.wfile.flush()
+
+
+class _JSONLinesServerMixin:
+	"""At most `maxConcurrent` requests are executed at once, the rest wait. `stats` requests are answered without waiting. If `token` is not `None`, requests not containing it are rejected."""
+
+	daemon_threads = True
+
+	def initSession(self, session: Session, maxConcurrent: int, token: typing.Optional[str] = None) -> None:
+		self.session = session
+		self.token = token
+		self.maxConcurrent = maxConcurrent
+		self.limiter = threading.BoundedSemaphore(maxConcurrent)
+		self.countersLock = threading.Lock()
+		self.inFlight = 0
+		self.waiting = 0
+
+	def getStats(self) -> typing.Dict[str, typing.Any]:
+		res = self.session.getStats()
+		with self.countersLock:
+			res["server"] = {"inFlight": self.inFlight, "waiting": self.waiting, "maxConcurrent": self.maxConcurrent}
+		return res
+
+	def processLine(self, line: bytes) -> typing.Dict[str, typing.Any]:
+		try:
+			request = parseJobLine(line)
+		except ValueError as ex:
+			return {"id": None, "ok": False, "error": "Malformed request: " + str(ex)}
+
+		requestId = request.get("id", None)
+		if self.token is not None and not hmac.compare_digest(str(request.get("token", "")).encode("utf-8"), self.token.encode("utf-8")):
+			return {"id": requestId, "ok": False, "error": "Invalid token"}
+
+		if request.get("command", None) == "stats":
+			self.session.countRequest("stats")
+			return {"id": requestId, "ok": True, "result": self.getStats()}
+
+		with self.countersLock:
+			self.waiting += 1
+		with self.limiter:
+			with self.countersLock:
+				self.waiting -= 1
+				self.inFlight += 1
+			try:
+				return self.session.respond(request)
+			finally:
+				with self.countersLock:
+					self.inFlight -= 1
+
+
+class UnixJSONLinesServer(_JSONLinesServerMixin, socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+	"""The socket is accessible only to its owner, since the requests can make the server write files"""
+
+	def __init__(self, socketPath: Path, session: Session, maxConcurrent: int) -> None:
+		self.initSession(session, maxConcurrent)
+		self.socketPath = Path(socketPath)
+		self.socketPath.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+		if self.socketPath.is_socket():
+			self.socketPath.unlink()
+
+		oldUmask = os.umask(0o177)
+		try:
+			super().__init__(str(self.socketPath), _JSONLinesRequestHandler)
+		finally:
+			os.umask(oldUmask)
+
+	def server_close(self) -> None:
+		super().server_close()
+		try:
+			self.socketPath.unlink()
+		except FileNotFoundError:
+			pass
+
+
+class TCPJSONLinesServer(_JSONLinesServerMixin, socketserver.ThreadingMixIn, socketserver.TCPServer):
+	"""Listens only on the loopback interface, but any local user can connect, so the requests are authenticated by `token`"""
+
+	allow_reuse_address = True
+
+	def __init__(self, port: int, session: Session, maxConcurrent: int, token: str) -> None:
+		self.initSession(session, maxConcurrent, token)
+		super().__init__(("127.0.0.1", port), _JSONLinesRequestHandler)
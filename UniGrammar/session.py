@@ -0,0 +1,236 @@
+"""A long-lived context for processing many requests in one process: keeps parsed grammars, transpiled grammars and compiled parsers in memory, so repeated requests about the same grammars are answered without redoing the work. Used by `serve` and `batch` commands."""
+
+import json
+import threading
+import typing
+from collections import OrderedDict
+from copy import deepcopy
+from pathlib import Path
+
+from . import getTranspiledFilePath, transpile
+from .core.ast import Grammar
+from .core.backend.Generator import Generator, TranspiledResult
+from .core.backend.Runner import NotYetImplementedRunner
+from .core.bundleManifest import hashSourceFile
+from .core.cache import hashText
+from .core.outputFiles import WriteStats, writeTextIfChanged
+from .ownGrammarFormat import parseUniGrammarFile
+from .toolsRegistry import createGeneratorsToToolsMapping, parsersFactoriesAndCompilersPool, parseToolsStrings, runnersPool
+
+sectionsNames = ("chars", "keywords", "tokens", "fragmented", "prods")
+
+
+class LRUCache:
+	"""A thread-safe mapping keeping `maxSize` most recently used items. `getOrCreate` may call the factory for the same key concurrently, the first stored result wins."""
+
+	__slots__ = ("maxSize", "items", "lock", "hits", "misses")
+
+	def __init__(self, maxSize: int = 128) -> None:
+		self.maxSize = maxSize
+		self.items = OrderedDict()
+		self.lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+
+	def getOrCreate(self, key: typing.Hashable, factory: typing.Callable[[], typing.Any]) -> typing.Any:
+		with self.lock:
+			if key in self.items:
+				self.items.move_to_end(key)
+				self.hits += 1
+				return self.items[key]
+			self.misses += 1
+
+		value = factory()
+
+		with self.lock:
+			if key in self.items:
+				return self.items[key]
+			self.items[key] = value
+			while len(self.items) > self.maxSize:
+				self.items.popitem(last=False)
+		return value
+
+	def stats(self) -> typing.Dict[str, int]:
+		return {"size": len(self.items), "maxSize": self.maxSize, "hits": self.hits, "misses": self.misses}
+
+
+class SessionError(ValueError):
+	"""A request is malformed"""
+
+
+class SerializedParser:
+	"""Parsers of backends are not known to be thread-safe, so the calls of a parser shared between threads are serialized"""
+
+	__slots__ = ("parser", "lock")
+
+	def __init__(self, parser: typing.Callable[[str], typing.Any]) -> None:
+		self.parser = parser
+		self.lock = threading.Lock()
+
+	def __call__(self, text: str) -> typing.Any:
+		with self.lock:
+			return self.parser(text)
+
+
+class Session:
+	"""Caches are keyed by content hashes, so a grammar file changed on disk is reparsed. The results are plain JSON-serializable structures. If `outputRoot` is given, output dirs of requests are resolved against it and cannot be outside of it."""
+
+	__slots__ = ("grammars", "transpiled", "parsers", "stats", "statsLock", "outputRoot")
+
+	def __init__(self, cacheSize: int = 128, outputRoot: typing.Optional[Path] = None) -> None:
+		self.grammars = LRUCache(cacheSize)
+		self.transpiled = LRUCache(cacheSize)
+		self.parsers = LRUCache(cacheSize)
+		self.stats = {}
+		self.statsLock = threading.Lock()
+		self.outputRoot = Path(outputRoot).resolve() if outputRoot is not None else None
+
+	def countRequest(self, command: str) -> None:
+		with self.statsLock:
+			self.stats[command] = self.stats.get(command, 0) + 1
+
+	def getGrammar(self, file: Path) -> typing.Tuple[str, Grammar]:
+		"""Returns `(hash of the source, grammar)`. The grammar is shared, it must be copied before being modified."""
+		file = Path(file).absolute()
+		sourceHash = hashSourceFile(file)
+		return sourceHash, self.grammars.getOrCreate((str(file), sourceHash), lambda: parseUniGrammarFile(file))
+
+	def getTranspiled(self, file: Path, generator: Generator) -> TranspiledResult:
+		sourceHash, grammar = self.getGrammar(file)
+		return self.transpiled.getOrCreate((str(Path(file).absolute()), sourceHash, generator), lambda: transpile(deepcopy(grammar), generator))
+
+	def getParser(self, runnerCls: type, transpiledText: str) -> SerializedParser:
+		def compileParser():
+			runner = runnersPool(runnerCls)
+			compiled = parsersFactoriesAndCompilersPool(runner.COMPILER).compileStr(transpiledText, "python")
+			return SerializedParser(parsersFactoriesAndCompilersPool(runner.PARSER).fromInternal(compiled))
+
+		return self.parsers.getOrCreate((runnerCls, hashText(transpiledText)), compileParser)
+
+	def resolveOutputDir(self, outputDir: typing.Union[Path, str]) -> Path:
+		if self.outputRoot is None:
+			return Path(outputDir)
+		res = (self.outputRoot / outputDir).resolve()
+		if res != self.outputRoot and self.outputRoot not in res.parents:
+			raise SessionError("The output dir is outside of the output root", str(outputDir))
+		return res
+
+	def transpileFiles(self, files: typing.Iterable[Path], backends: str = "all", outputDir: typing.Optional[Path] = None) -> typing.Dict[str, typing.Any]:
+		"""Without `outputDir` returns the transpiled grammars: `{file: {generator name: text}}`. With it the grammars are saved there and only the counts of written and unchanged files are returned."""
+		generators = createGeneratorsToToolsMapping(parseToolsStrings(backends))
+		res = {}
+		stats = WriteStats()
+		for file in files:
+			fileRes = res[str(file)] = {}
+			for generator in generators:
+				transpiled = self.getTranspiled(file, generator)
+				if outputDir is None:
+					fileRes[generator.__name__] = transpiled.text
+				else:
+					stats.register(writeTextIfChanged(getTranspiledFilePath(Path(outputDir), transpiled.id, generator), transpiled.text))
+
+		if outputDir is not None:
+			return {"written": stats.written, "unchanged": stats.skipped}
+		return res
+
+	def iterTestResults(self, files: typing.Iterable[Path], backends: str = "all") -> typing.Iterator[typing.Dict[str, typing.Any]]:
+		"""Yields a result for every (file, backend, test)"""
+		generatorsToTools = createGeneratorsToToolsMapping(parseToolsStrings(backends))
+		for file in files:
+			file = Path(file)
+			sourceHash, grammar = self.getGrammar(file)
+			tests = tuple(grammar.tests.getTests(file.absolute().parent)) if grammar.tests else ()
+			for generator, tools in generatorsToTools.items():
+				transpiled = self.getTranspiled(file, generator)
+				for tool in tools:
+					base = {"file": str(file), "backend": tool.__name__}
+					if tool.RUNNER is None or issubclass(tool.RUNNER, NotYetImplementedRunner):
+						yield dict(base, error="Runner is not yet implemented")
+						continue
+					try:
+						parser = self.getParser(tool.RUNNER, transpiled.text)
+					except Exception as ex:  # pylint:disable=broad-except
+						yield dict(base, error="Compilation has failed: " + repr(ex))
+						continue
+					for i, test in enumerate(tests):
+						try:
+							parser(test)
+						except Exception as ex:  # pylint:disable=broad-except
+							yield dict(base, test=i, ok=False, error=str(ex))
+						else:
+							yield dict(base, test=i, ok=True)
+
+	def testFiles(self, files: typing.Iterable[Path], backends: str = "all") -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+		"""`{file: {backend: {"passed": count, "failed": [{"test": index, "error": message}], "error": message}}}`"""
+		res = {}
+		for r in self.iterTestResults(files, backends):
+			backendRes = res.setdefault(r["file"], {}).setdefault(r["backend"], {"passed": 0, "failed": []})
+			if "test" not in r:
+				backendRes["error"] = r["error"]
+			elif r["ok"]:
+				backendRes["passed"] += 1
+			else:
+				backendRes["failed"].append({"test": r["test"], "error": r["error"]})
+		return res
+
+	def analyzeFiles(self, files: typing.Iterable[Path]) -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+		"""Counts of rules in sections and the schemas of parse results the wrapper would produce"""
+		from .core.WrapperGen import WrapperGen
+
+		res = {}
+		for file in files:
+			file = Path(file)
+			sourceHash, grammar = self.getGrammar(file)
+			sourceAST, capSchema, iterSchema = WrapperGen.transpile(deepcopy(grammar))
+			sections = {}
+			for secName in sectionsNames:
+				sec = getattr(grammar, secName, None)
+				sections[secName] = len(sec.children) if sec else 0
+			res[str(file)] = {
+				"id": grammar.meta.id,
+				"sourceHash": sourceHash,
+				"sections": sections,
+				"capSchema": json.loads(json.dumps(capSchema, default=repr)),
+				"iterSchema": sorted(iterSchema),
+			}
+		return res
+
+	def getStats(self) -> typing.Dict[str, typing.Any]:
+		with self.statsLock:
+			requests = dict(self.stats)
+		return {"requests": requests, "caches": {"grammars": self.grammars.stats(), "transpiled": self.transpiled.stats(), "parsers": self.parsers.stats()}}
+
+	def execute(self, job: typing.Mapping[str, typing.Any]) -> typing.Any:
+		"""Executes a job `{"command": "transpile" | "test" | "analyze" | "stats", "files": [...], "backends": "...", "options": {...}}` and returns its result"""
+		command = job.get("command", None)
+		files = [Path(f) for f in job.get("files", ())]
+		backends = job.get("backends", "all")
+		options = job.get("options", None) or {}
+		self.countRequest(str(command))
+
+		if command == "transpile":
+			outputDir = options.get("outputDir", None)
+			return self.transpileFiles(files, backends, self.resolveOutputDir(outputDir) if outputDir is not None else None)
+		if command == "test":
+			return self.testFiles(files, backends)
+		if command == "analyze":
+			return self.analyzeFiles(files)
+		if command == "stats":
+			return self.getStats()
+		raise SessionError("Unknown command", command)
+
+	def respond(self, job: typing.Mapping[str, typing.Any]) -> typing.Dict[str, typing.Any]:
+		"""Executes a job and wraps its result or error into `{"id": <id of the job>, "ok": true, "result": ...}` or `{"id": ..., "ok": false, "error": ...}`"""
+		jobId = job.get("id", None)
+		try:
+			return {"id": jobId, "ok": True, "result": self.execute(job)}
+		except Exception as ex:  # pylint:disable=broad-except
+			return {"id": jobId, "ok": False, "error": repr(ex)}
+
+
+def parseJobLine(line: typing.Union[str, bytes]) -> typing.Dict[str, typing.Any]:
+	"""Raises `ValueError` if the line is not a JSON object"""
+	job = json.loads(line)
+	if not isinstance(job, dict):
+		raise ValueError("A job must be an object")
+	return job
@@ -21,17 +21,62 @@ from ...core.backend.Runner import Runner
 from ...core.backend.SectionedGenerator import SectionedGenerator, Sectioner
 from ...core.backend.Tool import Tool
 from ...core.CharClassProcessor import CharClassKeepProcessor
+from ...core.compilationCache import CompilationCache
+from .antlrService import ANTLRCompileClient, getServiceSocketPath
 
 ourCharClassEscaper = CompositeEscaper(commonEscaper, closingSquareBracketEscaper)
 ourStringEscaper = CompositeEscaper(commonEscaper, singleTickEscaper)
 
 
+def _getANTLRCompileVersion() -> str:
+	try:
+		from importlib.metadata import version
+
+		return version("antlrCompile")
+	except Exception:  # pylint:disable=broad-except
+		return ""
+
+
 class ANTLR(ANTLRCompileANTLR):
+	"""Compilation results are cached by the hash of the grammar text. Cache misses are compiled by `antlr-service` if it runs, otherwise in this process."""
+
 	__slots__ = ()
 
-	def compileStr(self, grammarText: str, target: str = "python", fileName: typing.Optional[typing.Union[Path, str]] = None):
+	CACHE = CompilationCache("ANTLR", _getANTLRCompileVersion())
+
+	def compileStrLocal(self, grammarText: str, target: str = "python", fileName: typing.Optional[typing.Union[Path, str]] = None):
 		return super().compileStr(grammarText, languagesRemap[target], fileName)
 
+	def compileStr(self, grammarText: str, target: str = "python", fileName: typing.Optional[typing.Union[Path, str]] = None):
+		return self.compileMany(((grammarText, target, fileName),))[0]
+
+	def compileMany(self, requests: typing.Iterable[typing.Tuple[str, str, typing.Optional[typing.Union[Path, str]]]]) -> typing.List[typing.Any]:
+		"""Compiles `(grammarText, target, fileName)` triples, the misses of the cache are sent to the service in a single batch. The ones the service cannot send back, since their results are unpicklable, are compiled in this process."""
+		requests = tuple(requests)
+		res = [None] * len(requests)
+		keys = [self.CACHE.getKey(g, t, str(fn)) for g, t, fn in requests]
+		missing = []
+		for i, k in enumerate(keys):
+			res[i] = self.CACHE.get(k)
+			if res[i] is None:
+				missing.append(i)
+
+		if missing:
+			compiled = None
+			socketPath = getServiceSocketPath()
+			if socketPath is not None:
+				compiled = ANTLRCompileClient(socketPath).tryCompileMany([requests[i] for i in missing])
+			if compiled is None:
+				compiled = [None] * len(missing)
+
+			for i, r in zip(missing, compiled):
+				if r is None:
+					r = self.compileStrLocal(*requests[i])
+				self.CACHE.put(keys[i], r)
+				res[i] = r
+
+		return res
+
 
 class ANTLRGenerator(SectionedGenerator):
 	charClassEscaper = ourCharClassEscaper
@@ -0,0 +1,150 @@
+"""A long-lived process keeping ANTLR loaded into a JVM and compiling grammars sent to it over a Unix socket, so that UniGrammar processes compiling ANTLR grammars don't pay for the JVM startup and the ANTLR tool class loading each time.
+
+Messages in both directions are pickles prefixed with their length. A request is a list of `(grammarText, target, fileName)` triples, a response is a list of `(status, payload)` pairs in the same order: `(compiledStatus, compilation result)`, `(failedStatus, error message)` if ANTLR has rejected the grammar, or `(unpicklableStatus, error message)` if the grammar has been compiled, but the result cannot be sent back. Since pickles are exchanged, the socket is made accessible only to its owner."""
+
+import os
+import pickle
+import socket
+import socketserver
+import struct
+import threading
+import typing
+from pathlib import Path
+
+from ...core.cache import getCacheDir
+
+antlrServiceSocketEnvVarName = "UNIGRAMMAR_ANTLR_SERVICE"
+
+_lengthStruct = struct.Struct("!Q")
+
+CompilationRequest = typing.Tuple[str, str, typing.Optional[str]]
+
+# `unpicklableStatus` is falsy, so clients not knowing it report it as a failure instead of taking the message for a result
+compiledStatus = True
+failedStatus = False
+unpicklableStatus = None
+
+
+class ANTLRCompileServiceError(Exception):
+	"""ANTLR in the service has failed to compile a grammar"""
+
+
+def getDefaultSocketPath() -> Path:
+	return getCacheDir("ANTLR") / "service.sock"
+
+
+def getServiceSocketPath() -> typing.Optional[Path]:
+	"""The socket set in `UNIGRAMMAR_ANTLR_SERVICE` env var, otherwise the default one if it exists. `None` if no service is expected to run."""
+	p = os.environ.get(antlrServiceSocketEnvVarName, None)
+	if p:
+		return Path(p)
+	p = getDefaultSocketPath()
+	if p.is_socket():
+		return p
+	return None
+
+
+def _sendMessage(sock: socket.socket, obj: typing.Any) -> None:
+	data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+	sock.sendall(_lengthStruct.pack(len(data)) + data)
+
+
+def _recvMessage(f: typing.BinaryIO) -> typing.Any:
+	"""Returns `None` on EOF before a message"""
+	header = f.read(_lengthStruct.size)
+	if not header:
+		return None
+	if len(header) != _lengthStruct.size:
+		raise EOFError("Truncated message header")
+	size, = _lengthStruct.unpack(header)
+	data = f.read(size)
+	if len(data) != size:
+		raise EOFError("Truncated message")
+	return pickle.loads(data)
+
+
+class ANTLRCompileClient:
+	__slots__ = ("socketPath", "timeout")
+
+	def __init__(self, socketPath: Path, timeout: typing.Optional[float] = None) -> None:
+		self.socketPath = socketPath
+		self.timeout = timeout
+
+	def compileMany(self, requests: typing.Sequence[CompilationRequest]) -> typing.List[typing.Optional[typing.Any]]:
+		"""Sends all the requests in one batch. Raises `OSError` if there is no service listening and `ANTLRCompileServiceError` if a grammar has failed to compile. The results the service cannot send back are `None`, the caller has to compile these grammars itself."""
+		with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+			sock.settimeout(self.timeout)
+			sock.connect(str(self.socketPath))
+			_sendMessage(sock, [(g, t, (str(fn) if fn is not None else None)) for g, t, fn in requests])
+			sock.shutdown(socket.SHUT_WR)
+			with sock.makefile("rb") as f:
+				response = _recvMessage(f)
+
+		if response is None:
+			raise EOFError("The service has closed the connection without responding")
+
+		res = []
+		for status, r in response:
+			if status is compiledStatus:
+				res.append(r)
+			elif status is unpicklableStatus:
+				res.append(None)
+			else:
+				raise ANTLRCompileServiceError(r)
+		return res
+
+	def tryCompileMany(self, requests: typing.Sequence[CompilationRequest]) -> typing.Optional[typing.List[typing.Optional[typing.Any]]]:
+		"""Like `compileMany`, but returns `None` if the service is unreachable (i.e. a stale socket), so the caller can compile itself"""
+		try:
+			return self.compileMany(requests)
+		except (OSError, EOFError):
+			return None
+
+
+class _ANTLRCompileRequestHandler(socketserver.StreamRequestHandler):
+	def handle(self) -> None:
+		while True:
+			requests = _recvMessage(self.rfile)
+			if requests is None:
+				return
+			_sendMessage(self.connection, [self.server.compileOne(*r) for r in requests])
+
+
+class ANTLRCompileService(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+	"""`compiler` must have `compileStrLocal` method, compiling in this process. Connections are served in threads, but compilations are serialized, since there is a single ANTLR tool instance."""
+
+	daemon_threads = True
+
+	def __init__(self, socketPath: Path, compiler: typing.Any) -> None:
+		self.compiler = compiler
+		self.compilationLock = threading.Lock()
+		self.socketPath = Path(socketPath)
+		self.socketPath.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+		if self.socketPath.is_socket():
+			self.socketPath.unlink()  # stale one from a killed service, a running one would have been reused by the clients
+
+		oldUmask = os.umask(0o177)
+		try:
+			super().__init__(str(self.socketPath), _ANTLRCompileRequestHandler)
+		finally:
+			os.umask(oldUmask)
+
+	def compileOne(self, grammarText: str, target: str, fileName: typing.Optional[str]) -> typing.Tuple[typing.Optional[bool], typing.Any]:
+		try:
+			with self.compilationLock:
+				res = self.compiler.compileStrLocal(grammarText, target, fileName)
+		except Exception as ex:  # pylint:disable=broad-except
+			return failedStatus, repr(ex)
+
+		try:
+			pickle.dumps(res, protocol=pickle.HIGHEST_PROTOCOL)
+		except Exception as ex:  # pylint:disable=broad-except
+			return unpicklableStatus, repr(ex)
+		return compiledStatus, res
+
+	def server_close(self) -> None:
+		super().server_close()
+		try:
+			self.socketPath.unlink()
+		except FileNotFoundError:
+			pass
@@ -1,4 +1,8 @@
+import os
+import shutil
+import threading
 import typing
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from escapelib import CompositeEscaper, backslashUHexEscaper, closingSquareBracketEscaper, commonCharsEscaper
@@ -14,24 +18,39 @@ from ...core.backend.Generator import TranspiledResult
 from ...core.backend.Runner import NotYetImplementedRunner, Runner
 from ...core.backend.SectionedGenerator import SectionedGenerator
 from ...core.backend.Tool import Tool
+from ...core.cache import getCacheDir, hashText
 from ...core.CharClassProcessor import CharClassMergeProcessor
 
 charClassEscaper = CompositeEscaper(commonCharsEscaper, closingSquareBracketEscaper, backslashUHexEscaper)
 
 
+def getWaxeyeVersionSalt(waxeyePath: Path) -> str:
+	"""Waxeye has no machine-readable version, so it is identified by the hash of its executable"""
+	try:
+		return hashText(waxeyePath.resolve().read_bytes())
+	except OSError:
+		return ""
+
+
 class WaxeyeRunner(Runner):
-	__slots__ = ("waxeye", "MempipedPathRead")
+	"""Waxeye takes a single grammar per invocation, so `saveCompiled` only queues the grammars and `flush` runs Waxeye for them concurrently. The outputs are cached outside of the bundle in `<cache dir>/compiled/waxeye/<hash of the grammar, options and Waxeye executable>` dirs, from which they are copied into the bundle."""
+
+	__slots__ = ("waxeye", "MempipedPathRead", "pending", "versionSalt")
 
 	COMPILER = DummyCompiler
 	PARSER = WaxeyeParserFactory
 
+	waxeyePath = Path("./bin/waxeye")
+
 	def __init__(self):
 		import sh
 		from MempipedPath import MempipedPathRead
 
 		self.MempipedPathRead = MempipedPathRead
 
-		self.waxeye = sh.Command("./bin/waxeye").bake(_fg=True)
+		self.waxeye = sh.Command(str(self.__class__.waxeyePath))
+		self.versionSalt = getWaxeyeVersionSalt(self.__class__.waxeyePath)
+		self.pending = []
 
 	# ToDO: -i : Interpret, -t <test> : Test
 
@@ -43,9 +62,45 @@ class WaxeyeRunner(Runner):
 			#"--debug"
 			self.waxeye("-n", nameSpace, "-p", nameSpace, "-g", language, outDir, f)
 
+	def _generateCached(self, internalRepr, nameSpace: str, language: str, cacheEntryDir: Path):
+		"""Generates into a temporary dir renamed into `cacheEntryDir` when complete, so an interrupted generation doesn't leave a valid-looking cache entry"""
+		tmpDir = cacheEntryDir.parent / (cacheEntryDir.name + "." + str(os.getpid()) + "." + str(threading.get_ident()) + ".tmp")
+		try:
+			self._waxeyeGenerate(internalRepr, nameSpace, language, tmpDir)
+			try:
+				tmpDir.rename(cacheEntryDir)
+			except OSError:
+				if not cacheEntryDir.is_dir():  # otherwise another process has generated the same
+					raise
+		finally:
+			shutil.rmtree(tmpDir, ignore_errors=True)
+
 	def saveCompiled(self, internalRepr, grammarResources: InMemoryGrammarResources, meta: ToolMetadata, target: str = "python"):
 		parentDir = grammarResources.parent.bundleDir / "compiled" / meta.product.name
-		self._waxeyeGenerate(internalRepr, grammarResources.name, "python", parentDir)
+		language = "python"
+		cacheEntryDir = getCacheDir("compiled", meta.product.name) / hashText(self.versionSalt, internalRepr, grammarResources.name, language)
+		self.pending.append((internalRepr, grammarResources.name, language, cacheEntryDir, parentDir))
+
+	def flush(self, jobs: typing.Optional[int] = None) -> typing.Dict[str, typing.Dict[str, bytes]]:
+		pending = self.pending
+		self.pending = []
+
+		toGenerate = {}
+		for internalRepr, nameSpace, language, cacheEntryDir, parentDir in pending:
+			if not cacheEntryDir.is_dir():
+				toGenerate[cacheEntryDir] = (internalRepr, nameSpace, language, cacheEntryDir)
+
+		if toGenerate:
+			# threads are enough, the work is done in the child processes
+			with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as executor:
+				for fut in [executor.submit(self._generateCached, *args) for args in toGenerate.values()]:
+					fut.result()
+
+		written = {}
+		for internalRepr, nameSpace, language, cacheEntryDir, parentDir in pending:
+			shutil.copytree(cacheEntryDir, parentDir, dirs_exist_ok=True)
+			written[nameSpace] = {p.relative_to(cacheEntryDir).as_posix(): p.read_bytes() for p in cacheEntryDir.rglob("*") if p.is_file()}
+		return written
 
 	def execute(self, g: typing.Any) -> typing.Any:
 		raise NotImplementedError()
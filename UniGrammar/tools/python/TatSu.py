@@ -1,3 +1,5 @@
+import re
+import types
 import typing
 from pathlib import Path
 
@@ -13,13 +15,84 @@ from ...core.backend.Lifter import Lifter, LiftingContext, LiftingVisitor
 from ...core.backend.Runner import Runner
 from ...core.backend.SectionedGenerator import Sectioner
 from ...core.backend.Tool import Tool
+from ...core.compilationCache import ModuleCache
 from ...generators.pythonicGenerator import PythonicGenerator
 
+tatsuRuleMethodNameRx = re.compile("^_(?!_)(\\w*[^_])_$")
+
+
+class GeneratedTatSuModel:
+	"""Stands in place of a TatSu grammar model, parsing with the parser class from a module generated by `tatsu.codegen`. `key` is the key of the module in `TatSuCachingCompiler.CACHE`."""
+
+	__slots__ = ("source", "key", "parserClass", "startRule")
+
+	def __init__(self, source: str, code: "types.CodeType", key: str) -> None:
+		self.source = source
+		self.key = key
+		name = "tatsu_" + key
+		ns = {"__name__": name}
+		exec(code, ns)  # pylint:disable=exec-used
+		self.parserClass = self.findParserClass(ns, name)
+		self.startRule = self.findStartRule(self.parserClass)
+
+	@staticmethod
+	def findParserClass(ns: typing.Mapping[str, typing.Any], name: str) -> type:
+		for k, v in ns.items():
+			if isinstance(v, type) and k.endswith("Parser") and v.__module__ == name:
+				return v
+		raise ValueError("No parser class in the module generated by TatSu", name)
+
+	@staticmethod
+	def findStartRule(parserClass: type) -> typing.Optional[str]:
+		"""The generated methods are in the order of the rules, the first rule is the start one, like in `tatsu.compile`d models"""
+		for k in vars(parserClass):
+			m = tatsuRuleMethodNameRx.match(k)
+			if m:
+				return m.group(1)
+		return None
+
+	def parse(self, text: str, *args, **kwargs):
+		if not args and "start" not in kwargs and "rule_name" not in kwargs:
+			kwargs["start"] = self.startRule
+		return self.parserClass().parse(text, *args, **kwargs)
+
+	def __reduce__(self):
+		"""The parser class is from an `exec`ed module, so it cannot be pickled by reference. The key and the source are pickled instead, the code is loaded from the cache the pickling process has filled."""
+		return (loadGeneratedTatSuModel, (self.source, self.key))
+
+
+class TatSuCachingCompiler(TatSuParserFactoryFromSource):
+	"""Generates a Python module with `tatsu.codegen` from a grammar and caches it, so a grammar which text has not changed is neither compiled by TatSu nor code-generated again"""
+
+	__slots__ = ()
+
+	CACHE = ModuleCache("TatSu")
+
+	def compileStr(self, grammarText: str, target: str = "python", fileName: typing.Optional[typing.Union[Path, str]] = None) -> GeneratedTatSuModel:
+		tatsu = self.tatsu
+		key = self.CACHE.getKey(getattr(tatsu, "__version__", ""), grammarText)
+		cached = self.CACHE.get(key)
+		if cached is None:
+			source = tatsu.codegen.codegen(super().compileStr(grammarText, target), target="python")
+			code = self.CACHE.put(key, source)
+		else:
+			source, code = cached
+		return GeneratedTatSuModel(source, code, key)
+
+
+def loadGeneratedTatSuModel(source: str, key: str) -> GeneratedTatSuModel:
+	cached = TatSuCachingCompiler.CACHE.get(key)
+	if cached is not None and cached[0] == source:
+		code = cached[1]
+	else:
+		code = compile(source, "tatsu_" + key, "exec", dont_inherit=True)
+	return GeneratedTatSuModel(source, code, key)
+
 
 class TatSuRunner(Runner):
 	__slots__ = ()
 
-	COMPILER = TatSuParserFactoryFromSource
+	COMPILER = TatSuCachingCompiler
 	PARSER = TatSuParserFactory
 
 	def trace(self, parser, text: str):
@@ -29,9 +102,14 @@ class TatSuRunner(Runner):
 		raise NotImplementedError()
 
 	def saveCompiled(self, internalRepr, grammarResources: InMemoryGrammarResources, meta: ToolMetadata, target: str = "python"):
-		import tatsu
+		if isinstance(internalRepr, GeneratedTatSuModel):
+			source = internalRepr.source
+		else:
+			import tatsu
+
+			source = tatsu.codegen.codegen(internalRepr, target=target)
 
-		grammarResources.parent.backendsTextData[meta.product.name, grammarResources.name + "." + "py"] = tatsu.codegen.codegen(internalRepr, target=target)
+		grammarResources.parent.backendsTextData[meta.product.name, grammarResources.name + "." + "py"] = source
 		#grammarResources.parent.backendsTextData[meta.name, grammarResources.name + "." + meta.mainExtension] = internalRepr
 
 	def compileAndSave(self, transpiledResult: TranspiledResult, grammarResources: InMemoryGrammarResources, target: typing.Optional[str] = "python") -> None:
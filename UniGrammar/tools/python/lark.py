@@ -14,12 +14,16 @@ from ...core.ast import Grammar, Productions
 from ...core.ast.base import Name
 from ...core.ast.characters import CharClass, CharClassUnion
 from ...core.backend.Generator import TranspiledResult
-from ...core.backend.Runner import NotYetImplementedRunner, Runner
+from ...core.backend.Runner import Runner
 from ...core.backend.SectionedGenerator import LambdaSectionDumper, SectionedGenerator
 from ...core.backend.Tool import Tool
+from ...core.cache import getCacheDir, hashText
 from ...core.CharClassProcessor import CharClassMergeProcessor
 from ...generators.pythonicGenerator import PythonicGenerator
 
+if typing.TYPE_CHECKING:
+	import lark
+
 charClassEscaper = CompositeEscaper(commonCharsEscaper, closingSquareBracketEscaper, backslashUHexEscaper)
 
 
@@ -32,14 +36,38 @@ def transformNameForLark(k: str) -> str:
 	return k.lower()
 
 
-class LarkRunner(NotYetImplementedRunner):
+class LarkCompiler(DummyCompiler):
+	"""Compiles a grammar into a `lark.Lark` parser: LALR(1) if the grammar passes Lark's strict mode, Earley otherwise. The strict mode rejects not only conflicts of rules, but also collisions of terminals (it needs `interegular`), for which LALR's lexer may choose a wrong terminal and reject valid input. LALR parsers are cached by Lark in `<cache dir>/compiled/lark`, so a grammar is analysed only once."""
+
 	__slots__ = ()
 
-	COMPILER = DummyCompiler
+	def compileStr(self, grammarText: str, target: str = "python", fileName: typing.Optional[typing.Union[Path, str]] = None) -> "lark.Lark":
+		import lark
+
+		cacheDir = getCacheDir("compiled", "lark")
+		cacheDir.mkdir(parents=True, exist_ok=True)
+		try:
+			return lark.Lark(grammarText, parser="lalr", strict=True, cache=str(cacheDir / (hashText(lark.__version__, grammarText) + ".pickle")))
+		except lark.exceptions.LarkError:
+			return lark.Lark(grammarText, parser="earley")
+
+
+class LarkRunner(Runner):
+	"""The grammar is saved into the bundle, the runtime builds the parser from it"""
+
+	__slots__ = ()
+
+	COMPILER = LarkCompiler
 	PARSER = LarkParserFactory
 
-	def __init__(self):
-		raise NotImplementedError()
+	def saveCompiled(self, internalRepr: "lark.Lark", grammarResources: InMemoryGrammarResources, meta: ToolMetadata, target: str = "python"):
+		super().saveCompiled(internalRepr.source_grammar, grammarResources, meta, target)
+
+	def execute(self, g: typing.Any) -> typing.Any:
+		return g
+
+	def parse(self, parser: "lark.Lark", text: str) -> None:
+		return parser.parse(text)
 
 	def trace(self, parser, text: str):
 		raise NotImplementedError()
@@ -65,6 +65,15 @@ class ParsimoniousParserBackendWalkStrategy(ToolSpecificGrammarASTWalkStrategy):
 		return hasattr(lst, "members")
 		#return isinstance(lst.expr, (self.parserFactory.parsimonious.expressions.ZeroOrMore, self.parserFactory.parsimonious.expressions.OneOrMore))
 
+	def getMatchedAlternative(self, node) -> typing.Optional[typing.Tuple[str, typing.Any]]:
+		"""Used by `alt` dispatch tables of wrappers. A node of `OneOf` has a single child, the node of the matched alternative, which is named after its rule."""
+		children = node.children
+		if len(children) == 1:
+			child = children[0]
+			if child.expr_name:
+				return child.expr_name, child
+		return None
+
 
 class ParsimoniousVisitor(LiftingVisitor):
 	__slots__ = ()
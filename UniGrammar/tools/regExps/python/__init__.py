@@ -1,22 +1,44 @@
+import re
 import typing
+from pathlib import Path
 
 from UniGrammarRuntime.backends.regExps.python import PythonRegExpParserFactory
+from UniGrammarRuntime.ParserBundle import InMemoryGrammarResources
+from UniGrammarRuntime.ToolMetadata import ToolMetadata
 from UniGrammarRuntimeCore.ICompiler import DummyCompiler
 
 from ....core.backend.Runner import Runner
 from ....core.backend.Tool import Tool
+from .compiledCache import CompiledPatternCache
 from .generator import PythonRegExpGenerator
 from .lifter import PythonRegExpLifter
 
 
+class PythonRegExpCompiler(DummyCompiler):
+	"""Returns compiled patterns. The `sre` bytecode of a pattern is loaded lazily from the cache dir on its first use, and is stored there if it is missing, so `sre_compile` runs once per pattern."""
+
+	__slots__ = ("compiledCache",)
+
+	def __init__(self, compiledCache: typing.Optional[CompiledPatternCache] = None) -> None:
+		super().__init__()
+		if compiledCache is None:
+			compiledCache = CompiledPatternCache()
+		self.compiledCache = compiledCache
+
+	def compileStr(self, grammarText: str, target: str = "python", fileName: typing.Optional[typing.Union[Path, str]] = None) -> "re.Pattern":
+		return self.compiledCache(grammarText)
+
+
 class PythonRegExpRunner(Runner):
 	__slots__ = ()
 
-	COMPILER = DummyCompiler
+	COMPILER = PythonRegExpCompiler
 	PARSER = PythonRegExpParserFactory
 
-	def execute(self, g: typing.Any) -> typing.Any:
-		return re.compile(g)
+	def saveCompiled(self, internalRepr: typing.Union["re.Pattern", str], grammarResources: InMemoryGrammarResources, meta: ToolMetadata, target: str = "python"):
+		if not isinstance(internalRepr, str):
+			internalRepr = internalRepr.pattern
+		super().saveCompiled(internalRepr, grammarResources, meta, target)
 
 	def parse(self, parser: "_sre.SRE_Pattern", text: str) -> None:
 		parser.exec(text)
@@ -0,0 +1,107 @@
+"""Persists `sre` bytecode of patterns generated by `PythonRegExp` backend, so `sre_compile` can be skipped when loading them.
+The bytecode is specific to `_sre` implementation, so serialized patterns are tagged with Python version and `_sre.MAGIC`, and a mismatching one is just recompiled."""
+
+import _sre
+import json
+import re
+import sre_compile
+import sre_parse as sp
+import sys
+import typing
+from pathlib import Path
+
+from ....core.cache import atomicWriteText, getCacheDir, hashText
+
+serializedPatternFormatVersion = 1
+serializedPatternExtension = "sre.json"
+
+
+def getPythonTag() -> str:
+	return sys.implementation.cache_tag + "-" + str(_sre.MAGIC)
+
+
+def hashPattern(patternText: str, flags: int = 0) -> str:
+	return hashText(patternText, str(flags))
+
+
+def compileToSerializable(patternText: str, flags: int = 0) -> typing.Dict[str, typing.Any]:
+	"""Does the same as `sre_compile.compile`, but returns the stuff needed for `_sre.compile` in a JSON-serializable form instead of calling it"""
+	p = sp.parse(patternText, flags)
+	code = sre_compile._code(p, flags)  # pylint:disable=protected-access
+
+	groupindex = dict(p.state.groupdict)
+	indexgroup = [None] * p.state.groups
+	for k, i in groupindex.items():
+		indexgroup[i] = k
+
+	return {
+		"version": serializedPatternFormatVersion,
+		"python": getPythonTag(),
+		"hash": hashPattern(patternText, flags),
+		"flags": int(flags | p.state.flags),
+		"code": [int(el) for el in code],
+		"groups": p.state.groups - 1,
+		"groupindex": groupindex,
+		"indexgroup": indexgroup,
+	}
+
+
+def patternFromSerializable(data: typing.Mapping[str, typing.Any], patternText: str, flags: int = 0) -> typing.Optional["re.Pattern"]:
+	"""Returns `None` if `data` was produced for another pattern or by another version of Python"""
+	if data.get("version", None) != serializedPatternFormatVersion or data.get("python", None) != getPythonTag() or data.get("hash", None) != hashPattern(patternText, flags):
+		return None
+
+	return _sre.compile(patternText, data["flags"], data["code"], data["groups"], data["groupindex"], tuple(data["indexgroup"]))
+
+
+def serializePattern(patternText: str, flags: int = 0) -> str:
+	return json.dumps(compileToSerializable(patternText, flags), separators=(",", ":"))
+
+
+def deserializePattern(serialized: str, patternText: str, flags: int = 0) -> "re.Pattern":
+	"""Loads a pattern from `serializePattern` output, falls back to compilation if it is stale"""
+	res = None
+	if serialized:
+		try:
+			res = patternFromSerializable(json.loads(serialized), patternText, flags)
+		except (ValueError, KeyError, TypeError, RuntimeError):
+			res = None
+
+	if res is None:
+		res = sre_compile.compile(patternText, flags)
+	return res
+
+
+class CompiledPatternCache:
+	"""A dir of serialized compiled patterns, keyed by pattern hash and Python tag. Patterns are loaded only when requested and are kept in memory after that."""
+
+	__slots__ = ("dir", "loaded")
+
+	def __init__(self, cacheDir: typing.Optional[Path] = None) -> None:
+		if cacheDir is None:
+			cacheDir = getCacheDir("PythonRegExp")
+		self.dir = Path(cacheDir)
+		self.loaded = {}
+
+	def getPath(self, patternText: str, flags: int = 0) -> Path:
+		return self.dir / (hashPattern(patternText, flags) + "." + getPythonTag() + "." + serializedPatternExtension)
+
+	def __call__(self, patternText: str, flags: int = 0) -> "re.Pattern":
+		key = (patternText, flags)
+		res = self.loaded.get(key, None)
+		if res is not None:
+			return res
+
+		path = self.getPath(patternText, flags)
+		if path.is_file():
+			res = deserializePattern(path.read_text(encoding="utf-8"), patternText, flags)
+		else:
+			serialized = serializePattern(patternText, flags)
+			res = deserializePattern(serialized, patternText, flags)
+			try:
+				atomicWriteText(path, serialized)
+			except OSError:
+				pass  # the cache is an optimization, a read-only FS must not break parsing
+
+		self.loaded[key] = res
+		return res
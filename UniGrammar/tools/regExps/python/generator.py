@@ -1,3 +1,4 @@
+import re
 import sre_constants as sc
 import sre_parse as sp
 import typing
@@ -17,6 +18,250 @@ from ....generators.UniGrammarDictGenerator import UniGrammarDictGenerator
 from .knowledge import anyChar, wellKnownRegExpInvRemapSingle
 
 
+LiteralCodesT = typing.Tuple[int, ...]
+TrieT = typing.List[list]  # ordered `[char or None, child trie]` entries, `None` marks that a literal ends in the node
+
+categoriesEscapes = {
+	sc.CATEGORY_DIGIT: "\\d",
+	sc.CATEGORY_NOT_DIGIT: "\\D",
+	sc.CATEGORY_SPACE: "\\s",
+	sc.CATEGORY_NOT_SPACE: "\\S",
+	sc.CATEGORY_WORD: "\\w",
+	sc.CATEGORY_NOT_WORD: "\\W",
+}
+
+
+def _asSubPattern(el: typing.Any) -> list:
+	"""`Lit`s of length 1, char classes and other single opcodes are emitted as bare `(op, av)` tuples, sequences as lists. `BRANCH` alternatives must be sequences."""
+	if isinstance(el, list):
+		return el
+	return [el]
+
+
+def _getLiteralCodes(el: typing.Any) -> typing.Optional[LiteralCodesT]:
+	"""Returns codepoints if `el` is a literal string (a sequence consisting only of `LITERAL`s), otherwise `None`"""
+	seq = _asSubPattern(el)
+	if not seq:
+		return None
+
+	res = []
+	for op in seq:
+		if not isinstance(op, tuple) or op[0] is not sc.LITERAL:
+			return None
+		res.append(op[1])
+	return tuple(res)
+
+
+def _getCharSetItems(el: typing.Any) -> typing.Optional[list]:
+	"""Returns items of `IN` if `el` matches a single char from a positive set, so it can be merged with other single-char branches, otherwise `None`"""
+	if isinstance(el, list):
+		if len(el) != 1:
+			return None
+		el = el[0]
+
+	if not isinstance(el, tuple):
+		return None
+
+	op, av = el
+	if op is sc.IN:
+		for item in av:
+			if not isinstance(item, tuple) or item[0] is sc.NEGATE:
+				return None
+		return list(av)
+	if op in (sc.LITERAL, sc.RANGE, sc.CATEGORY):
+		return [el]
+	return None
+
+
+def buildLiteralsTrie(literals: typing.Iterable[LiteralCodesT]) -> TrieT:
+	"""Builds an ordered trie from sequences of codepoints, the order of entries in each node is the order in which the literals are tried.
+	A literal is merged into an entry for the same char only if no literal ending in the node is between them: entries for different chars are mutually exclusive, so the literal can be moved before them, but a literal ending earlier matches a prefix of it and must keep its priority.
+	Duplicates are dropped, they can never match."""
+	root = []
+	for lit in literals:
+		node = root
+		for c in lit:
+			child = None
+			for entry in reversed(node):
+				if entry[0] == c:
+					child = entry[1]
+					break
+				if entry[0] is None:
+					break
+			if child is None:
+				child = []
+				node.append([c, child])
+			node = child
+		if not any(entry[0] is None for entry in node):
+			node.append([None, None])
+	return root
+
+
+def mergeSingleCharAlternatives(alts: typing.Iterable[list]) -> typing.List[list]:
+	"""Merges runs of adjacent alternatives matching a single char from a positive set into one `IN`. All of them consume exactly one char, so the first matching one of a run and the merged set match the same."""
+	res = []
+	runStart = None
+	for alt in alts:
+		items = _getCharSetItems(alt)
+		if items is None:
+			runStart = None
+			res.append(alt)
+		elif runStart is None:
+			runStart = len(res)
+			res.append(alt)
+		else:
+			prevItems = _getCharSetItems(res[runStart])
+			res[runStart] = [(sc.IN, prevItems + items)]
+	return res
+
+
+def alternativesToSubPattern(alts: typing.List[list]) -> list:
+	"""Converts alternatives into a subpattern trying them in the same order. An alternation of a subpattern and an empty alternative is an optional one, greedy or lazy depending on which one is tried first."""
+	alts = mergeSingleCharAlternatives(alts)
+	if len(alts) == 1:
+		return alts[0]
+	if len(alts) == 2:
+		if not alts[1]:
+			return [(sc.MAX_REPEAT, (0, 1, alts[0]))]
+		if not alts[0]:
+			return [(sc.MIN_REPEAT, (0, 1, alts[1]))]
+	return [(sc.BRANCH, (None, alts))]
+
+
+def trieToAlternatives(node: TrieT) -> typing.List[list]:
+	"""Converts a node of a trie into alternatives in the order of its entries, shared prefixes are emitted once"""
+	res = []
+	for c, child in node:
+		if c is None:
+			res.append([])
+		else:
+			res.append([(sc.LITERAL, c)] + alternativesToSubPattern(trieToAlternatives(child)))
+	return res
+
+
+def factorAlternatives(alts: typing.Iterable[typing.Any]) -> typing.List[list]:
+	"""Factors common prefixes out of runs of adjacent literal alternatives using a trie and merges runs of adjacent single-char alternatives into `IN`s.
+	Alternatives are never moved across an alternative of another kind, so both the matched strings and the priority of alternatives (the first matching one wins) are kept."""
+
+	res = []
+	run = []
+
+	def flush():
+		if len(run) > 1:
+			res.extend(trieToAlternatives(buildLiteralsTrie(run)))
+		elif run:
+			res.append([(sc.LITERAL, c) for c in run[0]])
+		run.clear()
+
+	for alt in alts:
+		lit = _getLiteralCodes(alt)
+		if lit is None:
+			flush()
+			res.append(_asSubPattern(alt))
+		else:
+			run.append(lit)
+	flush()
+	return mergeSingleCharAlternatives(res)
+
+
+def factorSubPattern(el: typing.Any) -> typing.Any:
+	"""Recursively applies `factorAlternatives` to all the `BRANCH`es within an already resolved (refs are substituted) pattern. `el` must be a single item or a sequence, nested sequences are flattened."""
+
+	if isinstance(el, list):
+		res = []
+		for subEl in el:
+			factored = factorSubPattern(subEl)
+			if isinstance(factored, list):  # a nested sequence or a `BRANCH` collapsed into a sequence
+				res.extend(factored)
+			else:
+				res.append(factored)
+		return res
+
+	if isinstance(el, tuple) and el:
+		op = el[0]
+		if op is sc.BRANCH:
+			return alternativesToSubPattern(factorAlternatives(_asSubPattern(factorSubPattern(b)) for b in el[1][1]))
+		if op is sc.MAX_REPEAT or op is sc.MIN_REPEAT:
+			minCount, maxCount, subPattern = el[1]
+			return (op, (minCount, maxCount, _asSubPattern(factorSubPattern(subPattern))))
+		if op is sc.SUBPATTERN:
+			group, addFlags, delFlags, subPattern = el[1]
+			return (op, (group, addFlags, delFlags, _asSubPattern(factorSubPattern(subPattern))))
+
+	return el
+
+
+def _unparseCharSetItem(item: tuple) -> str:
+	op, av = item
+	if op is sc.LITERAL:
+		return re.escape(chr(av))
+	if op is sc.RANGE:
+		return re.escape(chr(av[0])) + "-" + re.escape(chr(av[1]))
+	if op is sc.CATEGORY:
+		return categoriesEscapes[av]
+	if op is sc.NEGATE:
+		return "^"
+	raise NotImplementedError(op)
+
+
+def _isAtom(seq: list) -> bool:
+	"""Whether a quantifier can be applied to the unparsed subpattern without a group"""
+	if len(seq) != 1 or isinstance(seq[0], list):
+		return False
+	return seq[0][0] in (sc.LITERAL, sc.IN, sc.CATEGORY, sc.ANY, sc.BRANCH, sc.SUBPATTERN)
+
+
+def unparseSubPattern(el: typing.Any, groupsNames: typing.Mapping[int, str] = None) -> str:
+	"""Converts an `sre` subpattern (a single item or a sequence) into the text of a regular expression. `groupsNames` maps numbers of capturing groups to their names."""
+	if groupsNames is None:
+		groupsNames = {}
+
+	if isinstance(el, list):
+		return "".join(unparseSubPattern(subEl, groupsNames) for subEl in el)
+
+	op, av = el
+	if op is sc.LITERAL:
+		return re.escape(chr(av))
+	if op is sc.IN:
+		return "[" + "".join(_unparseCharSetItem(item) for item in av) + "]"
+	if op is sc.RANGE:
+		return "[" + _unparseCharSetItem(el) + "]"
+	if op is sc.CATEGORY:
+		return categoriesEscapes[av]
+	if op is sc.ANY:
+		return "."
+	if op is sc.BRANCH:
+		return "(?:" + "|".join(unparseSubPattern(b, groupsNames) for b in av[1]) + ")"
+	if op is sc.SUBPATTERN:
+		group, _addFlags, _delFlags, subPattern = av
+		if group is None:
+			prefix = "(?:"
+		else:
+			name = groupsNames.get(group, None)
+			prefix = "(?P<" + name + ">" if name is not None else "("
+		return prefix + unparseSubPattern(subPattern, groupsNames) + ")"
+	if op is sc.MAX_REPEAT or op is sc.MIN_REPEAT:
+		minCount, maxCount, subPattern = av
+		subPattern = _asSubPattern(subPattern)
+		res = unparseSubPattern(subPattern, groupsNames)
+		if not _isAtom(subPattern):
+			res = "(?:" + res + ")"
+
+		if maxCount is sc.MAXREPEAT or maxCount == sc.MAXREPEAT:
+			quantifier = {0: "*", 1: "+"}.get(minCount, "{" + str(minCount) + ",}")
+		elif minCount == 0 and maxCount == 1:
+			quantifier = "?"
+		elif minCount == maxCount:
+			quantifier = "{" + str(minCount) + "}"
+		else:
+			quantifier = "{" + str(minCount) + "," + str(maxCount) + "}"
+
+		if op is sc.MIN_REPEAT:
+			quantifier += "?"
+		return res + quantifier
+	raise NotImplementedError(op)
+
+
 class PythonRegExpGeneratorContext(UniGrammarDictGenerator.CONTEXT_CLASS):
 	__slots__ = ("sp", "refsPtrs")
 
@@ -40,6 +285,7 @@ class PythonRegExpGenerator(UniGrammarDictGenerator):
 	charClassEscaper = None
 	stringEscaper = None
 	CONTEXT_CLASS = PythonRegExpGeneratorContext
+	FACTOR_ALTERNATIVES = True
 
 	class CHAR_CLASS_PROCESSOR(CharClassProcessor):
 		@classmethod
@@ -106,8 +352,12 @@ class PythonRegExpGenerator(UniGrammarDictGenerator):
 	@classmethod
 	def Cap(cls, obj: Cap, grammar: typing.Optional[Grammar], ctx: typing.Any = None) -> str:
 		res = cls.resolve(obj.child, grammar, ctx)
-		ctx.sp.state.groupdict[obj.name] = len(ctx.sp.state.groupdict) + 1
-		return res
+		groupId = ctx.sp.state.groupdict[obj.name] = len(ctx.sp.state.groupdict) + 1
+		return (sc.SUBPATTERN, (groupId, 0, 0, _asSubPattern(res)))
+
+	@classmethod
+	def _wrapIntoGroup(cls, s: typing.Any, grammar: Grammar, ctx: typing.Any = None) -> typing.Any:
+		return s  # `sre` trees are nested, grouping is implied by the structure
 
 	@classmethod
 	def Spacer(cls, obj: Spacer, grammar: Grammar, ctx: typing.Any = None) -> str:
@@ -127,25 +377,43 @@ class PythonRegExpGenerator(UniGrammarDictGenerator):
 		#return ctx.refsPtrs[obj.name]
 		return obj
 
+	@classmethod
+	def _charSet(cls, items: list, negative: bool) -> tuple:
+		if negative:
+			items = [(sc.NEGATE, None)] + items
+		return (sc.IN, items)
+
 	@classmethod
 	def CharClass(cls, obj: CharClass, grammar: Grammar, ctx: typing.Any = None):
-		return (sc.IN, [c for c in obj.chars])
+		return cls._charSet([cls._char(c) for c in obj.chars], obj.negative)
 
 	@classmethod
 	def WellKnownChars(cls, obj: WellKnownChars, grammar: Grammar, ctx: typing.Any = None) -> str:
-		return (sc.CATEGORY, wellKnownRegExpInvRemapSingle[obj])
+		category = wellKnownRegExpInvRemapSingle.get((obj.name, obj.negative), None)
+		if category is not None:
+			return (sc.CATEGORY, category)
+		return cls._charSet([(sc.RANGE, (r.start, r.stop - 1)) for r in obj.getRanges()], obj.negative)
 
 	@classmethod
 	def CharClassUnion(cls, obj: CharClassUnion, grammar: Grammar, ctx: typing.Any = None) -> str:
-		return (sc.IN, [obj])
+		items = []
+		for child in obj.children:
+			childItems = _getCharSetItems(cls.resolve(child, grammar, ctx))
+			if childItems is None:
+				raise NotImplementedError("Negative char classes within unions are not supported", child)
+			items.extend(childItems)
+		return cls._charSet(items, obj.negative)
 
 	@classmethod
 	def CharRange(cls, obj: CharRange, grammar: Grammar, ctx: typing.Any = None) -> str:
-		return (sc.RANGE, (obj.start, obj.stop))
+		res = (sc.RANGE, (obj.range.start, obj.range.stop - 1))
+		if obj.negative:
+			return cls._charSet([res], True)
+		return res
 
 	@classmethod
 	def _wrapAlts(cls, alts: typing.Iterable[str], grammar: Grammar, ctx: typing.Any = None) -> str:
-		return (sc.IN, list(alts))
+		return (sc.BRANCH, (None, [_asSubPattern(alt) for alt in alts]))
 
 	@classmethod
 	def preprocessGrammar(cls, grammar: Grammar, ctx: typing.Any = None) -> None:
@@ -159,11 +427,14 @@ class PythonRegExpGenerator(UniGrammarDictGenerator):
 				del ctx.dict[secName]
 		#ic(ctx.sp)
 
-		return (cls.unparseRx(res),)
+		res = cls.refsDelayedResolve(ctx.refsPtrs[grammar.prods.findFirstRule().name], ctx)
+		if cls.FACTOR_ALTERNATIVES:
+			res = factorSubPattern(res)
+		return (cls.unparseRx(res, ctx),)
 
 	@classmethod
 	def unparseRx(cls, rx, ctx) -> str:
-		raise NotImplementedError
+		return unparseSubPattern(rx, {v: k for k, v in ctx.sp.state.groupdict.items()})
 
 	@classmethod
 	def getOrder(cls, grammar: Grammar, ctx: typing.Any = None) -> typing.Iterable[str]:
@@ -180,21 +451,23 @@ class PythonRegExpGenerator(UniGrammarDictGenerator):
 			#ic(res)
 			res = cls.refsDelayedResolve(res, ctx)
 			#ic(res)
+			if cls.FACTOR_ALTERNATIVES:
+				res = [factorSubPattern(el) for el in res]  # a section is a list of rules, not a sequence
 			secSeq.extend(res)
 
 	@classmethod
-	def refsDelayedResolve(cls, seq, ctx: typing.Any = None):
+	def refsDelayedResolve(cls, seq, ctx: typing.Any = None, resolving: typing.Tuple[str, ...] = ()):
+		"""Substitutes the patterns of the rules in place of `Ref`s. `resolving` are the names of the rules being substituted, regular expressions cannot express recursion."""
+		if isinstance(seq, Ref):
+			if seq.name in resolving:
+				raise ValueError("Recursive rules cannot be converted into a regular expression", resolving + (seq.name,))
+			return cls.refsDelayedResolve(ctx.refsPtrs[seq.name], ctx, resolving + (seq.name,))
+		if not isinstance(seq, (tuple, list)):
+			return seq
+
 		newSeq = []
 		for el in seq:
 			#ic(el)
-			if isinstance(el, Ref):
-				elRes = cls.refsDelayedResolve(ctx.refsPtrs[el.name], ctx)
-				#ic(elRes)
-			elif isinstance(el, (tuple, list)):
-				elRes = cls.refsDelayedResolve(el, ctx)
-			else:
-				elRes = el
-
-			newSeq.append(elRes)
+			newSeq.append(cls.refsDelayedResolve(el, ctx, resolving))
 
 		return type(seq)(newSeq)
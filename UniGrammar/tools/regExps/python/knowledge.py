@@ -18,7 +18,7 @@ wellKnownRegExpRemap = {
 	sc.CATEGORY_NOT_SPACE: WellKnownChars("whitespace", negative=True),
 }
 wellKnownRegExpInvRemapSingle = {
-	v: k
+	(v.name, v.negative): k  # char classes are compared by ranges only, so a class and its negation would collide
 	for k, v in wellKnownRegExpRemap.items()
 	if isinstance(v, WellKnownChars)
 }
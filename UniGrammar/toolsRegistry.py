@@ -0,0 +1,93 @@
+"""The backends known to UniGrammar, selection of them by user-provided strings and the pools of their runners, compilers and parser factories shared within a process"""
+
+import re
+import typing
+from collections import defaultdict
+
+from UniGrammarRuntime.grammarClasses import GrammarClass
+from UniGrammarRuntimeCore.PoolManager import PoolManager
+
+from .core.backend.Generator import Generator
+from .tools.multilanguage.antlr4 import ANTLR
+from .tools.multilanguage.CoCoR import CoCoR
+from .tools.multilanguage.waxeye import Waxeye
+from .tools.python.arpeggio import Arpeggio
+from .tools.python.lark import Lark
+from .tools.python.parglare import Parglare
+from .tools.python.parsimonious import Parsimonious
+from .tools.python.TatSu import TatSu
+from .tools.regExps.python import PythonRegExp
+
+backendz = (Parglare, ANTLR, Waxeye, TatSu, Parsimonious, Arpeggio, CoCoR, Lark, PythonRegExp)
+backendsNames = {b.RUNNER.PARSER.META.product.name: b for b in backendz}
+
+
+class selectors:
+	"""Contains methods to retrieve backends matching some criteria. Each method corresponds to a criteria"""
+
+	@staticmethod
+	def name(name: str) -> typing.Iterable[Generator]:
+		"""Selects a backend based on its name"""
+		b = backendsNames.get(name, None)
+		if b is None:
+			raise KeyError(name, backendsNames)
+
+		yield b
+
+	@staticmethod
+	def lang(lang: str) -> typing.Iterable[Generator]:
+		"""Selects a backend based on languages supported by the backend"""
+		for b in backendz:
+			if lang in b.META.runtimeLib:
+				yield b
+
+	@staticmethod
+	def cls(grammarClass: str) -> typing.Iterable[Generator]:
+		"""Selects a backend based on classes of grammars that can be implemented using it."""
+		grammarClass = GrammarClass.fromStr(grammarClass)
+		for b in backendz:
+			for gCl in b.META.grammarClasses:
+				if grammarClass < gCl:
+					yield b
+					break
+
+
+selectorRx = re.compile("^(?:(lang|cls):)(.+)$")
+
+
+def parseToolsString(s: str) -> typing.Iterable[Generator]:
+	"""Parses `backend string` specifying selection backends using some criteria, selects the backends based on it and yields them"""
+	m = selectorRx.match(s)
+	if m:
+		selector = getattr(selectors, m.group(1))
+		s = m.group(2)
+	else:
+		selector = selectors.name
+	for n in s.split(","):
+		yield from selector(n)
+
+
+allToolsNames = frozenset(("all", "*"))
+
+
+def _parseToolsStrings(s: str) -> typing.Iterable[Generator]:
+	if s in allToolsNames:
+		return backendz
+	for bs in s.split(":"):
+		return parseToolsString(bs)
+
+
+def parseToolsStrings(s: str) -> typing.Set[Generator]:
+	"""Parses `backend string`s specifying selection backends using some criteria, selects the backends based on them and returns them. The set of backends is deduplicated."""
+	return set(_parseToolsStrings(s))
+
+
+def createGeneratorsToToolsMapping(tools):
+	generators = defaultdict(set)
+	for t in tools:
+		generators[t.GENERATOR].add(t)
+	return dict(generators)
+
+
+runnersPool = PoolManager()
+parsersFactoriesAndCompilersPool = PoolManager()
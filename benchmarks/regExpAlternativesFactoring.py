@@ -0,0 +1,38 @@
+"""Compares matching speed of an alternation of literals emitted as is and factored by `PythonRegExpGenerator`"""
+
+import builtins
+import keyword
+import random
+import re
+import sre_constants as sc
+import sys
+import timeit
+from pathlib import Path
+
+thisDir = Path(__file__).absolute().parent
+sys.path.insert(0, str(thisDir.parent))
+
+from UniGrammar.tools.regExps.python.generator import factorSubPattern, unparseSubPattern
+
+
+def main() -> None:
+	words = list(dict.fromkeys(keyword.kwlist + [k for k in dir(builtins) if not k.startswith("_")]))
+	flat = (sc.BRANCH, (None, [[(sc.LITERAL, ord(c)) for c in w] for w in words]))
+	patterns = {
+		"flat": re.compile(unparseSubPattern(flat)),
+		"factored": re.compile(unparseSubPattern(factorSubPattern(flat))),
+	}
+
+	rnd = random.Random(0)
+	samples = [rnd.choice(words) for _i in range(20000)] + ["".join(rnd.choice("abcdefghijklmnopqrstuvwxyz") for _j in range(rnd.randint(1, 10))) for _i in range(2000)]
+	rnd.shuffle(samples)
+
+	for name, pattern in patterns.items():
+		if [bool(pattern.fullmatch(s)) for s in samples] != [bool(patterns["flat"].fullmatch(s)) for s in samples]:
+			raise AssertionError("Results differ", name)
+		t = min(timeit.repeat(lambda: [pattern.fullmatch(s) for s in samples], number=5, repeat=5)) / 5
+		print(name, len(words), "alternatives:", round(len(samples) / t / 1e6, 2), "M matches/s")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,111 @@
+"""Fixtures shared by the tests: grammars and a harness running the generated wrappers on fake parse results of backends"""
+
+import ast
+import os
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+thisDir = Path(__file__).absolute().parent
+sys.path.insert(0, str(thisDir.parent))
+
+from UniGrammar.core.cache import cacheDirEnvVarName
+from UniGrammar.core.WrapperGen import WrapperGen
+from UniGrammar.ownGrammarFormat import parseUniGrammar
+
+altGrammarDict = {
+	"meta": {"id": "pairs", "title": "pairs", "license": "Unlicense"},
+	"doc": "either `xy` or `yx`",
+	"chars": [{"id": "x", "lit": "x"}, {"id": "y", "lit": "y"}],
+	"prods": [
+		{"id": "start", "alt": [{"ref": "xy", "cap": "first"}, {"ref": "yx", "cap": "second"}]},
+		{"id": "xy", "seq": [{"ref": "x", "cap": "a"}, {"ref": "y", "cap": "b"}]},
+		{"id": "yx", "seq": [{"ref": "y", "cap": "a"}, {"ref": "x", "cap": "b"}]},
+	],
+}
+
+nestedGrammarDict = {
+	"meta": {"id": "nested", "title": "nested", "license": "Unlicense"},
+	"doc": "`x`s followed by `yy`",
+	"chars": [{"id": "x", "lit": "x"}, {"id": "y", "lit": "y"}],
+	"prods": [
+		{"id": "start", "alt": [{"ref": "nested", "cap": "nested"}, {"ref": "leaf", "cap": "leaf"}]},
+		{"id": "nested", "seq": [{"ref": "x", "cap": "open"}, {"ref": "start", "cap": "inner"}]},
+		{"id": "leaf", "seq": [{"ref": "y", "cap": "a"}, {"ref": "y", "cap": "b"}]},
+	],
+}
+
+listGrammarDict = {
+	"meta": {"id": "pairs", "title": "pairs", "license": "Unlicense"},
+	"doc": "pairs of `x` and `y`",
+	"chars": [{"id": "x", "lit": "x"}, {"id": "y", "lit": "y"}],
+	"prods": [
+		{"id": "pairs", "min": 1, "ref": "pair"},
+		{"id": "pair", "seq": [{"ref": "x", "cap": "a"}, {"ref": "y", "cap": "b"}]},
+	],
+}
+
+
+def transpileWrapper(grammar=altGrammarDict, **kwargs):
+	"""Returns the generated module namespace, its source, `capSchema` and `iterSchema`"""
+	moduleAST, capSchema, iterSchema = WrapperGen.transpile(parseUniGrammar(dict(grammar)), **kwargs)
+	source = ast.unparse(ast.fix_missing_locations(moduleAST))
+	ns = {}
+	exec(compile(source, "<wrapper>", "exec"), ns)  # pylint:disable=exec-used
+	return ns, source, dict(capSchema), iterSchema
+
+
+def genWrapper(grammar=altGrammarDict, **kwargs):
+	"""Returns the generated module namespace and its source"""
+	ns, source, _capSchema, _iterSchema = transpileWrapper(grammar, **kwargs)
+	return ns, source
+
+
+class FakeBackend:
+	__slots__ = ("wstr", "parsed", "parse")
+
+	def __init__(self, parsed, wstr=None):
+		self.parsed = parsed
+		self.wstr = wstr if wstr is not None else SimpleNamespace()
+		self.parse = lambda s: parsed
+
+	def preprocessAST(self, parsed):
+		return parsed
+
+	@staticmethod
+	def terminalNodeToStr(node):
+		return node
+
+
+class CountingBackend(FakeBackend):
+	__slots__ = ("count",)
+
+	def __init__(self, parsed, wstr=None):
+		super().__init__(parsed, wstr)
+		self.count = 0
+
+	def terminalNodeToStr(self, node):
+		self.count += 1
+		return node
+
+
+def makeParser(ns, parsed, wstr=None, backendCls=FakeBackend):
+	parser = ns["__MAIN_PARSER__"].__new__(ns["__MAIN_PARSER__"])
+	parser.backend = backendCls(parsed, wstr)
+	return parser
+
+
+class TemporaryCacheDir:
+	"""A mixin for `TestCase`s: each test gets an empty temporary dir `tempDir`, the cache is redirected into `cacheDir` within it"""
+
+	def setUp(self):
+		super().setUp()
+		d = tempfile.TemporaryDirectory()
+		self.addCleanup(d.cleanup)
+		self.tempDir = Path(d.name)
+		self.cacheDir = self.tempDir / "cache"
+		env = mock.patch.dict(os.environ, {cacheDirEnvVarName: str(self.cacheDir)})
+		env.start()
+		self.addCleanup(env.stop)
@@ -0,0 +1,140 @@
+import io
+import os
+import socket
+import sys
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+thisDir = Path(__file__).absolute().parent
+sys.path.insert(0, str(thisDir.parent))
+
+from helpers import TemporaryCacheDir
+from UniGrammar.tools.multilanguage import antlrService
+from UniGrammar.tools.multilanguage.antlr4 import ANTLRRunner
+from UniGrammar.tools.multilanguage.antlrService import ANTLRCompileClient, ANTLRCompileService, ANTLRCompileServiceError, antlrServiceSocketEnvVarName
+
+
+class FakeCompiler:
+	"""`bad` grammars are rejected, `lambda` ones compile into an unpicklable result"""
+
+	__slots__ = ("calls",)
+
+	def __init__(self):
+		self.calls = []
+
+	def compileStrLocal(self, grammarText, target="python", fileName=None):
+		self.calls.append(grammarText)
+		if grammarText == "bad":
+			raise SyntaxError("rejected " + grammarText)
+		if grammarText == "lambda":
+			return lambda: grammarText
+		return "compiled " + grammarText + " for " + target
+
+
+class FakeANTLR(ANTLRRunner.COMPILER):
+	__slots__ = ()
+
+	compiler = FakeCompiler()
+
+	def compileStrLocal(self, grammarText, target="python", fileName=None):
+		return self.compiler.compileStrLocal(grammarText, target, fileName)
+
+
+class ServiceTests(TemporaryCacheDir, unittest.TestCase):
+	def setUp(self):
+		super().setUp()
+		self.socketPath = self.tempDir / "service.sock"
+		self.compiler = FakeCompiler()
+		self.service = ANTLRCompileService(self.socketPath, self.compiler)
+		self.addCleanup(self.service.server_close)
+		thread = threading.Thread(target=self.service.serve_forever, daemon=True)
+		thread.start()
+		self.addCleanup(thread.join)
+		self.addCleanup(self.service.shutdown)
+		self.client = ANTLRCompileClient(self.socketPath, timeout=10)
+
+	def testSocketIsPrivate(self):
+		self.assertEqual(os.stat(self.socketPath).st_mode & 0o777, 0o600)
+
+	def testBatch(self):
+		self.assertEqual(self.client.compileMany([("a", "python", None), ("b", "java", "b.g4")]), ["compiled a for python", "compiled b for java"])
+		self.assertEqual(self.compiler.calls, ["a", "b"])
+
+	def testError(self):
+		with self.assertRaises(ANTLRCompileServiceError) as cm:
+			self.client.compileMany([("a", "python", None), ("bad", "python", None)])
+		self.assertIn("rejected bad", str(cm.exception))
+
+	def testUnpicklable(self):
+		self.assertEqual(self.client.compileMany([("lambda", "python", None), ("a", "python", None)]), [None, "compiled a for python"])
+
+	def testManyMessagesInAConnection(self):
+		with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+			sock.settimeout(10)
+			sock.connect(str(self.socketPath))
+			with sock.makefile("rb") as f:
+				for name in ("a", "bad"):
+					antlrService._sendMessage(sock, [(name, "python", None)])
+					(status, _payload), = antlrService._recvMessage(f)
+					self.assertIs(status, antlrService.compiledStatus if name == "a" else antlrService.failedStatus)
+
+	def testUnpicklableCompiledLocally(self):
+		FakeANTLR.compiler = FakeCompiler()
+		with mock.patch.dict(os.environ, {antlrServiceSocketEnvVarName: str(self.socketPath)}):
+			res = FakeANTLR().compileMany([("lambda", "python", None), ("a", "python", None)])
+		self.assertEqual(res[0](), "lambda")
+		self.assertEqual(res[1], "compiled a for python")
+		self.assertEqual(self.compiler.calls, ["lambda", "a"])
+		self.assertEqual(FakeANTLR.compiler.calls, ["lambda"])
+
+
+class ProtocolTests(unittest.TestCase):
+	def testLengthPrefixed(self):
+		sock = mock.Mock()
+		antlrService._sendMessage(sock, ["a", 1])
+		data = sock.sendall.call_args[0][0]
+		self.assertEqual(antlrService._lengthStruct.unpack(data[: antlrService._lengthStruct.size])[0], len(data) - antlrService._lengthStruct.size)
+
+		f = io.BytesIO(data + data)
+		self.assertEqual(antlrService._recvMessage(f), ["a", 1])
+		self.assertEqual(antlrService._recvMessage(f), ["a", 1])
+		self.assertIsNone(antlrService._recvMessage(f))
+
+	def testTruncated(self):
+		sock = mock.Mock()
+		antlrService._sendMessage(sock, "a")
+		data = sock.sendall.call_args[0][0]
+		for size in (antlrService._lengthStruct.size - 1, len(data) - 1):
+			with self.subTest(size=size):
+				with self.assertRaises(EOFError):
+					antlrService._recvMessage(io.BytesIO(data[:size]))
+
+
+class FallbackTests(TemporaryCacheDir, unittest.TestCase):
+	def setUp(self):
+		super().setUp()
+		FakeANTLR.compiler = FakeCompiler()
+		self.socketPath = self.tempDir / "stale.sock"
+		with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+			sock.bind(str(self.socketPath))  # the file of the socket of a killed service stays
+		env = mock.patch.dict(os.environ, {antlrServiceSocketEnvVarName: str(self.socketPath)})
+		env.start()
+		self.addCleanup(env.stop)
+
+	def testStaleSocket(self):
+		self.assertIsNone(ANTLRCompileClient(self.socketPath, timeout=10).tryCompileMany([("a", "python", None)]))
+		self.assertEqual(FakeANTLR().compileStr("a"), "compiled a for python")
+		self.assertEqual(FakeANTLR.compiler.calls, ["a"])
+
+	def testCacheHitsSkipCompilation(self):
+		compiler = FakeANTLR()
+		self.assertEqual(compiler.compileMany([("a", "python", None), ("b", "python", None)]), ["compiled a for python", "compiled b for python"])
+		self.assertEqual(compiler.compileMany([("b", "python", None), ("c", "python", None), ("a", "python", None)]), ["compiled b for python", "compiled c for python", "compiled a for python"])
+		self.assertEqual(FakeANTLR.compiler.calls, ["a", "b", "c"])
+		self.assertEqual(compiler.compileStr("a", "java"), "compiled a for java")  # the target is in the key
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,129 @@
+import asyncio
+import sys
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+thisDir = Path(__file__).absolute().parent
+sys.path.insert(0, str(thisDir.parent))
+
+from UniGrammar import asyncApi
+from UniGrammar.session import Session
+
+
+class FakeRunner:
+	"""A parser of a grammar rejects the tests starting with `bad`. Parsing a test takes as many ms as the number in its end."""
+
+	__slots__ = ()
+
+	calls = []
+
+	@classmethod
+	def makeParser(cls, transpiledText):
+		def parser(test):
+			cls.calls.append(test)
+			time.sleep(int(test.rsplit(" ", 1)[-1]) / 1000)
+			if test.startswith("bad"):
+				raise SyntaxError("rejected by " + transpiledText)
+			return test
+
+		return parser
+
+
+class FakeSession(Session):
+	__slots__ = ()
+
+	def getParser(self, runnerCls, transpiledText):
+		return self.parsers.getOrCreate((runnerCls, transpiledText), lambda: runnerCls.makeParser(transpiledText))
+
+
+def collect(agen):
+	async def f():
+		return [r async for r in agen]
+
+	return asyncio.run(f())
+
+
+class RunTestsTests(unittest.TestCase):
+	def setUp(self):
+		FakeRunner.calls = []
+		patcher = mock.patch.object(asyncApi, "_workerSession", FakeSession())
+		patcher.start()
+		self.addCleanup(patcher.stop)
+		self.transpiled = SimpleNamespace(text="g")
+
+	def testOrderAndErrors(self):
+		tests = ["ok 20", "bad 0", "ok 10", "ok 0"]
+		with ThreadPoolExecutor(4) as executor:
+			results = collect(asyncApi.arunTestsForGenerator(tests, FakeRunner, self.transpiled, executor, concurrency=4))
+		self.assertEqual([(r.index, r.test, r.ok) for r in results], [(0, "ok 20", True), (1, "bad 0", False), (2, "ok 10", True), (3, "ok 0", True)])
+		self.assertEqual(results[1].error, "rejected by g")
+		self.assertEqual(sorted(FakeRunner.calls), sorted(tests))
+
+	def testRunnerInstance(self):
+		results = collect(asyncApi.arunTestsForGenerator(["ok 0"], FakeRunner(), self.transpiled))
+		self.assertTrue(results[0].ok)
+
+	def testEarlyExitCancels(self):
+		release = threading.Event()
+
+		async def f(executor):
+			executor.submit(release.wait)  # occupies the only worker, so the tests stay queued
+			agen = asyncApi.arunTestsForGenerator(["ok 0"] * 4, FakeRunner, self.transpiled, executor, concurrency=4)
+			consumer = asyncio.ensure_future(agen.__anext__())
+			await asyncio.sleep(0.01)
+			consumer.cancel()
+			with self.assertRaises(asyncio.CancelledError):
+				await consumer
+			await agen.aclose()
+			release.set()
+
+		with ThreadPoolExecutor(1) as executor:
+			asyncio.run(f(executor))
+		self.assertEqual(FakeRunner.calls, [])
+
+
+class TranspileFilesTests(unittest.TestCase):
+	def setUp(self):
+		self.started = []
+		self.finished = []
+		self.cancelled = []
+
+		async def fakeTranspileFile(file, backends, executor=None):
+			self.started.append(file)
+			try:
+				await asyncio.sleep(int(file) / 1000)
+			except asyncio.CancelledError:
+				self.cancelled.append(file)
+				raise
+			self.finished.append(file)
+			return (file, backends)
+
+		patcher = mock.patch.object(asyncApi, "atranspileFileForGenerators", fakeTranspileFile)
+		patcher.start()
+		self.addCleanup(patcher.stop)
+
+	def testOrder(self):
+		files = ["30", "0", "20", "10", "0"]
+		results = collect(asyncApi.atranspileFilesForGenerators(files, ["b"], concurrency=3))
+		self.assertEqual(results, [(f, (f, ("b",))) for f in files])
+		self.assertNotEqual(self.finished, files)  # they have completed out of order
+
+	def testEarlyExitCancels(self):
+		async def f():
+			agen = asyncApi.atranspileFilesForGenerators(["0", "1000", "1000", "1000"], (), concurrency=3)
+			self.assertEqual(await agen.__anext__(), ("0", ("0", ())))
+			await agen.aclose()
+			await asyncio.sleep(0)
+			self.assertEqual(self.started, ["0", "1000", "1000"])
+			self.assertEqual(self.cancelled, ["1000", "1000"])  # before `asyncio.run` cancels the rest on exit
+
+		asyncio.run(f())
+
+
+if __name__ == "__main__":
+	unittest.main()
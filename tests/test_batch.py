@@ -0,0 +1,47 @@
+import io
+import json
+import sys
+import unittest
+from pathlib import Path
+
+thisDir = Path(__file__).absolute().parent
+sys.path.insert(0, str(thisDir.parent))
+
+from UniGrammar.batch import runBatch
+
+jobsLines = [
+	'{"id": "a", "command": "stats"}\n',
+	"\n",
+	"not json\n",
+	'{"command": "unknown"}\n',
+	'["not an object"]\n',
+	'{"id": "b", "command": "stats"}\n',
+]
+
+
+class Tests(unittest.TestCase):
+	def runJobs(self, jobs):
+		out = io.StringIO()
+		counts = runBatch(iter(jobsLines), out, jobs=jobs)
+		return counts, {r["id"]: r for r in map(json.loads, out.getvalue().splitlines())}
+
+	def checkResponses(self, counts, responses):
+		self.assertEqual(counts, (2, 3))
+		self.assertEqual(sorted(responses, key=str), [3, 4, 5, "a", "b"])  # jobs without `id` get the number of their line
+		self.assertTrue(responses["a"]["ok"])
+		self.assertIn("requests", responses["b"]["result"])
+		self.assertIn("Malformed", responses[3]["error"])
+		self.assertIn("Unknown command", responses[4]["error"])
+		self.assertIn("Malformed", responses[5]["error"])
+
+	def testSequential(self):
+		counts, responses = self.runJobs(1)
+		self.checkResponses(counts, responses)
+		self.assertEqual(responses["b"]["result"]["requests"], {"stats": 2, "unknown": 1})  # counted before being answered
+
+	def testThreads(self):
+		self.checkResponses(*self.runJobs(3))
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,40 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+thisDir = Path(__file__).absolute().parent
+sys.path.insert(0, str(thisDir.parent))
+
+from UniGrammar.core.benchmarking import CostModel, chooseBackend, fitCostModel, loadCostModels, saveCostModels, stratifiedSample
+
+
+class Tests(unittest.TestCase):
+	def testStratifiedSampleKeepsCorpusOrder(self):
+		corpus = ["b", "a", "c", "b", "dd", "ee"]
+		self.assertEqual(stratifiedSample(corpus, strata=1, perStratum=5), ["b", "a", "c", "dd", "ee"])
+		self.assertEqual(stratifiedSample(corpus, strata=2, perStratum=1), ["a", "dd"])
+		self.assertEqual(stratifiedSample([]), [])
+
+	def testFit(self):
+		m = fitCostModel([(0, 1.0), (10, 2.0), (20, 3.0)])
+		self.assertAlmostEqual(m.fixed, 1.0)
+		self.assertAlmostEqual(m.perByte, 0.1)
+		self.assertEqual(m.samples, 3)
+
+	def testChoose(self):
+		models = {"slowStart": CostModel(1.0, 0.0), "linear": CostModel(0.0, 0.01)}
+		self.assertEqual(chooseBackend(models, 10), "linear")
+		self.assertEqual(chooseBackend(models, 1000), "slowStart")
+		self.assertIsNone(chooseBackend({}, 10))
+
+	def testRoundTrip(self):
+		with tempfile.TemporaryDirectory() as d:
+			d = Path(d)
+			self.assertEqual(loadCostModels(d, "g"), {})
+			saveCostModels(d, "g", {"lark": CostModel(0.5, 0.25, 4)})
+			self.assertEqual(loadCostModels(d, "g")["lark"].toDict(), {"fixed": 0.5, "perByte": 0.25, "samples": 4})
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,94 @@
+import pickle
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+thisDir = Path(__file__).absolute().parent
+sys.path.insert(0, str(thisDir.parent))
+
+from UniGrammar.__main__ import _compileInWorker
+from UniGrammar.core.bundleManifest import BundleManifest
+
+
+class PicklableCompiler:
+	def compileStr(self, text, target):
+		return text.upper()
+
+
+class UnpicklableCompiler:
+	def compileStr(self, text, target):
+		return lambda: text
+
+
+class FailingCompiler:
+	def compileStr(self, text, target):
+		raise TypeError("a genuine error of compilation")
+
+
+class ManifestTests(unittest.TestCase):
+	def setUp(self):
+		self.dir = tempfile.TemporaryDirectory()
+		self.bundleDir = Path(self.dir.name)
+		self.source = self.bundleDir / "g.yug"
+
+	def tearDown(self):
+		self.dir.cleanup()
+
+	def makeManifest(self, artefactText="grammar"):
+		m = BundleManifest(self.bundleDir, "options")
+		m.updateSource(self.source, "g", "sourceHash", "wrapperHash")
+		m.updateBackend(self.source, "lark", "transpiledHash", {"g.lark": artefactText})
+		path = m.getArtefactPath("lark", "g.lark")
+		path.parent.mkdir(parents=True)
+		path.write_text(artefactText, encoding="utf-8")
+		m.save()
+		return BundleManifest.load(self.bundleDir, "options")
+
+	def testFresh(self):
+		m = self.makeManifest()
+		self.assertTrue(m.isSourceFresh(self.source, "sourceHash"))
+		self.assertTrue(m.isTranspiledFresh(self.source, "lark", "transpiledHash"))
+		self.assertFalse(m.isSourceFresh(self.source, "changed"))
+		self.assertFalse(m.isTranspiledFresh(self.source, "lark", "changed"))
+		self.assertEqual(list(m.iterArtefacts(self.source)), [("lark", "g.lark")])
+
+	def testOptionsChanged(self):
+		self.makeManifest()
+		self.assertFalse(BundleManifest.load(self.bundleDir, "other options").isSourceFresh(self.source, "sourceHash"))
+
+	def testArtefactChangedOnDisk(self):
+		m = self.makeManifest()
+		m.getArtefactPath("lark", "g.lark").write_text("edited", encoding="utf-8")
+		self.assertFalse(m.isSourceFresh(self.source, "sourceHash"))
+		self.assertFalse(m.isTranspiledFresh(self.source, "lark", "transpiledHash"))
+
+	def testArtefactsAddedByFlush(self):
+		m = self.makeManifest()
+		m.addArtefacts(self.source, "lark", {"g/parser.py": b"flushed"})
+		self.assertFalse(m.isSourceFresh(self.source, "sourceHash"))
+		path = m.getArtefactPath("lark", "g/parser.py")
+		path.parent.mkdir()
+		path.write_bytes(b"flushed")
+		self.assertTrue(m.isSourceFresh(self.source, "sourceHash"))
+
+	def testArtefactMissing(self):
+		m = self.makeManifest()
+		m.getArtefactPath("lark", "g.lark").unlink()
+		self.assertFalse(m.isSourceFresh(self.source, "sourceHash"))
+
+
+class CompileInWorkerTests(unittest.TestCase):
+	def testPicklable(self):
+		self.assertEqual(pickle.loads(_compileInWorker(PicklableCompiler, "a")), "A")
+
+	def testUnpicklableIsSignalled(self):
+		self.assertIsNone(_compileInWorker(UnpicklableCompiler, "a"))
+
+	def testCompilationErrorsPropagate(self):
+		with self.assertRaises(TypeError):
+			_compileInWorker(FailingCompiler, "a")
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,82 @@
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+thisDir = Path(__file__).absolute().parent
+sys.path.insert(0, str(thisDir.parent))
+
+from helpers import listGrammarDict, makeParser, nestedGrammarDict, transpileWrapper
+from UniGrammar.core.diffTesting import compareBackendsResults, iterMismatches, normalizeParseResult, recordTypeKey
+from UniGrammar.core.WrapperGen.WrapperGenContext import RecordsMode
+
+
+def parseWithWrapper(parsed, grammar=listGrammarDict, **kwargs):
+	"""Returns the result of processing `parsed` by the generated wrapper and the schemas"""
+	ns, _source, capSchema, iterSchema = transpileWrapper(grammar, **kwargs)
+	return makeParser(ns, parsed, SimpleNamespace(iterateCollection=iter)).__MAIN_PRODUCTION__(parsed), capSchema, iterSchema
+
+
+parsedPairs = [SimpleNamespace(a="x", b="y"), SimpleNamespace(a="x", b="Y")]
+
+
+class NormalizeTests(unittest.TestCase):
+	def testRecords(self):
+		res, capSchema, iterSchema = parseWithWrapper(parsedPairs)
+		self.assertEqual(normalizeParseResult(res, capSchema, iterSchema), [{recordTypeKey: "pair", "a": "x", "b": "y"}, {recordTypeKey: "pair", "a": "x", "b": "Y"}])
+
+	def testLazyCollections(self):
+		res, capSchema, iterSchema = parseWithWrapper(parsedPairs, lazyIters=True)
+		self.assertEqual(normalizeParseResult(res, capSchema, iterSchema)[1]["b"], "Y")
+
+	def testColumnar(self):
+		res, capSchema, iterSchema = parseWithWrapper(parsedPairs, columnar=True)
+		self.assertEqual(normalizeParseResult(res, capSchema, iterSchema), {recordTypeKey: "pairs_columns", "a": ["x", "x"], "b": ["y", "Y"]})
+
+	def testRuleCapturedTwice(self):
+		def parseLeaf(a):
+			parsed = SimpleNamespace(nested=None, leaf=SimpleNamespace(a=a, b="y"))
+			return parseWithWrapper(parsed, nestedGrammarDict, recordsMode=mode)
+
+		for mode in RecordsMode:
+			with self.subTest(mode=mode):
+				expected, capSchema, iterSchema = parseLeaf("y")
+				self.assertEqual(capSchema["leaf"], {"y": "b"})  # `a` is overwritten in the schema
+				actual, _capSchema, _iterSchema = parseLeaf("Y")
+				mismatches = list(iterMismatches(normalizeParseResult(expected, capSchema, iterSchema), normalizeParseResult(actual, capSchema, iterSchema)))
+				self.assertEqual([str(m) for m in mismatches], [".a: 'y' != 'Y'"])
+
+	def testTerminalsAsStrings(self):
+		self.assertEqual(normalizeParseResult(Path("a"), {}, set()), "a")
+
+
+class MismatchesTests(unittest.TestCase):
+	def testColumnarMismatchIsAtTheCell(self):
+		expected, capSchema, iterSchema = parseWithWrapper(parsedPairs, columnar=True)
+		actual, _capSchema, _iterSchema = parseWithWrapper([SimpleNamespace(a="x", b="y"), SimpleNamespace(a="x", b="y")], columnar=True)
+		mismatches = list(iterMismatches(normalizeParseResult(expected, capSchema, iterSchema), normalizeParseResult(actual, capSchema, iterSchema)))
+		self.assertEqual([str(m) for m in mismatches], [".b[1]: 'Y' != 'y'"])
+
+	def testDifferentTypesAtTheRecord(self):
+		mismatches = list(iterMismatches({recordTypeKey: "a", "x": 1}, {recordTypeKey: "b", "x": 2}, "root"))
+		self.assertEqual([m.path for m in mismatches], ["root"])
+
+	def testListsOfDifferentLengths(self):
+		mismatches = list(iterMismatches([1, 2, 3], [1, 5]))
+		self.assertEqual([str(m) for m in mismatches], ["<root>: <list of 3> != <list of 2>", "[1]: 2 != 5"])
+
+
+class CompareTests(unittest.TestCase):
+	def testRejectedByBoth(self):
+		self.assertEqual(compareBackendsResults((None, "error a"), (None, "error b")), [])
+
+	def testRejectedByOne(self):
+		mismatches = compareBackendsResults(("x", None), (None, "SyntaxError: boom"))
+		self.assertEqual([str(m) for m in mismatches], ["<root>: 'x' != 'rejected: SyntaxError: boom'"])
+
+	def testMaxMismatches(self):
+		self.assertEqual(len(compareBackendsResults((list(range(10)), None), ([-1] * 10, None), 3)), 3)
+
+
+if __name__ == "__main__":
+	unittest.main()
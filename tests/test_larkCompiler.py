@@ -0,0 +1,55 @@
+import importlib.util
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+thisDir = Path(__file__).absolute().parent
+sys.path.insert(0, str(thisDir.parent))
+
+from helpers import TemporaryCacheDir
+from UniGrammar.tools.python.lark import LarkCompiler
+
+# `X` and `Y` collide: LALR's lexer takes `abc` for `X` and rejects it
+collidingTerminalsGrammar = """
+start: b | c
+b: Y
+c: X "!"
+X: /[a-z]+/
+Y: /[a-m]+/
+%ignore " "
+"""
+
+lalrGrammar = """
+start: pair+
+pair: WORD "=" NUMBER
+WORD: /[a-z]+/
+NUMBER: /[0-9]+/
+%ignore " "
+"""
+
+
+class Tests(TemporaryCacheDir, unittest.TestCase):
+	def setUp(self):
+		if importlib.util.find_spec("lark") is None or importlib.util.find_spec("interegular") is None:
+			self.skipTest("lark or interegular is not installed")
+		super().setUp()
+
+	def testCollidingTerminalsGetEarley(self):
+		parser = LarkCompiler().compileStr(collidingTerminalsGrammar)
+		self.assertEqual(parser.options.parser, "earley")
+		self.assertEqual(parser.parse("abc").children[0].data, "b")
+		self.assertEqual(parser.parse("xyz!").children[0].data, "c")
+
+	def testLALRIsCached(self):
+		parser = LarkCompiler().compileStr(lalrGrammar)
+		self.assertEqual(parser.options.parser, "lalr")
+		self.assertEqual(len(parser.parse("a = 1 b = 2").children), 2)
+		self.assertEqual(len(list((self.cacheDir / "compiled" / "lark").iterdir())), 1)
+
+		with mock.patch("lark.parsers.lalr_analysis.LALR_Analyzer.compute_lalr", side_effect=AssertionError("must be loaded from the cache")):
+			self.assertEqual(len(LarkCompiler().compileStr(lalrGrammar).parse("c = 3").children), 1)
+
+
+if __name__ == "__main__":
+	unittest.main()
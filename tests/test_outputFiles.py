@@ -0,0 +1,80 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+thisDir = Path(__file__).absolute().parent
+sys.path.insert(0, str(thisDir.parent))
+
+from UniGrammar.core.outputFiles import WriterIfChanged, WriteStats, getHashSidecarPath, writeTextIfChanged
+
+
+class Tests(unittest.TestCase):
+	def setUp(self):
+		self.dir = tempfile.TemporaryDirectory()
+		self.path = Path(self.dir.name) / "sub" / "out.txt"
+
+	def tearDown(self):
+		self.dir.cleanup()
+
+	def listDir(self):
+		return sorted(p.name for p in self.path.parent.iterdir())
+
+	def testUnchangedIsNotWritten(self):
+		self.assertTrue(writeTextIfChanged(self.path, "a"))
+		mtime = self.path.stat().st_mtime_ns
+		self.assertFalse(writeTextIfChanged(self.path, "a"))
+		self.assertEqual(self.path.stat().st_mtime_ns, mtime)
+		self.assertEqual(self.listDir(), [".out.txt.sha256", "out.txt"])
+
+	def testChangedIsWritten(self):
+		writeTextIfChanged(self.path, "a")
+		self.assertTrue(writeTextIfChanged(self.path, "b"))
+		self.assertEqual(self.path.read_text(encoding="utf-8"), "b")
+
+	def testEditedByHandIsRewritten(self):
+		writeTextIfChanged(self.path, "a")
+		self.path.write_text("edited", encoding="utf-8")
+		self.assertTrue(writeTextIfChanged(self.path, "a"))
+		self.assertEqual(self.path.read_text(encoding="utf-8"), "a")
+
+	def testMissingSidecarIsRewritten(self):
+		writeTextIfChanged(self.path, "a")
+		getHashSidecarPath(self.path).unlink()
+		self.assertTrue(writeTextIfChanged(self.path, "a"))
+
+	def testStreamed(self):
+		with WriterIfChanged(self.path) as w:
+			for part in ("ab", "cд"):
+				w.write(part)
+		self.assertTrue(w.written)
+		self.assertEqual(self.path.read_text(encoding="utf-8"), "abcд")
+
+	def testErrorLeavesTheFile(self):
+		writeTextIfChanged(self.path, "a")
+		with self.assertRaises(KeyError):
+			with WriterIfChanged(self.path) as w:
+				w.write("b")
+				raise KeyError()
+		self.assertIsNone(w.written)
+		self.assertEqual(self.path.read_text(encoding="utf-8"), "a")
+		self.assertEqual(self.listDir(), [".out.txt.sha256", "out.txt"])
+
+	@unittest.skipIf(os.name != "posix", "modes are POSIX-specific")
+	def testModeKept(self):
+		writeTextIfChanged(self.path, "a")
+		os.chmod(self.path, 0o640)
+		writeTextIfChanged(self.path, "b")
+		self.assertEqual(self.path.stat().st_mode & 0o777, 0o640)
+
+	def testStats(self):
+		stats = WriteStats()
+		stats.register(writeTextIfChanged(self.path, "a"))
+		stats.register(writeTextIfChanged(self.path, "a"))
+		self.assertEqual((stats.written, stats.skipped), (1, 1))
+		self.assertEqual(str(stats), "written: 1, unchanged: 1")
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,55 @@
+import sys
+import time
+import unittest
+from pathlib import Path
+
+thisDir = Path(__file__).absolute().parent
+sys.path.insert(0, str(thisDir.parent))
+
+from UniGrammar.core import profiling
+
+
+class Tests(unittest.TestCase):
+	def testNoProfiler(self):
+		with profiling.span("phase") as s:
+			self.assertIsNone(s)
+
+	def testNestedSpans(self):
+		with profiling.profile() as p:
+			with profiling.span("outer", file="a"):
+				with profiling.span("inner"):
+					time.sleep(0.002)
+				with profiling.span("inner"):
+					pass
+
+		agg = p.aggregate()
+		self.assertEqual(agg["inner"]["count"], 2)
+		self.assertEqual(agg["outer"]["total"], agg["outer"]["self"] + agg["inner"]["total"])
+		self.assertGreaterEqual(agg["inner"]["total"], 2000000)
+		self.assertIsNone(agg["outer"]["memoryPeak"])
+
+		events = p.toChromeTrace()["traceEvents"]
+		self.assertEqual([e["name"] for e in events], ["outer", "inner", "inner"])
+		self.assertEqual(events[0]["args"], {"file": "a"})
+
+		lines = p.summary().splitlines()
+		self.assertTrue(lines[0].startswith("phase"))
+		self.assertTrue(lines[2].startswith("inner"))  # sorted by self time
+
+	def testMemory(self):
+		with profiling.profile(traceMemory=True) as p:
+			with profiling.span("allocating"):
+				data = bytearray(1 << 20)
+				del data
+		self.assertGreaterEqual(p.aggregate()["allocating"]["memoryPeak"], 1 << 20)
+
+	def testInnermostProfilerGetsSpans(self):
+		with profiling.profile() as outer:
+			with profiling.profile() as inner:
+				with profiling.span("phase"):
+					pass
+		self.assertEqual((len(outer.spans), len(inner.spans)), (0, 1))
+
+
+if __name__ == "__main__":
+	unittest.main()
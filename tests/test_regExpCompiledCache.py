@@ -0,0 +1,40 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+thisDir = Path(__file__).absolute().parent
+sys.path.insert(0, str(thisDir.parent))
+
+from UniGrammar.tools.regExps.python import PythonRegExpCompiler, compiledCache
+from UniGrammar.tools.regExps.python.compiledCache import CompiledPatternCache, deserializePattern, serializePattern
+
+
+class Tests(unittest.TestCase):
+	PATTERN = "(?P<kw>i(?:[fn]|mport))(?P<num>\\d+)?"
+
+	def testRoundTrip(self):
+		p = deserializePattern(serializePattern(self.PATTERN), self.PATTERN)
+		self.assertEqual(p.fullmatch("import12").groupdict(), {"kw": "import", "num": "12"})
+		self.assertIsNone(p.fullmatch("imports"))
+
+	def testStaleIsRecompiled(self):
+		p = deserializePattern(serializePattern("a+"), self.PATTERN)
+		self.assertEqual(p.pattern, self.PATTERN)
+		self.assertIsNotNone(p.fullmatch("in"))
+
+	def testCompilerLoadsLazily(self):
+		with tempfile.TemporaryDirectory() as d:
+			PythonRegExpCompiler(CompiledPatternCache(d)).compileStr(self.PATTERN)
+			self.assertEqual(len(list(Path(d).iterdir())), 1)
+
+			with mock.patch.object(compiledCache.sre_compile, "compile", side_effect=AssertionError("must be loaded from the cache")):
+				c = PythonRegExpCompiler(CompiledPatternCache(d))
+				p = c.compileStr(self.PATTERN)
+				self.assertIs(c.compileStr(self.PATTERN), p)
+				self.assertEqual(p.fullmatch("if1").group("num"), "1")
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,104 @@
+import random
+import re
+import sre_constants as sc
+import sre_parse as sp
+import sys
+import unittest
+from pathlib import Path
+
+thisDir = Path(__file__).absolute().parent
+sys.path.insert(0, str(thisDir.parent))
+
+from UniGrammar import transpile
+from UniGrammar.ownGrammarFormat import parseUniGrammar
+from UniGrammar.tools.regExps.python.generator import PythonRegExpGenerator, buildLiteralsTrie, factorAlternatives, factorSubPattern, unparseSubPattern
+
+
+def toPlain(el):
+	"""Converts an `sre_parse` tree into the lists and tuples the generator emits"""
+	if isinstance(el, sp.SubPattern):
+		return [toPlain(subEl) for subEl in el]
+	op, av = el
+	if op is sc.BRANCH:
+		return (op, (None, [toPlain(b) for b in av[1]]))
+	if op is sc.MAX_REPEAT or op is sc.MIN_REPEAT:
+		return (op, (av[0], av[1], toPlain(av[2])))
+	if op is sc.SUBPATTERN:
+		return (op, (av[0], av[1], av[2], toPlain(av[3])))
+	return el
+
+
+def factor(rx: str) -> str:
+	return unparseSubPattern(factorSubPattern(toPlain(sp.parse(rx))))
+
+
+class Tests(unittest.TestCase):
+	PATTERNS = (
+		"if|in|import|is|x|y",
+		"a|ab",
+		"ab|a",
+		"a|ab|abc|b",
+		"abc|ab|a|b",
+		"ab|a|ac",
+		"ab|[0-9]+|ac",
+		"ab|a|ab",
+		"(?:a|ab)c",
+		"(?:ab|a|b)(?:b|bc)?c",
+		"x(?:a|b|[c-d]|ef)*y",
+		"(?P<k>if|in)|i",
+	)
+
+	def assertEquivalent(self, rx: str, factored: str) -> None:
+		rnd = random.Random(42)
+		alphabet = "abcdefinmoprstxy0"
+		for _i in range(3000):
+			s = "".join(rnd.choice(alphabet) for _j in range(rnd.randint(0, 6)))
+			expected = re.match(rx, s)
+			actual = re.match(factored, s)
+			with self.subTest(rx=rx, factored=factored, s=s):
+				self.assertEqual(expected.group(0) if expected else None, actual.group(0) if actual else None)
+				self.assertEqual(bool(re.fullmatch(rx, s)), bool(re.fullmatch(factored, s)))
+
+	def testEquivalence(self):
+		for rx in self.PATTERNS:
+			self.assertEquivalent(rx, factor(rx))
+
+	def testPriorityKept(self):
+		self.assertEqual(re.match(factor("a|ab"), "ab").group(0), "a")
+		self.assertEqual(re.match(factor("ab|a"), "ab").group(0), "ab")
+
+	def testPrefixesFactored(self):
+		self.assertEqual(factor("if|in|import"), "i(?:[fn]|mport)")
+		self.assertEqual(factor("ab|a"), "ab?")
+		self.assertEqual(factor("a|ab"), "ab??")
+
+	def testNonAdjacentNotMoved(self):
+		alts = factorAlternatives(toPlain(b) for b in sp.parse("ab|[0-9]+|ac")[0][1][1])
+		self.assertEqual(len(alts), 3)
+		self.assertEqual(unparseSubPattern(alts[1]), "[0-9]+")
+
+	def testTrieBarrier(self):
+		trie = buildLiteralsTrie([(1, 2), (1,), (1, 3)])
+		self.assertEqual(len(trie), 1)
+		self.assertEqual([e[0] for e in trie[0][1]], [2, None, 3])
+
+	def testSequencesNotSpliced(self):
+		self.assertEqual(factorSubPattern([(sc.LITERAL, 97), [(sc.LITERAL, 98)]]), [(sc.LITERAL, 97), (sc.LITERAL, 98)])
+		self.assertEqual(factorSubPattern((sc.BRANCH, (None, [[(sc.LITERAL, 97)], [(sc.LITERAL, 98)]]))), [(sc.IN, [(sc.LITERAL, 97), (sc.LITERAL, 98)])])
+
+	def testTranspile(self):
+		g = parseUniGrammar({
+			"meta": {"id": "kw", "title": "kw", "license": "Unlicense"},
+			"doc": "keywords followed by a number",
+			"chars": [{"id": "x", "lit": "x"}, {"id": "digit", "wellknown": "digits"}],
+			"keywords": [{"id": "if", "lit": "if"}, {"id": "in", "lit": "in"}, {"id": "import", "lit": "import"}],
+			"fragmented": [{"id": "num", "min": 1, "ref": "digit"}],
+			"prods": [{"id": "kw", "seq": [{"alt": [{"ref": "if"}, {"ref": "in"}, {"ref": "import"}, {"ref": "x"}]}, {"ref": "num", "cap": "num"}]}],
+		})
+		rx = transpile(g, PythonRegExpGenerator).text
+		self.assertEqual(rx, "(?:i(?:[fn]|mport)|[x])(?P<num>\\d+)")
+		self.assertEqual(re.fullmatch(rx, "import12").group("num"), "12")
+
+
+if __name__ == "__main__":
+	unittest.main()
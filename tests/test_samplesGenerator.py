@@ -0,0 +1,77 @@
+import io
+import random
+import re
+import sys
+import unittest
+from pathlib import Path
+
+thisDir = Path(__file__).absolute().parent
+sys.path.insert(0, str(thisDir.parent))
+
+from helpers import nestedGrammarDict
+from UniGrammar.core.samplesGenerator import SamplesGenerator, drawTargetSize, parseSize
+from UniGrammar.ownGrammarFormat import parseUniGrammar
+
+digitsGrammarDict = {
+	"meta": {"id": "pairs", "title": "pairs", "license": "Unlicense"},
+	"doc": "`x` or `y` followed by digits, many times",
+	"chars": [{"id": "x", "lit": "x"}, {"id": "y", "lit": "y"}, {"id": "digit", "wellknown": "digits"}],
+	"fragmented": [{"id": "num", "min": 1, "ref": "digit"}],
+	"prods": [
+		{"id": "pairs", "min": 1, "ref": "pair"},
+		{"id": "pair", "seq": [{"alt": [{"ref": "x"}, {"ref": "y"}]}, {"ref": "num", "cap": "num"}]},
+	],
+}
+listRx = re.compile("(?:[xy][0-9]+)+")
+
+
+class GeneratorTests(unittest.TestCase):
+	def testSamplesMatch(self):
+		gen = SamplesGenerator(parseUniGrammar(dict(digitsGrammarDict)))
+		for seed in range(20):
+			with self.subTest(seed=seed):
+				self.assertRegex(gen.genSample(100, seed), "^" + listRx.pattern + "$")
+
+	def testTargetSize(self):
+		gen = SamplesGenerator(parseUniGrammar(dict(digitsGrammarDict)))
+		sample = gen.genSample(10000, 1)
+		self.assertGreaterEqual(len(sample), 10000)
+		self.assertLess(len(sample), 10100)
+
+	def testDeterministic(self):
+		gen = SamplesGenerator(parseUniGrammar(dict(digitsGrammarDict)))
+		sample = gen.genSample(1000, "seed")
+		self.assertEqual(SamplesGenerator(parseUniGrammar(dict(digitsGrammarDict))).genSample(1000, "seed"), sample)
+		self.assertNotEqual(gen.genSample(1000, "another seed"), sample)
+
+		out = io.StringIO()
+		self.assertEqual(gen.genSampleInto(out, 1000, "seed", chunkSize=7), len(sample))
+		self.assertEqual(out.getvalue(), sample)
+
+	def testRecursionTerminates(self):
+		gen = SamplesGenerator(parseUniGrammar(dict(nestedGrammarDict)), maxDepth=8)
+		for seed in range(20):
+			with self.subTest(seed=seed):
+				self.assertRegex(gen.genSample(1000, seed), "^x{0,8}yy$")
+
+
+class SizesTests(unittest.TestCase):
+	def testParseSize(self):
+		self.assertEqual(parseSize("64k"), 65536)
+		self.assertEqual(parseSize("1.5MiB"), 3 << 19)
+		self.assertEqual(parseSize("10b"), 10)
+		self.assertEqual(parseSize(5), 5)
+
+	def testDrawTargetSize(self):
+		rnd = random.Random(0)
+		for distribution in ("uniform", "loguniform"):
+			with self.subTest(distribution=distribution):
+				sizes = [drawTargetSize(rnd, 10, 10000, distribution) for _i in range(200)]
+				self.assertTrue(all(10 <= s <= 10000 for s in sizes))
+		self.assertEqual(drawTargetSize(rnd, 10, 10000, "fixed"), 10)
+		with self.assertRaises(ValueError):
+			drawTargetSize(rnd, 1, 2, "normal")
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,73 @@
+import json
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+thisDir = Path(__file__).absolute().parent
+sys.path.insert(0, str(thisDir.parent))
+
+from UniGrammar.server import _JSONLinesServerMixin, generateServerToken
+from UniGrammar.session import SerializedParser, Session, SessionError
+
+
+class OutputRootTests(unittest.TestCase):
+	def testConfined(self):
+		with tempfile.TemporaryDirectory() as d:
+			root = Path(d).resolve()
+			s = Session(outputRoot=root)
+			self.assertEqual(s.resolveOutputDir("out"), root / "out")
+			self.assertEqual(s.resolveOutputDir("."), root)
+			for outside in ("..", "out/../../x", "/tmp"):
+				with self.subTest(outside=outside):
+					with self.assertRaises(SessionError):
+						s.resolveOutputDir(outside)
+
+	def testUnconfined(self):
+		self.assertEqual(Session().resolveOutputDir("/tmp/x"), Path("/tmp/x"))
+
+
+class SerializedParserTests(unittest.TestCase):
+	def testCallsAreSerialized(self):
+		active = []
+		overlaps = []
+
+		def parser(text):
+			active.append(text)
+			overlaps.append(len(active))
+			time.sleep(0.001)
+			active.remove(text)
+			return text
+
+		p = SerializedParser(parser)
+		threads = [threading.Thread(target=p, args=(str(i),)) for i in range(8)]
+		for t in threads:
+			t.start()
+		for t in threads:
+			t.join()
+		self.assertEqual(max(overlaps), 1)
+
+
+class TokenServer(_JSONLinesServerMixin):
+	def __init__(self, token):
+		self.initSession(Session(), 1, token)
+
+
+class TokenTests(unittest.TestCase):
+	def testToken(self):
+		with tempfile.TemporaryDirectory() as d:
+			tokenPath = Path(d) / "token"
+			token = generateServerToken(tokenPath)
+			self.assertEqual(tokenPath.read_text(encoding="utf-8"), token)
+			self.assertEqual(tokenPath.stat().st_mode & 0o077, 0)
+
+		server = TokenServer(token)
+		self.assertFalse(server.processLine(json.dumps({"id": 1, "command": "stats"}).encode("utf-8"))["ok"])
+		self.assertFalse(server.processLine(json.dumps({"id": 1, "command": "stats", "token": "wrong"}).encode("utf-8"))["ok"])
+		self.assertTrue(server.processLine(json.dumps({"id": 1, "command": "stats", "token": token}).encode("utf-8"))["ok"])
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,45 @@
+import pickle
+import sys
+import unittest
+from pathlib import Path
+
+thisDir = Path(__file__).absolute().parent
+sys.path.insert(0, str(thisDir.parent))
+
+from helpers import TemporaryCacheDir
+from UniGrammar.tools.python.TatSu import GeneratedTatSuModel, TatSuCachingCompiler
+
+grammar = """
+start = greeting $ ;
+greeting = 'hello' name:('world' | 'there') ;
+"""
+
+
+class Tests(TemporaryCacheDir, unittest.TestCase):
+	def setUp(self):
+		try:
+			import tatsu
+		except ImportError:
+			self.skipTest("TatSu is not installed")
+
+		super().setUp()
+		self.source = tatsu.to_python_sourcecode(grammar)
+		self.key = TatSuCachingCompiler.CACHE.getKey(grammar)
+
+	def assertParses(self, model):
+		self.assertEqual(model.parse("hello world")["name"], "world")
+
+	def testRoundTripThroughCache(self):
+		model = GeneratedTatSuModel(self.source, TatSuCachingCompiler.CACHE.put(self.key, self.source), self.key)
+		self.assertParses(model)
+		restored = pickle.loads(pickle.dumps(model))
+		self.assertEqual(restored.key, self.key)
+		self.assertParses(restored)
+
+	def testRoundTripWithoutCache(self):
+		model = GeneratedTatSuModel(self.source, compile(self.source, "tatsu", "exec"), self.key)
+		self.assertParses(pickle.loads(pickle.dumps(model)))
+
+
+if __name__ == "__main__":
+	unittest.main()
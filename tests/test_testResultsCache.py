@@ -0,0 +1,117 @@
+import io
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+thisDir = Path(__file__).absolute().parent
+sys.path.insert(0, str(thisDir.parent))
+
+from UniGrammar import __main__ as cliModule
+from UniGrammar.core.testResultsCache import TestResultsCache, getBackendVersion, getLibraryVersion
+
+
+class FakeProgressReporter(io.StringIO):
+	def __init__(self, *args, **kwargs):
+		super().__init__()
+
+	def report(self, *args, **kwargs):
+		pass
+
+
+class CountingCompiler:
+	compilations = 0
+
+	def compileStr(self, text, target):
+		self.__class__.compilations += 1
+		return text
+
+
+class FakeParserFactory:
+	META = SimpleNamespace(product=SimpleNamespace(name="pytest"))
+
+	parsed = []
+
+	def fromInternal(self, compiled):
+		def parse(s):
+			self.__class__.parsed.append(s)
+			if s == "interrupt":
+				raise KeyboardInterrupt()
+			if s == "deep":
+				raise RecursionError("maximum recursion depth exceeded")
+			if s.startswith("bad"):
+				raise ValueError("bad sample")
+
+		return parse
+
+
+class FakeRunner:
+	COMPILER = CountingCompiler
+	PARSER = FakeParserFactory
+
+
+class RunTestsTests(unittest.TestCase):
+	def setUp(self):
+		self.dir = tempfile.TemporaryDirectory()
+		self.cache = TestResultsCache(Path(self.dir.name) / "results.sqlite")
+		self.cache.open()
+		self.reporter = mock.patch.object(cliModule, "chosenProgressReporter", FakeProgressReporter)
+		self.reporter.start()
+		FakeParserFactory.parsed = []
+		CountingCompiler.compilations = 0
+
+	def tearDown(self):
+		self.reporter.stop()
+		self.cache.close()
+		self.dir.cleanup()
+
+	def runFake(self, tests, force=False):
+		return cliModule.runTestsForGenerator(tests, FakeRunner, SimpleNamespace(text="grammar"), self.cache, "fake", "1", force)
+
+	def testCached(self):
+		self.assertEqual(self.runFake(("good", "bad")), 0)
+		FakeParserFactory.parsed = []
+		self.assertEqual(self.runFake(("good", "bad")), 2)
+		self.assertEqual(FakeParserFactory.parsed, [])
+		self.assertEqual(CountingCompiler.compilations, 1)
+
+		stored = self.cache.getMany(self.cache.hashGrammar("grammar"), "fake", "1")
+		self.assertEqual(sorted((r.ok, r.error) for r in stored.values()), [(False, "bad sample"), (True, None)])
+
+	def testForce(self):
+		self.runFake(("good",))
+		self.assertEqual(self.runFake(("good",), force=True), 0)
+		self.assertEqual(FakeParserFactory.parsed, ["good", "good"])
+
+	def testEnvironmentDependentFailuresAreNotStored(self):
+		self.runFake(("deep",))
+		self.assertEqual(self.cache.getMany(self.cache.hashGrammar("grammar"), "fake", "1"), {})
+
+	def testInterruptPropagates(self):
+		with self.assertRaises(KeyboardInterrupt):
+			self.runFake(("good", "interrupt", "bad"))
+		self.assertEqual(FakeParserFactory.parsed, ["good", "interrupt"])
+		stored = self.cache.getMany(self.cache.hashGrammar("grammar"), "fake", "1")
+		self.assertEqual(list(stored), [self.cache.hashSample("good")])
+
+
+class VersionTests(unittest.TestCase):
+	def testLibraryVersion(self):
+		import pytest
+
+		self.assertEqual(getLibraryVersion("pytest"), pytest.__version__)
+		self.assertEqual(getLibraryVersion("_pytest"), pytest.__version__)  # an import name, not a distribution one
+		self.assertEqual(getLibraryVersion("surelyNotInstalledLibrary"), "")
+
+	def testRunnerCodeIsInVersion(self):
+		tool = SimpleNamespace(RUNNER=FakeRunner)
+		version = getBackendVersion(tool)
+		self.assertEqual(version, getBackendVersion(tool))
+		with mock.patch.object(CountingCompiler, "__module__", "json"):
+			self.assertNotEqual(getBackendVersion(tool), version)
+
+
+if __name__ == "__main__":
+	unittest.main()
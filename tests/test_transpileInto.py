@@ -0,0 +1,60 @@
+import io
+import sys
+import unittest
+from copy import deepcopy
+from pathlib import Path
+
+thisDir = Path(__file__).absolute().parent
+sys.path.insert(0, str(thisDir.parent))
+
+from helpers import listGrammarDict, nestedGrammarDict
+from UniGrammar import _writeLines, transpile, transpileInto
+from UniGrammar.ownGrammarFormat import parseUniGrammar
+from UniGrammar.tools.multilanguage.antlr4 import ANTLRGenerator
+from UniGrammar.tools.python.parsimonious import ParsimoniousGenerator
+from UniGrammar.tools.python.TatSu import TatSuGenerator
+from UniGrammar.tools.regExps.python.generator import PythonRegExpGenerator
+
+delimitedGrammarDict = {
+	"meta": {"id": "csv", "title": "csv", "license": "Unlicense"},
+	"doc": "`xy` pairs delimited by commas",
+	"chars": [{"id": "x", "lit": "x"}, {"id": "y", "lit": "y"}, {"id": "comma", "lit": ","}],
+	"prods": [
+		{"id": "pairs", "template": "delimited", "part": {"ref": "pair"}, "delimiter": {"ref": "comma"}},
+		{"id": "pair", "seq": [{"ref": "x", "cap": "a"}, {"ref": "y", "cap": "b"}]},
+	],
+}
+
+
+def transpileIntoStr(grammarDict, generator):
+	sink = io.StringIO()
+	transpileInto(parseUniGrammar(deepcopy(grammarDict)), generator, sink)
+	return sink.getvalue()
+
+
+class TranspileIntoTests(unittest.TestCase):
+	def testSameAsTranspile(self):
+		for generator in (ANTLRGenerator, ParsimoniousGenerator, TatSuGenerator):
+			for grammarDict in (listGrammarDict, nestedGrammarDict, delimitedGrammarDict):
+				with self.subTest(generator=generator.__name__, grammar=grammarDict["meta"]["id"]):
+					expected = transpile(parseUniGrammar(deepcopy(grammarDict)), generator).text
+					self.assertEqual(transpileIntoStr(grammarDict, generator), expected)
+
+	def testTemplateIsInstantiated(self):
+		self.assertIn("rest_pair_with_delF", transpileIntoStr(delimitedGrammarDict, ANTLRGenerator))
+
+	def testNotSectioned(self):
+		self.assertEqual(transpileIntoStr(listGrammarDict, PythonRegExpGenerator), transpile(parseUniGrammar(deepcopy(listGrammarDict)), PythonRegExpGenerator).text)
+
+
+class WriteLinesTests(unittest.TestCase):
+	def testSameAsJoin(self):
+		for lines in ((), ("",), ("a",), ("a", "b"), ("", "a", ""), ("a\nb", "c")):
+			with self.subTest(lines=lines):
+				sink = io.StringIO()
+				_writeLines(iter(lines), sink)
+				self.assertEqual(sink.getvalue(), "\n".join(lines))
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,57 @@
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+thisDir = Path(__file__).absolute().parent
+sys.path.insert(0, str(thisDir.parent))
+
+from helpers import TemporaryCacheDir
+from UniGrammar.tools.multilanguage.waxeye import WaxeyeRunner
+
+
+def fakeGenerate(self, internalRepr, nameSpace, language, outDir):
+	self.calls += 1
+	(outDir / nameSpace).mkdir(parents=True)
+	(outDir / nameSpace / "parser.py").write_text("# " + internalRepr, encoding="utf-8")
+
+
+class FakeWaxeyeRunner(WaxeyeRunner):
+	__slots__ = ("calls",)
+
+	_waxeyeGenerate = fakeGenerate
+
+	def __init__(self, versionSalt="1"):  # pylint:disable=super-init-not-called
+		self.versionSalt = versionSalt
+		self.pending = []
+		self.calls = 0
+
+
+class Tests(TemporaryCacheDir, unittest.TestCase):
+	def setUp(self):
+		super().setUp()
+		self.bundleDir = self.tempDir / "bundle"
+
+	def build(self, runner):
+		resources = SimpleNamespace(name="g", parent=SimpleNamespace(bundleDir=self.bundleDir))
+		runner.saveCompiled("g <- 'x'", resources, SimpleNamespace(product=SimpleNamespace(name="waxeye")))
+		return runner.flush(1)
+
+	def testFlush(self):
+		runner = FakeWaxeyeRunner()
+		written = self.build(runner)
+		self.assertEqual(written, {"g": {"g/parser.py": b"# g <- 'x'"}})
+		self.assertEqual([p.name for p in (self.bundleDir / "compiled" / "waxeye").iterdir()], ["g"])  # no cache entries in the bundle
+
+		self.build(runner)
+		self.assertEqual(runner.calls, 1)
+
+	def testVersionInKey(self):
+		self.build(FakeWaxeyeRunner("1"))
+		runner = FakeWaxeyeRunner("2")
+		self.build(runner)
+		self.assertEqual(runner.calls, 1)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,39 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+thisDir = Path(__file__).absolute().parent
+sys.path.insert(0, str(thisDir.parent))
+
+from UniGrammar.core.WrapperGen.bytecode import getWrapperBytecodePath, loadWrapperNamespace, saveWrapperBytecode
+
+
+class Tests(unittest.TestCase):
+	SOURCE = "def f():\n\treturn 42\n"
+
+	def testRoundTrip(self):
+		with tempfile.TemporaryDirectory() as d:
+			d = Path(d)
+			saveWrapperBytecode(d, "w", self.SOURCE)
+			self.assertEqual(loadWrapperNamespace(d, "w")["f"](), 42)
+			self.assertEqual(loadWrapperNamespace(d, "w", self.SOURCE)["f"](), 42)
+
+	def testStaleIgnored(self):
+		with tempfile.TemporaryDirectory() as d:
+			d = Path(d)
+			saveWrapperBytecode(d, "w", self.SOURCE)
+			self.assertEqual(loadWrapperNamespace(d, "w", self.SOURCE.replace("42", "43"))["f"](), 43)
+
+	def testCorruptedWithoutSource(self):
+		with tempfile.TemporaryDirectory() as d:
+			d = Path(d)
+			path = saveWrapperBytecode(d, "w", self.SOURCE)
+			self.assertEqual(path, getWrapperBytecodePath(d, "w"))
+			path.write_bytes(b"garbage")
+			with self.assertRaises(ValueError):
+				loadWrapperNamespace(d, "w")
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,180 @@
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+thisDir = Path(__file__).absolute().parent
+sys.path.insert(0, str(thisDir.parent))
+
+from helpers import CountingBackend, genWrapper, listGrammarDict, makeParser, nestedGrammarDict
+from UniGrammar.core.WrapperGen.WrapperGenContext import RecordsMode
+
+
+class RecordsModesTests(unittest.TestCase):
+	def testModes(self):
+		parsed = SimpleNamespace(first=SimpleNamespace(a="x", b="y"), second=None)
+		for mode in RecordsMode:
+			with self.subTest(mode=mode):
+				ns, _source = genWrapper(recordsMode=mode)
+				res = makeParser(ns, parsed).__MAIN_PRODUCTION__(parsed)
+				self.assertEqual(type(res).__name__, "xy")
+				self.assertEqual((res.a, res.b), ("x", "y"))
+				self.assertEqual(isinstance(res, tuple), mode is RecordsMode.tuple)
+
+	def testTuple(self):
+		ns, _source = genWrapper(recordsMode=RecordsMode.tuple)
+		parsed = SimpleNamespace(first=None, second=SimpleNamespace(a="y", b="x"))
+		self.assertEqual(tuple(makeParser(ns, parsed).__MAIN_PRODUCTION__(parsed)), ("y", "x"))
+
+
+class AltDispatchTests(unittest.TestCase):
+	def testOffByDefault(self):
+		ns, source = genWrapper()
+		self.assertNotIn("getMatchedAlternative", source)
+		parsed = SimpleNamespace(first=SimpleNamespace(a="x", b="y"), second=None)
+		res = makeParser(ns, parsed).__MAIN_PRODUCTION__(parsed)
+		self.assertEqual(type(res).__name__, "xy")
+
+	def testTableUsedWhenStrategyTells(self):
+		ns, _source = genWrapper(altDispatch=True)
+		matched = SimpleNamespace(a="y", b="x")
+		wstr = SimpleNamespace(getMatchedAlternative=lambda parsed: ("yx", matched))
+		parsed = SimpleNamespace(first=SimpleNamespace(a="x", b="y"), second=None)  # probing would choose `first`
+		res = makeParser(ns, parsed, wstr).__MAIN_PRODUCTION__(parsed)
+		self.assertEqual(type(res).__name__, "yx")
+		self.assertEqual((res.a, res.b), ("y", "x"))
+
+	def testProbingFallback(self):
+		ns, _source = genWrapper(altDispatch=True)
+		parsed = SimpleNamespace(first=None, second=SimpleNamespace(a="y", b="x"))
+		res = makeParser(ns, parsed).__MAIN_PRODUCTION__(parsed)
+		self.assertEqual(type(res).__name__, "yx")
+
+
+class ParseManyTests(unittest.TestCase):
+	def testOffByDefault(self):
+		_ns, source = genWrapper()
+		self.assertNotIn("parseMany", source)
+
+	def testParseMany(self):
+		ns, source = genWrapper(parseMany=True)
+		self.assertNotIn("\t", source)
+
+		parsed = SimpleNamespace(first=SimpleNamespace(a="x", b="y"), second=None)
+		parser = makeParser(ns, parsed)
+		parser.backend.parse = lambda s: parsed if s == "xy" else None
+		res = list(parser.parseMany(["xy", "bad", "xy"]))
+		self.assertEqual([type(r).__name__ for r in res], ["xy", "ParseManyError", "xy"])
+		self.assertEqual((res[1].index, res[1].item), (1, "bad"))
+
+
+class InstrumentationTests(unittest.TestCase):
+	def testOffByDefault(self):
+		_ns, source = genWrapper()
+		self.assertNotIn("Instrumentation", source)
+
+	def testCounts(self):
+		ns, source = genWrapper(instrument=True)
+		self.assertNotIn("\t", source)
+		instrumentation = ns["instrumentation"]
+		parserClass = ns["__MAIN_PARSER__"]
+		original = vars(parserClass)["process_xy"]
+		parsed = SimpleNamespace(first=SimpleNamespace(a="x", b="y"), second=None)
+
+		makeParser(ns, parsed).__MAIN_PRODUCTION__(parsed)
+		self.assertEqual(instrumentation.snapshot()["process_xy"][0], 0)
+
+		instrumentation.enable()
+		parser = makeParser(ns, parsed)
+		parser.__MAIN_PRODUCTION__(parsed)
+		parser.__MAIN_PRODUCTION__(parsed)
+		self.assertEqual(instrumentation.snapshot()["process_xy"][0], 2)
+		self.assertEqual(instrumentation.snapshot()["process_yx"][0], 0)
+
+		instrumentation.disable()
+		self.assertIs(vars(parserClass)["process_xy"], original)
+		instrumentation.reset()
+		self.assertEqual(instrumentation.snapshot()["process_xy"], (0, 0))
+
+
+class SpansTests(unittest.TestCase):
+	def testTextGotOnFirstAccess(self):
+		ns, _source = genWrapper(spans=True)
+		parsed = SimpleNamespace(first=SimpleNamespace(a="x", b="y"), second=None)
+		parser = makeParser(ns, parsed, backendCls=CountingBackend)
+
+		res = parser.__MAIN_PRODUCTION__(parsed)
+		self.assertEqual(parser.backend.count, 0)
+		self.assertEqual(str(res.a), "x")
+		self.assertEqual(res.b, "y")
+		self.assertEqual(parser.backend.count, 2)
+		self.assertEqual({res.a: 1}["x"], 1)
+		self.assertEqual(len(res.a), 1)
+		self.assertEqual(parser.backend.count, 2)  # the text is got only once
+
+
+class LazyItersTests(unittest.TestCase):
+	def testItemsProcessedOnAccess(self):
+		ns, _source = genWrapper(listGrammarDict, lazyIters=True)
+		parsed = [SimpleNamespace(a="x", b="y"), SimpleNamespace(a="x", b="Y")]
+		parser = makeParser(ns, parsed, SimpleNamespace(iterateCollection=lambda p: p), CountingBackend)
+
+		res = parser.__MAIN_PRODUCTION__(parsed)
+		self.assertEqual(parser.backend.count, 0)
+		self.assertEqual(len(res), 2)
+		self.assertEqual(res[1].b, "Y")
+		self.assertEqual(parser.backend.count, 2)
+		self.assertEqual([(el.a, el.b) for el in res], [("x", "y"), ("x", "Y")])
+		self.assertEqual(parser.backend.count, 6)  # nothing is cached
+
+	def testOffByDefault(self):
+		ns, source = genWrapper(listGrammarDict)
+		self.assertNotIn("LazyProcessedCollection", source)
+		parsed = [SimpleNamespace(a="x", b="y")]
+		parser = makeParser(ns, parsed, SimpleNamespace(iterateCollection=iter))
+		self.assertIsInstance(parser.__MAIN_PRODUCTION__(parsed), list)
+
+
+class ExplicitStackTests(unittest.TestCase):
+	def testDeepNestingProcessedOnce(self):
+		ns, source = genWrapper(nestedGrammarDict, explicitStack=True)
+		self.assertNotIn("RecursionError", source)
+
+		depth = sys.getrecursionlimit() * 2
+		parsed = SimpleNamespace(nested=None, leaf=SimpleNamespace(a="y", b="y"))
+		for _i in range(depth):
+			parsed = SimpleNamespace(nested=SimpleNamespace(open="x", inner=parsed), leaf=None)
+
+		parser = makeParser(ns, parsed, backendCls=CountingBackend)
+		res = parser.__MAIN_PRODUCTION__(parsed)
+		self.assertEqual(parser.backend.count, depth + 2)  # each terminal is processed exactly once
+
+		for _i in range(depth):
+			self.assertEqual(res.open, "x")
+			res = res.inner
+		self.assertEqual((res.a, res.b), ("y", "y"))
+
+
+class ParsimoniousMatchedAlternativeTests(unittest.TestCase):
+	def testGetMatchedAlternative(self):
+		try:
+			from parsimonious.grammar import Grammar
+		except ImportError:
+			self.skipTest("parsimonious is not installed")
+
+		from UniGrammar.tools.python.parsimonious import ParsimoniousParserBackendWalkStrategy
+
+		g = Grammar(r"""
+			start = xy / yx
+			xy = "x" "y"
+			yx = "y" "x"
+		""")
+		wstr = ParsimoniousParserBackendWalkStrategy(None)
+		name, node = wstr.getMatchedAlternative(g.parse("yx"))
+		self.assertEqual(name, "yx")
+		self.assertEqual(node.text, "yx")
+		self.assertIsNone(wstr.getMatchedAlternative(g["xy"].parse("xy")))
+
+
+if __name__ == "__main__":
+	unittest.main()